@@ -1,12 +1,11 @@
-from pymongo import MongoClient
-from sdk.config import SDKConfig
+from utils.db_utils import get_database
 from utils.logger import logger
 import datetime
 
-# Initialize MongoDB client
-client = MongoClient(SDKConfig.MONGODB_URI)
-db = client[SDKConfig.DATABASE_NAME]
-game_data_collection = db['game_data']
+
+def get_game_data_collection():
+    """Return the AI game data collection from the shared MongoDB client."""
+    return get_database()['game_data']
 
 def store_game_data(player_id, game_type, win_loss, shot_type, foul, reaction_time):
     """Store the game data such as win/loss, shot type, foul, and reaction time in MongoDB."""
@@ -21,7 +20,7 @@ def store_game_data(player_id, game_type, win_loss, shot_type, foul, reaction_ti
     }
 
     try:
-        game_data_collection.insert_one(data)
+        get_game_data_collection().insert_one(data)
         logger.info(f"Stored game data for player {player_id}")
     except Exception as e:
         logger.error(f"Error storing game data: {e}")
@@ -1,4 +1,5 @@
 import logging
+from utils.logger import create_queue_handler
 
 # Set up logger for AI-related activities
 ai_logger = logging.getLogger("AI")
@@ -6,7 +7,8 @@ ai_logger.setLevel(logging.DEBUG)
 handler = logging.StreamHandler()
 formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 handler.setFormatter(formatter)
-ai_logger.addHandler(handler)
+# The stream handler runs on a background thread behind a bounded queue
+ai_logger.addHandler(create_queue_handler([handler]))
 
 def get_ai_logger():
     """Return the AI logger instance."""
@@ -1,7 +1,7 @@
-import numpy as np
+from pymongo.errors import OperationFailure
 from utils.logger import logger
 from utils.db_utils import get_collection, update_document
-from sklearn.linear_model import LinearRegression
+from utils.trends import recent_trend_pipeline, summarize_recent_games
 
 def generate_postgame_summary(player_id, game_data):
     """
@@ -48,28 +48,30 @@ def analyze_trends(player_id, last_n_games=5):
     Returns:
         dict: A trend analysis summary.
     """
-    collection = get_collection("eight_ball_game_data")
-    recent_games = list(collection.find({"player_id": player_id}).sort("game_time", -1).limit(last_n_games))
-
-    if not recent_games:
+    collection = get_collection("eight_ball")
+    try:
+        # One round trip: window selection, gap filling and slopes all run in the database
+        summary = next(collection.aggregate(recent_trend_pipeline(player_id, last_n_games)), None)
+    except OperationFailure as e:
+        # $linearFill needs MongoDB 5.3+; fetch the window and do the same maths here
+        logger.warning(f"Trend pipeline unavailable, computing trends locally: {e}")
+        recent_games = list(collection.find(
+            {"player_id": player_id},
+            {"accuracy": 1, "fouls": 1, "win": 1, "game_time": 1},
+        ).sort("game_time", -1).limit(last_n_games))
+        summary = summarize_recent_games(recent_games[::-1])
+
+    if not summary:
         logger.warning(f"No recent games found for player {player_id}.")
         return {}
 
-    accuracy_trend = [game["accuracy"] for game in recent_games]
-    fouls_trend = [game["fouls"] for game in recent_games]
-    win_rate = sum(1 for game in recent_games if game["win"]) / last_n_games
-
-    # Use regression to detect performance trends
-    x_axis = np.arange(len(accuracy_trend)).reshape(-1, 1)
-    accuracy_model = LinearRegression().fit(x_axis, accuracy_trend)
-    fouls_model = LinearRegression().fit(x_axis, fouls_trend)
-
+    # Slopes are fitted oldest to newest, so a positive accuracy slope means improving
     trend_summary = {
-        "accuracy_trend": accuracy_trend,
-        "accuracy_improving": accuracy_model.coef_[0] > 0,  # Positive trend means improving
-        "fouls_trend": fouls_trend,
-        "fouls_decreasing": fouls_model.coef_[0] < 0,  # Negative trend means fewer fouls
-        "win_rate": win_rate,
+        "accuracy_trend": summary["accuracy_series"][::-1],
+        "accuracy_improving": summary["accuracy_slope"] > 0,
+        "fouls_trend": summary["fouls_series"][::-1],
+        "fouls_decreasing": summary["fouls_slope"] < 0,
+        "win_rate": summary["wins"] / last_n_games,
     }
 
     logger.info(f"Trend analysis for player {player_id}: {trend_summary}")
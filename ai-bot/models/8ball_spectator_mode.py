@@ -55,7 +55,7 @@ class SpectatorMode:
         Args:
             player_id (str): Unique identifier for the player.
         """
-        collection = get_collection("eight_ball_game_data")
+        collection = get_collection("eight_ball")
         recent_games = list(collection.find({"player_id": player_id}).sort("game_time", -1).limit(self.max_observation_games))
 
         if not recent_games:
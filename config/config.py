@@ -1,4 +1,5 @@
 import os
+from typing import Dict, Optional
 from pydantic import BaseSettings
 
 class Config(BaseSettings):
@@ -7,6 +8,12 @@ class Config(BaseSettings):
     # MongoDB configuration
     MONGODB_URI: str = "mongodb://localhost:27017/"  # Change this to your MongoDB URI
     DATABASE_NAME: str = "game_database"  # Change this to your database name
+    MONGO_MAX_POOL_SIZE: int = 50  # Max connections in the shared MongoDB client pool
+    MONGO_MIN_POOL_SIZE: int = 0  # Connections kept open when idle
+    WRITE_BUFFER_ENABLED: bool = False  # Buffer processed results and write them with bulk_write
+    WRITE_BUFFER_MAX_DOCUMENTS: int = 500  # Buffered documents per collection that trigger a flush
+    WRITE_BUFFER_MAX_AGE: float = 1.0  # Seconds a buffered document may wait before being flushed
+    WRITE_BUFFER_MAX_RETRIES: int = 3  # Times a document whose flush failed is retried before it is dropped
 
     # Secret keys and environment settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "default_secret_key")  # Secret key for app (use environment variable for production)
@@ -23,9 +30,75 @@ class Config(BaseSettings):
 
     # Log settings
     LOG_LEVEL: str = "INFO"  # Logging level for the app (e.g., DEBUG, INFO, WARNING, ERROR)
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01  # Fraction of log records that include payload-sized fields
+    LOG_PAYLOAD_MAX_BYTES: int = 2048  # Max size of a payload field in a log record (bytes for binary payloads, characters otherwise)
+    LOG_QUEUE_MAX_SIZE: int = 10000  # Records buffered for the background log writer before new ones are dropped
+    LOG_COMPRESS_ROTATED: bool = True  # Gzip log files when they are rotated
     
     # Customizable timeouts or other environment-specific settings
     TIMEOUT: int = 30  # Timeout for database connections, API calls, etc.
+
+    # Rate limiting settings
+    RATE_LIMIT_DEFAULT: int = 100  # Requests per window for each client and route
+    RATE_LIMIT_WINDOW: int = 60  # Rate limit window in seconds
+    RATE_LIMIT_ROUTES: Dict[str, int] = {"/api/v1/process-game-data/batch": 20}  # Per-route limits (URL rule -> requests per window)
+    RATE_LIMIT_API_KEYS: Dict[str, int] = {}  # Per-API-key limits replacing the default
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "mongo" (shared across workers)
+    RATE_LIMIT_MAX_KEYS: int = 10000  # Client keys tracked by the in-memory backend before LRU eviction
+
+    # Ingestion settings
+    BATCH_MAX_ITEMS: int = 500  # Max number of game payloads accepted by the batch endpoint
+    JOB_QUEUE_MAX_SIZE: int = 1000  # Max number of pending async ingestion jobs
+    JOB_WORKERS: int = 4  # Worker threads draining the async ingestion queue
+    JOB_RESULT_TTL: int = 3600  # Seconds a finished job's status stays queryable
+    PROCESSOR_POOL_WORKERS: int = 0  # Processes running game processors (0 runs them inline)
+    PROCESSOR_POOL_START_METHOD: str = "forkserver"  # Start method for processor pool workers
+
+    # Player aggregate settings
+    PLAYER_AGGREGATES_ENABLED: bool = False  # Keep running per-player totals and fold in only each upload's new games
+    PLAYER_AGGREGATES_COLLECTION: str = "player_aggregates"  # Collection holding one aggregate document per game and player
+    PLAYER_AGGREGATE_WINDOW: int = 20  # Recent games kept in each aggregate's windows
+    PLAYER_AGGREGATE_MAX_ATTEMPTS: int = 5  # Tries per aggregate document when concurrent uploads change it first
+
+    # Result cache settings
+    RESULT_CACHE_ENABLED: bool = False  # Return the earlier outcome for payloads that were already processed
+    RESULT_CACHE_MAX_ENTRIES: int = 10000  # Fingerprints kept in the in-memory LRU
+    RESULT_CACHE_TTL: int = 600  # Seconds a processed payload is remembered
+    RESULT_CACHE_PERSISTENT: bool = False  # Also store fingerprints in MongoDB so all workers share them
+    RESULT_CACHE_COLLECTION: str = "result_cache"  # Collection for persistent fingerprints
+
+    # Player profile cache settings
+    PROFILE_CACHE_MAX_ENTRIES: int = 10000  # Profiles kept in the process-wide cache before LRU eviction
+    PROFILE_CACHE_TTL: int = 300  # Seconds a cached profile is used before it is read again
+    PROFILE_CACHE_WRITE_BACK: bool = True  # Coalesce profile saves and write them in the background
+    PROFILE_CACHE_FLUSH_INTERVAL: float = 5.0  # Seconds between background writes of changed profiles
+
+    # Player profile storage settings
+    PROFILE_TREND_WINDOW: int = 500  # Games kept in each profile trend; older games are rolled up and archived
+    PROFILE_STREAK_WINDOW: int = 100  # Ended win streaks kept in a profile
+    PROFILE_ARCHIVE_COLLECTION: str = "player_profile_archive"  # Collection holding games that left the trend window
+    PROFILE_ARCHIVE_BUCKET_SIZE: int = 1000  # Archived games per archive document
+    PROFILE_SMOOTHING_WINDOW: int = 5  # Games in the persisted rolling averages of profile trends
+    PROFILE_EWMA_ALPHA: float = 0.3  # Smoothing factor of the persisted trend EWMAs
+    PROFILE_ANOMALY_WINDOW: int = 100  # Flagged anomalies kept in a profile
+    ANOMALY_Z_THRESHOLD: float = 3.0  # Standard deviations from a player's running mean that flag a game
+    ANOMALY_MIN_GAMES: int = 10  # Games of a metric seen before anomalies are flagged
+
+    # Leaderboard settings
+    LEADERBOARD_ENABLED: bool = False  # Record player scores into the materialized leaderboards as games are processed
+    LEADERBOARD_SIZE: int = 100  # Players kept in memory for each leaderboard
+    LEADERBOARD_RELOAD_INTERVAL: float = 30.0  # Seconds before an in-memory leaderboard is reloaded to pick up other workers' scores
+
+    # Read settings
+    DB_CURSOR_BATCH_SIZE: int = 1000  # Documents fetched per round trip by streaming reads
+    PAGE_SIZE_DEFAULT: int = 100  # Documents per page of the paginated read route
+    PAGE_SIZE_MAX: int = 1000  # Largest page a client may request
+
+    # Index settings
+    ENSURE_INDEXES_ON_STARTUP: bool = True  # Create the indexes declared in utils/indexes.py in the background when the server starts
+
+    # Serialization settings
+    JSON_CODEC: str = "auto"  # JSON codec for the API, Socket.IO and SDK: "auto", "orjson" or "json"
     
     class Config:
         env_file = ".env"  # Read values from a .env file for environment-specific overrides
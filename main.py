@@ -1,12 +1,25 @@
 import os
-import json
+import logging
 import time
-from flask import Flask, request, jsonify
+from collections import defaultdict
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from utils.db_utils import store_processed_data
-from utils.data_processing import get_processor
+from utils.db_utils import store_processed_data, get_pool_stats, get_database, find_page, iter_documents
+from utils.indexes import ensure_indexes_in_background, uncovered_query_shapes, GAME_TYPES
+from utils.data_processing import get_processor, bind_server_state, bind_batch_server_state, unpack_batch_results
+from utils.processors import InvalidGameDataError
+from utils.job_queue import job_queue, JobQueueFullError
+from utils.processor_pool import run_processor, run_processors
+from utils.write_buffer import get_write_buffer
+from utils.rate_limiter import rate_limiter
+from utils.player_aggregates import apply_player_aggregates
+from utils.leaderboard import leaderboard, LEADERBOARD_METRICS
+from utils.profile_cache import profile_cache
+from utils.result_cache import result_cache, payload_fingerprint
+from utils.request_context import get_request_json, get_game_payload
+from utils.codec import CodecJSONProvider, dumps, loads
 from config import Config
-from utils.logger import logger
+from utils.logger import logger, log_payload, get_dropped_log_records
 from pydantic import ValidationError
 from models import GamePayload
 from utils.middlewares.logging_middleware import logging_middleware
@@ -16,6 +29,7 @@ from utils.middlewares.request_validation_middleware import request_validation_m
 from utils.middlewares.cors_middleware import cors_middleware
 
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
 CORS(app)  # Enable CORS
 
 # Apply middlewares
@@ -25,8 +39,21 @@ rate_limit_middleware(app)
 request_validation_middleware(app)
 cors_middleware(app)
 
-# Log the environment at startup
-logger.info(f"Starting application in {Config.ENV} environment")
+
+def start_up():
+    """Run the one-time start-up work of a server process."""
+    # Log the environment at startup
+    logger.info(f"Starting application in {Config.ENV} environment")
+
+    # Create any missing indexes declared in utils/indexes.py without delaying startup
+    if Config.ENSURE_INDEXES_ON_STARTUP:
+        ensure_indexes_in_background(get_database)
+
+
+# Processor pool workers started with spawn or forkserver re-import this module as __mp_main__
+if __name__ != "__mp_main__":
+    start_up()
+
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -35,6 +62,147 @@ def health_check():
     return jsonify({"status": "healthy", "environment": Config.ENV}), 200
 
 
+@app.route('/api/v1/metrics', methods=['GET'])
+def metrics():
+    """Expose runtime statistics for the ingestion pipeline."""
+    stats = {
+        "mongo_pool": get_pool_stats(),
+        "job_queue": {"pending": job_queue.qsize(), "max_size": job_queue.max_size},
+        "logging": {"dropped_records": get_dropped_log_records()},
+        "rate_limiter": rate_limiter.stats(),
+        "profile_cache": profile_cache.stats(),
+    }
+    if Config.RESULT_CACHE_ENABLED:
+        stats["result_cache"] = result_cache.stats()
+    if Config.WRITE_BUFFER_ENABLED:
+        stats["write_buffer"] = get_write_buffer().stats()
+    if Config.LEADERBOARD_ENABLED:
+        stats["leaderboard"] = leaderboard.stats()
+    return jsonify(stats), 200
+
+
+@app.route('/api/v1/admin/index-report', methods=['GET'])
+def index_report():
+    """Report query shapes from the db_utils helpers that no declared index covers."""
+    uncovered = uncovered_query_shapes()
+    return jsonify({"uncovered": uncovered, "covered": not uncovered}), 200
+
+
+@app.route('/api/v1/leaderboards/<metric>', methods=['GET'])
+def get_leaderboard(metric):
+    """Return the top players for a metric from the in-memory leaderboard."""
+    if metric not in LEADERBOARD_METRICS:
+        return jsonify({"error": f"Unknown leaderboard '{metric}'"}), 404
+    limit = request.args.get("limit", Config.LEADERBOARD_SIZE, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    entries = leaderboard.top(metric, min(limit, Config.LEADERBOARD_SIZE))
+    return jsonify({"metric": metric, "entries": entries}), 200
+
+
+@app.route('/api/v1/leaderboards/<metric>/players/<player_id>', methods=['GET'])
+def get_leaderboard_rank(metric, player_id):
+    """Return a player's rank for a metric."""
+    if metric not in LEADERBOARD_METRICS:
+        return jsonify({"error": f"Unknown leaderboard '{metric}'"}), 404
+    entry = leaderboard.rank(metric, player_id)
+    if entry is None:
+        return jsonify({"error": f"Player '{player_id}' has no {metric} score"}), 404
+    return jsonify({"metric": metric, **entry}), 200
+
+
+def _document_query_args():
+    """Read the filter and projection shared by the document read routes from the query string.
+
+    Returns:
+        tuple: (filter_query, projection), or None for an invalid field name.
+    """
+    field = request.args.get("field")
+    fields = [name for name in request.args.get("fields", "").split(",") if name]
+    if any(name.startswith("$") for name in fields + [field or ""]):
+        return None
+    filter_query = {field: _query_value(request.args.get("value"))} if field else {}
+    projection = {name: 1 for name in fields} or None
+    return filter_query, projection
+
+
+def _query_value(value):
+    """Return the equality condition for a query string ``value``.
+
+    Query strings carry no types, so a value that parses as a number also
+    matches numeric fields.
+    """
+    if value is None:
+        return None
+    for convert in (int, float):
+        try:
+            number = convert(value)
+        except ValueError:
+            continue
+        if number == number and number not in (float("inf"), float("-inf")):
+            return {"$in": [value, number]}
+        break
+    return value
+
+
+@app.route('/api/v1/games/<game>/documents', methods=['GET'])
+def list_game_documents(game):
+    """Return one page of a game's stored documents.
+
+    Query parameters: ``limit``, ``page_token`` (from the previous page),
+    ``sort`` and ``order`` (asc or desc), ``fields`` (comma-separated
+    projection) and ``field``/``value`` for an equality filter; a numeric
+    ``value`` matches both the string and the number.
+    """
+    if game not in GAME_TYPES:
+        return jsonify({"error": f"Unknown game type '{game}'"}), 404
+    query_args = _document_query_args()
+    sort_field = request.args.get("sort", "_id")
+    if query_args is None or sort_field.startswith("$"):
+        return jsonify({"error": "Field names may not start with '$'"}), 400
+    filter_query, projection = query_args
+    try:
+        page_size = min(int(request.args.get("limit", Config.PAGE_SIZE_DEFAULT)), Config.PAGE_SIZE_MAX)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if page_size < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+
+    try:
+        documents, next_page_token = find_page(
+            game,
+            filter_query,
+            projection,
+            sort_field=sort_field,
+            ascending=request.args.get("order", "asc") != "desc",
+            page_size=page_size,
+            page_token=request.args.get("page_token")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"documents": documents, "next_page_token": next_page_token}), 200
+
+
+@app.route('/api/v1/games/<game>/export', methods=['GET'])
+def export_game_documents(game):
+    """Stream a game's stored documents as NDJSON, holding one cursor batch in memory at a time.
+
+    Accepts the ``fields`` and ``field``/``value`` parameters of the paginated route.
+    """
+    if game not in GAME_TYPES:
+        return jsonify({"error": f"Unknown game type '{game}'"}), 404
+    query_args = _document_query_args()
+    if query_args is None:
+        return jsonify({"error": "Field names may not start with '$'"}), 400
+    filter_query, projection = query_args
+
+    def generate():
+        for document in iter_documents(game, filter_query, projection):
+            yield dumps(document) + b"\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @app.errorhandler(400)
 def bad_request_error(error):
     """Handle 400 Bad Request errors."""
@@ -49,21 +217,63 @@ def internal_server_error(error):
     return jsonify({"error": "Internal Server Error", "details": str(error)}), 500
 
 
-@app.before_request
-def before_request_logging():
-    """Log incoming request details."""
-    logger.debug("Incoming request: %s %s", request.method, request.url)
-    logger.debug("Request headers: %s", dict(request.headers))
-    if request.is_json:
-        logger.debug("Request JSON body: %s", request.get_json())
+def process_and_store(processor, game_data, game_type, cache_key=None):
+    """Run a game processor and persist its output.
+
+    Args:
+        cache_key (str): Payload fingerprint under which to remember the outcome, if any.
+
+    Returns:
+        dict: The number of documents stored, recorded as the job result in async mode.
+    """
+    processed_data = run_processor(bind_server_state(processor, game_data), game_data)
+    result = {"stored": len(processed_data) if isinstance(processed_data, list) else 1}
+    store_and_record(game_type, processed_data, [(cache_key, result)] if cache_key else [])
+    return result
+
+
+def store_and_record(game_type, documents, cached_results=()):
+    """Store processed documents and record them in the aggregates, leaderboard and result cache.
+
+    The records are only updated for documents that were written, which with
+    the write buffer enabled happens after this returns.
 
+    Args:
+        cached_results (list): ``(cache_key, result)`` pairs to remember once
+            every document has been written.
+    """
+    if isinstance(documents, dict):
+        documents = [documents]
+    if Config.PLAYER_AGGREGATES_ENABLED:
+        # The stored documents carry statistics taken from the aggregates
+        apply_player_aggregates(game_type, documents, write=False)
 
-@app.after_request
-def after_request_logging(response):
-    """Log outgoing response details."""
-    logger.debug("Outgoing response status: %s", response.status)
-    logger.debug("Outgoing response data: %s", response.get_data(as_text=True))
-    return response
+    def record(written):
+        if Config.PLAYER_AGGREGATES_ENABLED:
+            apply_player_aggregates(game_type, written)
+        if Config.LEADERBOARD_ENABLED:
+            leaderboard.record_processed(game_type, written)
+        if len(written) == len(documents):
+            for cache_key, result in cached_results:
+                result_cache.put(cache_key, result)
+
+    store_processed_data(documents, game_type, on_written=record)
+
+
+def _wants_async():
+    """Check whether the client asked for the request to be processed in the background."""
+    if request.args.get("async", "").lower() in ("1", "true", "yes"):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+@app.route('/api/v1/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Return the status of a background ingestion job."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+    return jsonify(job), 200
 
 
 @app.route('/api/v1/process-game-data', methods=['POST'])
@@ -71,17 +281,15 @@ def process_game_data():
     start_time = time.time()
     try:
         logger.info("Received request to process game data.")
-        request_json = request.get_json()
 
-        if not request_json:
+        # Validated once per request (normally already by the validation middleware)
+        try:
+            payload = get_game_payload()
+        except TypeError:
             logger.warning("Missing or invalid JSON payload.")
             return jsonify({"error": "Invalid or missing JSON payload"}), 400
-
-        # Validate payload using Pydantic
-        try:
-            payload = GamePayload(**request_json)
         except ValidationError as e:
-            logger.warning("Payload validation failed: %s", e.json())
+            log_payload("Payload validation failed: %s", payload=e.errors, level=logging.WARNING)
             return jsonify({"error": "Invalid payload", "details": e.errors()}), 400
 
         game_type = payload.game
@@ -94,15 +302,44 @@ def process_game_data():
             logger.error("No processor available for game type: %s", game_type)
             return jsonify({"error": f"No processor available for game type '{game_type}'"}), 400
 
+        # Retried uploads of an already processed payload get the earlier outcome
+        cache_key = None
+        if Config.RESULT_CACHE_ENABLED:
+            cache_key, payload_size = payload_fingerprint(payload)
+            cached_result = result_cache.get(cache_key, payload_size)
+            if cached_result is not None:
+                logger.info("Payload was already processed, returning the cached outcome.")
+                response = jsonify({"message": "Data processed and stored successfully", **cached_result})
+                response.headers["X-Result-Cache"] = "hit"
+                return response
+
+        if _wants_async():
+            try:
+                job_id = job_queue.submit(process_and_store, processor, game_data, game_type, cache_key)
+            except JobQueueFullError:
+                response = jsonify({"error": "Ingestion queue is full, try again later."})
+                response.status_code = 503
+                response.headers["Retry-After"] = "1"
+                return response
+
+            logger.info("Queued game data for background processing as job %s.", job_id)
+            status_url = f"/api/v1/jobs/{job_id}"
+            response = jsonify({"message": "Data accepted for processing", "job_id": job_id, "status_url": status_url})
+            response.status_code = 202
+            response.headers["Location"] = status_url
+            return response
+
         # Process and store the data
-        processed_data = processor(game_data)
-        store_processed_data(processed_data, game_type)
+        result = process_and_store(processor, game_data, game_type, cache_key)
 
         logger.info("Successfully processed and stored game data.")
-        response = jsonify({"message": "Data processed and stored successfully"})
+        response = jsonify({"message": "Data processed and stored successfully", **result})
         response.status_code = 200
         return response
 
+    except InvalidGameDataError as e:
+        logger.warning("Game data could not be processed: %s", e)
+        return jsonify({"error": "Invalid game data", "details": str(e)}), 400
     except Exception as e:
         logger.exception("An error occurred while processing game data.")
         return jsonify({"error": str(e)}), 500
@@ -111,5 +348,127 @@ def process_game_data():
         logger.info("Request processing time: %.2f seconds", duration)
 
 
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson", "application/jsonlines"}
+
+
+def _load_batch_items():
+    """Decode a batch body given either as a JSON array or as NDJSON.
+
+    Returns:
+        list: The decoded items, or None if the body could not be decoded.
+    """
+    if request.is_json:
+        items = get_request_json()
+        return items if isinstance(items, list) else None
+
+    if request.mimetype in NDJSON_MIMETYPES:
+        try:
+            return [loads(line) for line in request.get_data().splitlines() if line.strip()]
+        except ValueError:
+            return None
+
+    return None
+
+
+@app.route('/api/v1/process-game-data/batch', methods=['POST'])
+def process_game_data_batch():
+    """Validate, process and store many game payloads in a single request.
+
+    The body is either a JSON array of game payloads or NDJSON with one payload
+    per line. Every item is validated before anything is processed, and the
+    results of each game type are written with a single insert.
+    """
+    start_time = time.time()
+    try:
+        logger.info("Received request to process a batch of game data.")
+        items = _load_batch_items()
+
+        if items is None:
+            logger.warning("Missing or invalid batch payload.")
+            return jsonify({"error": "Expected a JSON array or NDJSON body"}), 400
+        if not items:
+            return jsonify({"error": "Batch is empty"}), 400
+        if len(items) > Config.BATCH_MAX_ITEMS:
+            logger.warning("Batch of %d items exceeds the limit of %d.", len(items), Config.BATCH_MAX_ITEMS)
+            return jsonify({"error": f"Batch exceeds the limit of {Config.BATCH_MAX_ITEMS} items"}), 413
+
+        # Validate the whole batch up front so a bad item never leaves a partial write
+        payloads = []
+        errors = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "details": "Item is not a JSON object"})
+                continue
+            try:
+                payload = GamePayload(**item)
+            except ValidationError as e:
+                errors.append({"index": index, "details": e.errors()})
+                continue
+            processor = get_processor(payload.game)
+            if not processor:
+                errors.append({"index": index, "details": f"No processor available for game type '{payload.game}'"})
+                continue
+            payloads.append((payload.game, processor, payload.data, payload))
+
+        if errors:
+            log_payload("Batch validation failed for %d of %d items: %s", len(errors), len(items),
+                        payload=errors, level=logging.WARNING)
+            return jsonify({"error": "Invalid payload", "details": errors}), 400
+
+        # Skip payloads that were already processed, in an earlier request or earlier in this batch
+        cache_keys = [None] * len(payloads)
+        duplicates = 0
+        if Config.RESULT_CACHE_ENABLED:
+            unique_payloads = []
+            cache_keys = []
+            seen = set()
+            for game_type, processor, game_data, payload in payloads:
+                cache_key, payload_size = payload_fingerprint(payload)
+                if cache_key in seen or result_cache.get(cache_key, payload_size) is not None:
+                    duplicates += 1
+                    continue
+                seen.add(cache_key)
+                unique_payloads.append((game_type, processor, game_data, payload))
+                cache_keys.append(cache_key)
+            payloads = unique_payloads
+
+        processed_by_game = defaultdict(list)
+        cached_by_game = defaultdict(list)
+        tasks, locations = bind_batch_server_state([(processor, game_data) for _, processor, game_data, _ in payloads])
+        results = unpack_batch_results(run_processors(tasks), locations)
+        for (game_type, _, _, _), processed_data, cache_key in zip(payloads, results, cache_keys):
+            if isinstance(processed_data, list):
+                processed_by_game[game_type].extend(processed_data)
+            else:
+                processed_by_game[game_type].append(processed_data)
+            if cache_key:
+                cached_by_game[game_type].append(
+                    (cache_key, {"stored": len(processed_data) if isinstance(processed_data, list) else 1})
+                )
+
+        for game_type, documents in processed_by_game.items():
+            if documents:
+                # One aggregate read and bulk write per game type, not per item
+                store_and_record(game_type, documents, cached_by_game[game_type])
+
+        logger.info("Successfully processed and stored a batch of %d games.", len(payloads))
+        return jsonify({
+            "message": "Batch processed and stored successfully",
+            "processed": len(payloads),
+            "duplicates": duplicates,
+            "games": {game_type: len(documents) for game_type, documents in processed_by_game.items()}
+        }), 200
+
+    except InvalidGameDataError as e:
+        logger.warning("Batch game data could not be processed: %s", e)
+        return jsonify({"error": "Invalid game data", "details": str(e)}), 400
+    except Exception as e:
+        logger.exception("An error occurred while processing a batch of game data.")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        duration = time.time() - start_time
+        logger.info("Batch processing time: %.2f seconds", duration)
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=Config.FLASK_PORT, debug=Config.FLASK_DEBUG)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import numpy as np
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from models.trend_analysis import pad_series
+
+
+def welford_update(state: Optional[Dict[str, float]], value: float) -> Dict[str, float]:
+    """
+    Fold a value into a running count/mean/M2 state with Welford's algorithm.
+    """
+    count = (state or {}).get("count", 0) + 1
+    mean = (state or {}).get("mean", 0.0)
+    m2 = (state or {}).get("m2", 0.0)
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    return {"count": count, "mean": mean, "m2": m2}
+
+
+def welford_std(state: Optional[Dict[str, float]]) -> float:
+    """
+    Sample standard deviation of a Welford state, 0.0 with fewer than two values.
+    """
+    if not state or state.get("count", 0) < 2:
+        return 0.0
+    return float(np.sqrt(state["m2"] / (state["count"] - 1)))
+
+
+def welford_zscore(state: Optional[Dict[str, float]], value: float, min_count: int = 2) -> Optional[float]:
+    """
+    z-score of a value against a Welford state, or None until the state has
+    ``min_count`` values and a non-zero spread.
+    """
+    if not state or state.get("count", 0) < max(min_count, 2):
+        return None
+    std = welford_std(state)
+    if std == 0.0:
+        return None
+    return (value - state["mean"]) / std
+
+
+def batch_anomaly_mask(matrix: np.ndarray, threshold: float = 3.0, min_count: int = 2) -> np.ndarray:
+    """
+    Flag values more than ``threshold`` sample standard deviations from their
+    row's mean, for every row of a NaN-padded matrix at once. Rows with fewer
+    than ``min_count`` values or no spread have no anomalies.
+    """
+    mask = ~np.isnan(matrix)
+    n = mask.sum(axis=1)
+    values = np.where(mask, matrix, 0.0)
+    mean = values.sum(axis=1) / np.maximum(n, 1)
+    deviations = np.where(mask, matrix - mean[:, None], 0.0)
+    variance = (deviations ** 2).sum(axis=1) / np.maximum(n - 1, 1)
+    std = np.sqrt(variance)
+    valid = (n >= max(min_count, 2)) & (std > 0)
+    z = np.abs(deviations) / np.where(valid, std, 1.0)[:, None]
+    return mask & valid[:, None] & (z > threshold)
+
+
+class BatchAnomalyScanner:
+    """
+    Vectorized z-score scan of many players' trends, e.g. for an anti-cheat sweep.
+    Profiles are processed in chunks; each chunk becomes one NaN-padded matrix
+    per metric.
+    """
+    def __init__(
+        self,
+        metrics: Sequence[str] = ("accuracy_trend", "foul_trend", "shot_power_trend", "aggressiveness_trend"),
+        threshold: float = 3.0,
+        min_count: int = 10,
+        chunk_size: int = 10000
+    ):
+        self.metrics = tuple(metrics)
+        self.threshold = threshold
+        self.min_count = min_count
+        self.chunk_size = chunk_size
+
+    def scan(self, profiles: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, Dict[str, List[int]]]]:
+        """
+        Yield (player_id, {metric: anomaly indices}) for every player with at least one anomaly.
+        """
+        chunk: List[Dict[str, Any]] = []
+        for profile in profiles:
+            chunk.append(profile)
+            if len(chunk) >= self.chunk_size:
+                yield from self._scan_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._scan_chunk(chunk)
+
+    def _scan_chunk(self, profiles: List[Dict[str, Any]]) -> Iterator[Tuple[str, Dict[str, List[int]]]]:
+        flagged: Dict[int, Dict[str, List[int]]] = {}
+        for metric in self.metrics:
+            matrix = pad_series([profile.get(metric) or [] for profile in profiles])
+            rows, columns = np.nonzero(batch_anomaly_mask(matrix, self.threshold, self.min_count))
+            for row, column in zip(rows.tolist(), columns.tolist()):
+                flagged.setdefault(row, {}).setdefault(metric, []).append(column)
+        for row in sorted(flagged):
+            yield profiles[row].get("player_id"), flagged[row]
@@ -1,12 +1,23 @@
 import logging
-timport pymongo
+import pymongo
+from pymongo.errors import BulkWriteError
 import datetime
 from typing import Any, Dict, List, Optional
 import numpy as np
+from config import Config
+from utils.leaderboard import leaderboard
+from utils.profile_cache import profile_cache
+from models.anomaly_detection import batch_anomaly_mask, welford_update, welford_zscore
+from models.trend_analysis import pad_series
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Trends with persisted EWMA and rolling-window state
+SMOOTHED_TRENDS = ("accuracy_trend", "foul_trend", "shot_power_trend", "aggressiveness_trend", "win_trend")
+# Trends watched by the streaming anomaly detector
+ANOMALY_METRICS = ("accuracy_trend", "foul_trend", "shot_power_trend", "aggressiveness_trend")
+
 class PlayerProfile:
     """
     Manages a player's performance profile, storing historical metrics
@@ -17,14 +28,13 @@ class PlayerProfile:
         player_id: str,
         db: pymongo.database.Database,
         cache_enabled: bool = True,
-        cache_ttl_seconds: int = 300
+        cache_ttl_seconds: Optional[int] = None
     ):
         self.player_id = player_id
         self.db = db
         self.collection = db['player_profiles']
         self.cache_enabled = cache_enabled
-        self.cache_ttl = datetime.timedelta(seconds=cache_ttl_seconds)
-        self._cache_timestamp: Optional[datetime.datetime] = None
+        self.cache_ttl = cache_ttl_seconds
         self.data: Dict[str, Any] = {
             "player_id": player_id,
             "created_at": datetime.datetime.utcnow(),
@@ -51,24 +61,32 @@ class PlayerProfile:
 
     def load(self) -> None:
         """
-        Load profile from MongoDB, with optional simple in-memory cache.
+        Load profile from the process-wide profile cache, falling back to MongoDB.
+        Instances for the same player share one cached document.
         """
-        now = datetime.datetime.utcnow()
-        if self.cache_enabled and self._cache_timestamp:
-            if now - self._cache_timestamp < self.cache_ttl:
+        if self.cache_enabled:
+            cached = profile_cache.get(self.collection, self.player_id, self.cache_ttl)
+            if cached is not None:
                 logger.debug("Using cached profile for %s", self.player_id)
+                self.data = cached
                 return
         doc = self.collection.find_one({"player_id": self.player_id})
         if doc:
             self.data.update(doc)
-        self._cache_timestamp = now
+        if self.cache_enabled:
+            self.data = profile_cache.put(self.collection, self.player_id, self.data)
         logger.info("Profile loaded for %s", self.player_id)
 
     def save(self) -> None:
         """
-        Persist current profile state to MongoDB.
+        Persist current profile state to MongoDB. With write-back enabled the
+        profile is only marked dirty and written by the profile cache.
         """
         self.data["last_updated"] = datetime.datetime.utcnow()
+        if self.cache_enabled and Config.PROFILE_CACHE_WRITE_BACK:
+            self.data = profile_cache.mark_dirty(self.collection, self.player_id, self.data)
+            logger.debug("Profile for %s queued for write-back", self.player_id)
+            return
         try:
             self.collection.update_one(
                 {"player_id": self.player_id},
@@ -79,6 +97,12 @@ class PlayerProfile:
         except Exception as e:
             logger.exception("Failed to save profile for %s: %s", self.player_id, e)
 
+    def invalidate(self) -> None:
+        """
+        Write back and drop this player's cached profile so the next load reads MongoDB.
+        """
+        profile_cache.invalidate(self.collection, self.player_id)
+
     def calculate_aggressiveness(self, aggressive_shots: int, defensive_shots: int) -> float:
         """
         Compute ratio of aggressive shots to total shots.
@@ -97,10 +121,21 @@ class PlayerProfile:
     ) -> None:
         """
         Incorporate a new game's stats, updating averages, trends, and win/loss metrics.
+        Only the changes are written: counters with $inc/$max, trends with a
+        bounded $push, and entries that fall out of the trend window are
+        rolled up and archived, so each save has the same size however long
+        the player's history is.
         """
         self.load()
+        now = datetime.datetime.utcnow()
         self.data["games_played"] += 1
         n = self.data["games_played"]
+        update: Dict[str, Dict[str, Any]] = {
+            "$setOnInsert": {"created_at": self.data["created_at"]},
+            "$set": {"last_updated": now},
+            "$inc": {"games_played": 1},
+            "$push": {},
+        }
 
         # Update progressive averages
         self.data["average_accuracy"] = self._progressive_average(
@@ -118,6 +153,8 @@ class PlayerProfile:
         self.data["aggressiveness_score"] = self._progressive_average(
             self.data["aggressiveness_score"], aggression, n
         )
+        for key in ("average_accuracy", "average_fouls", "average_shot_power", "aggressiveness_score"):
+            update["$set"][key] = self.data[key]
 
         # Win/Loss logic with streaks
         if win:
@@ -127,19 +164,24 @@ class PlayerProfile:
                 self.data["highest_consecutive_wins"],
                 self.data["consecutive_wins"]
             )
+            update["$inc"].update({"total_wins": 1, "consecutive_wins": 1})
+            update["$max"] = {"highest_consecutive_wins": self.data["consecutive_wins"]}
         else:
             if self.data["consecutive_wins"] > 0:
-                self.data["streaks"].append({
+                self._push_bounded(update, "streaks", {
                     "streak": self.data["consecutive_wins"],
                     "ended_at_game": n,
-                    "timestamp": datetime.datetime.utcnow()
-                })
+                    "timestamp": now
+                }, Config.PROFILE_STREAK_WINDOW)
             self.data["consecutive_wins"] = 0
             self.data["total_losses"] += 1
+            update["$set"]["consecutive_wins"] = 0
+            update["$inc"]["total_losses"] = 1
 
         self.data["win_rate"] = self.data["total_wins"] / max(1, (self.data["total_wins"] + self.data["total_losses"]))
+        update["$set"]["win_rate"] = self.data["win_rate"]
 
-        # Append to performance history
+        # Append to performance history, keeping the last PROFILE_TREND_WINDOW games
         entry = {
             "game_number": n,
             "accuracy": accuracy,
@@ -147,16 +189,201 @@ class PlayerProfile:
             "shot_power": shot_power,
             "aggression": aggression,
             "win": win,
-            "timestamp": datetime.datetime.utcnow()
+            "timestamp": now
+        }
+        values = {
+            "accuracy_trend": accuracy,
+            "foul_trend": fouls,
+            "shot_power_trend": shot_power,
+            "aggressiveness_trend": aggression,
+            "win_trend": 1 if win else 0,
         }
-        self.data["performance_trend"].append(entry)
-        self.data["accuracy_trend"].append(accuracy)
-        self.data["foul_trend"].append(fouls)
-        self.data["shot_power_trend"].append(shot_power)
-        self.data["aggressiveness_trend"].append(aggression)
-        self.data["win_trend"].append(1 if win else 0)
+        self._update_smoothing(update, values)
+        self._detect_streaming_anomalies(update, values, n, now)
+
+        # The trends must outlast the rolling window so the value leaving it is known
+        window = max(Config.PROFILE_TREND_WINDOW, Config.PROFILE_SMOOTHING_WINDOW)
+        archived = self._push_bounded(update, "performance_trend", entry, window)
+        for key, value in values.items():
+            self._push_bounded(update, key, value, window)
+        if archived:
+            self._archive(update, archived)
 
-        self.save()
+        self.data["last_updated"] = now
+        self._save_update(update)
+        if Config.LEADERBOARD_ENABLED:
+            try:
+                leaderboard.record(self.player_id, {
+                    "win_rate": self.data["win_rate"],
+                    "highest_consecutive_wins": self.data["highest_consecutive_wins"],
+                })
+            except Exception as e:
+                logger.exception("Failed to update leaderboards for %s: %s", self.player_id, e)
+
+    def _smoothing_state(self) -> Dict[str, Any]:
+        """
+        Return the persisted EWMA and rolling-window state, building it from
+        the trend history for profiles that predate it or use another window.
+        """
+        window = Config.PROFILE_SMOOTHING_WINDOW
+        state = self.data.get("smoothing")
+        if state and state.get("window") == window:
+            return state
+        alpha = Config.PROFILE_EWMA_ALPHA
+        state = {"window": window, "ewma": {}, "rolling_sum": {}, "rolling_count": {}}
+        for key in SMOOTHED_TRENDS:
+            series = self.data.get(key, [])
+            if series:
+                value = series[0]
+                for x in series:
+                    value = alpha * x + (1 - alpha) * value
+                state["ewma"][key] = value
+            recent = series[-window:]
+            state["rolling_sum"][key] = float(sum(recent))
+            state["rolling_count"][key] = len(recent)
+        self.data["smoothing"] = state
+        return state
+
+    def _update_smoothing(self, update: Dict[str, Dict[str, Any]], values: Dict[str, float]) -> None:
+        """
+        Fold one game's values into the EWMA and rolling sums in O(1). Runs
+        before the values are pushed, so the value leaving the window is still in the trend.
+        """
+        state = self._smoothing_state()
+        window = state["window"]
+        alpha = Config.PROFILE_EWMA_ALPHA
+        for key, x in values.items():
+            previous = state["ewma"].get(key)
+            state["ewma"][key] = x if previous is None else alpha * x + (1 - alpha) * previous
+            series = self.data.get(key, [])
+            if state["rolling_count"].get(key, 0) >= window and len(series) >= window:
+                state["rolling_sum"][key] += x - series[-window]
+            else:
+                state["rolling_sum"][key] = state["rolling_sum"].get(key, 0.0) + x
+                state["rolling_count"][key] = state["rolling_count"].get(key, 0) + 1
+        # The state is a few numbers per trend, so it is written whole
+        update["$set"]["smoothing"] = state
+
+    def _detect_streaming_anomalies(
+        self,
+        update: Dict[str, Dict[str, Any]],
+        values: Dict[str, float],
+        game_number: int,
+        timestamp: datetime.datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        Compare one game's values with each metric's running Welford mean and
+        variance, record the ones more than ANOMALY_Z_THRESHOLD standard
+        deviations away, then fold the values into the state.
+        """
+        state = self.data.setdefault("anomaly_state", {})
+        flagged = []
+        for metric in ANOMALY_METRICS:
+            value = values[metric]
+            if metric not in state:
+                # Profiles that predate the detector start from their trend history
+                for x in self.data.get(metric, []):
+                    state[metric] = welford_update(state.get(metric), x)
+            z_score = welford_zscore(state.get(metric), value, Config.ANOMALY_MIN_GAMES)
+            if z_score is not None and abs(z_score) > Config.ANOMALY_Z_THRESHOLD:
+                flagged.append({
+                    "game_number": game_number,
+                    "metric": metric,
+                    "value": value,
+                    "z_score": z_score,
+                    "timestamp": timestamp
+                })
+            state[metric] = welford_update(state.get(metric), value)
+        update["$set"]["anomaly_state"] = state
+        if flagged:
+            logger.warning("Anomalous game %d for %s: %s", game_number, self.player_id,
+                           ", ".join(f"{a['metric']} z={a['z_score']:.2f}" for a in flagged))
+            self._push_bounded_each(update, "anomalies", flagged, Config.PROFILE_ANOMALY_WINDOW)
+        return flagged
+
+    def _push_bounded(self, update: Dict[str, Dict[str, Any]], key: str, value: Any, window: int) -> List[Any]:
+        """
+        Append a value to a trend kept as a ring buffer of ``window`` entries,
+        in memory and as a $push with $slice. Returns the entries that fell out.
+        """
+        return self._push_bounded_each(update, key, [value], window)
+
+    def _push_bounded_each(self, update: Dict[str, Dict[str, Any]], key: str, values: List[Any], window: int) -> List[Any]:
+        series = self.data.setdefault(key, [])
+        series.extend(values)
+        dropped = series[:-window]
+        del series[:-window]
+        update["$push"][key] = {"$each": list(values), "$slice": -window}
+        return dropped
+
+    def _archive(self, update: Dict[str, Dict[str, Any]], entries: List[Dict[str, Any]]) -> None:
+        """
+        Roll performance entries that left the trend window into the profile's
+        running totals and append them to bucketed documents in the archive collection.
+        Archiving is idempotent: a bucket records its last archived game number
+        and entries at or below it are not appended again.
+        """
+        rollup = self.data.setdefault("trend_rollup", {})
+        totals = {
+            "games": len(entries),
+            "wins": sum(1 for entry in entries if entry.get("win")),
+            "accuracy_sum": sum(entry.get("accuracy", 0.0) for entry in entries),
+            "fouls_sum": sum(entry.get("fouls", 0) for entry in entries),
+            "shot_power_sum": sum(entry.get("shot_power", 0.0) for entry in entries),
+            "aggression_sum": sum(entry.get("aggression", 0.0) for entry in entries),
+        }
+        for key, value in totals.items():
+            rollup[key] = rollup.get(key, 0) + value
+            update["$inc"][f"trend_rollup.{key}"] = value
+
+        # One upsert per entry, guarded by the bucket's last archived game, so
+        # entries archived again after a lost profile write are skipped
+        operations = []
+        for entry in entries:
+            game_number = entry.get("game_number", 1)
+            operations.append(pymongo.UpdateOne(
+                {
+                    "player_id": self.player_id,
+                    "bucket": (game_number - 1) // Config.PROFILE_ARCHIVE_BUCKET_SIZE,
+                    "last_game_number": {"$not": {"$gte": game_number}},
+                },
+                {
+                    "$push": {"entries": entry},
+                    "$inc": {"count": 1},
+                    "$max": {"last_game_number": game_number},
+                },
+                upsert=True
+            ))
+        try:
+            archive = self.db[Config.PROFILE_ARCHIVE_COLLECTION]
+            while operations:
+                try:
+                    archive.bulk_write(operations, ordered=True)
+                    break
+                except BulkWriteError as e:
+                    error = e.details["writeErrors"][0]
+                    if error.get("code") != 11000:
+                        raise
+                    # The bucket already holds this game, so the upsert collided with its unique index
+                    logger.debug("Skipped a trend entry already archived for %s", self.player_id)
+                    operations = operations[error["index"] + 1:]
+        except Exception as e:
+            logger.exception("Failed to archive trend entries for %s: %s", self.player_id, e)
+
+    def _save_update(self, update: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Persist an update document for this profile, through the profile cache
+        when write-back is enabled.
+        """
+        update = {operator: fields for operator, fields in update.items() if fields}
+        if self.cache_enabled and Config.PROFILE_CACHE_WRITE_BACK:
+            self.data = profile_cache.mark_dirty(self.collection, self.player_id, self.data, update)
+            return
+        try:
+            self.collection.update_one({"player_id": self.player_id}, update, upsert=True)
+            logger.info("Profile saved for %s", self.player_id)
+        except Exception as e:
+            logger.exception("Failed to save profile for %s: %s", self.player_id, e)
 
     def _progressive_average(self, current_avg: float, new_value: float, n: int) -> float:
         return ((current_avg * (n - 1)) + new_value) / n
@@ -181,7 +408,7 @@ class PlayerProfile:
             return np.array(s)
 
         trends = {}
-        for key in ["accuracy_trend", "foul_trend", "shot_power_trend", "aggressiveness_trend", "win_trend"]:
+        for key in SMOOTHED_TRENDS:
             data = self.data.get(key, [])
             if method == "ewma":
                 trends[key] = ewma(data)
@@ -189,6 +416,31 @@ class PlayerProfile:
                 trends[key] = np.convolve(data, np.ones(window_size)/window_size, mode='valid') if len(data) >= window_size else np.array(data)
         return trends
 
+    def current_smoothed_values(
+        self,
+        window_size: Optional[int] = None,
+        method: str = "simple"
+    ) -> Dict[str, float]:
+        """
+        Return the latest smoothed value of each trend, as a moving average
+        over the last ``window_size`` games or as an EWMA. Values come from the state kept up
+        to date by update_after_game, so the cost does not depend on the
+        length of the history. A window other than PROFILE_SMOOTHING_WINDOW is
+        averaged from the last ``window_size`` games.
+        """
+        state = self._smoothing_state()
+        values = {}
+        for key in SMOOTHED_TRENDS:
+            if method == "ewma":
+                values[key] = state["ewma"].get(key, 0.0)
+            elif window_size is not None and window_size != state["window"]:
+                recent = self.data.get(key, [])[-window_size:]
+                values[key] = sum(recent) / len(recent) if recent else 0.0
+            else:
+                count = state["rolling_count"].get(key, 0)
+                values[key] = state["rolling_sum"].get(key, 0.0) / count if count else 0.0
+        return values
+
     def detect_anomalies(
         self,
         threshold: float = 3.0,
@@ -196,9 +448,9 @@ class PlayerProfile:
     ) -> List[int]:
         """
         Simple z-score anomaly detection on specified metric trend. Returns indices of anomalies.
+        Games flagged as they were played are kept in the profile's ``anomalies``.
         """
-        data = np.array(self.data.get(metric, []))
+        data = self.data.get(metric, [])
         if len(data) < 2:
             return []
-        z_scores = np.abs((data - data.mean()) / data.std(ddof=1))
-        return z_scores[z_scores > threshold].tolist()
\ No newline at end of file
+        return np.flatnonzero(batch_anomaly_mask(pad_series([data]), threshold)[0]).tolist()
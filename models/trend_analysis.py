@@ -1,6 +1,64 @@
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Iterable, Iterator, List, Sequence
+
+
+def pad_series(series_list: Sequence[Sequence[float]], length: int = None) -> np.ndarray:
+    """
+    Stack ragged series into a float matrix, one row per series, padded on the right with NaN.
+    Series longer than ``length`` keep their last ``length`` values.
+    """
+    if isinstance(series_list, np.ndarray) and series_list.ndim == 2:
+        return series_list.astype(float, copy=False)
+    length = max((len(series) for series in series_list), default=0) if length is None else length
+    matrix = np.full((len(series_list), length), np.nan)
+    for row, series in enumerate(series_list):
+        values = np.asarray(series, dtype=float)[-length:] if length else ()
+        matrix[row, :len(values)] = values
+    return matrix
+
+
+def batch_slope_intercept(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Closed-form least squares slope and intercept of every row against its
+    positions 0..n-1, ignoring NaN padding. Rows with fewer than two values get 0.0.
+    """
+    mask = ~np.isnan(matrix)
+    x = np.where(mask, np.arange(matrix.shape[1]), 0.0)
+    y = np.where(mask, matrix, 0.0)
+    n = mask.sum(axis=1)
+    sum_x = x.sum(axis=1)
+    sum_y = y.sum(axis=1)
+    sum_xx = (x * x).sum(axis=1)
+    sum_xy = (x * y).sum(axis=1)
+    denominator = n * sum_xx - sum_x * sum_x
+    valid = (n >= 2) & (denominator != 0)
+    safe_denominator = np.where(valid, denominator, 1.0)
+    slope = np.where(valid, (n * sum_xy - sum_x * sum_y) / safe_denominator, 0.0)
+    intercept = np.where(valid, (sum_y - slope * sum_x) / np.maximum(n, 1), 0.0)
+    return slope, intercept
+
+
+def batch_moving_average(matrix: np.ndarray, window: int = 5) -> np.ndarray:
+    """
+    Trailing moving averages of every row, computed from cumulative sums.
+    Column j holds the mean of values j..j+window-1; windows that reach into
+    the padding are NaN. Rows shorter than ``window`` are returned unchanged,
+    as TrendAnalyzer.moving_average does.
+    """
+    rows, length = matrix.shape
+    lengths = (~np.isnan(matrix)).sum(axis=1)
+    if length < window:
+        return matrix.copy()
+    cumulative = np.zeros((rows, length + 1))
+    np.cumsum(np.nan_to_num(matrix), axis=1, out=cumulative[:, 1:])
+    averages = (cumulative[:, window:] - cumulative[:, :-window]) / window
+    averages[np.arange(length - window + 1) > (lengths - window)[:, None]] = np.nan
+    short = lengths < window
+    if short.any():
+        averages = np.hstack([averages, np.full((rows, window - 1), np.nan)])
+        averages[short] = matrix[short]
+    return averages
+
 
 class TrendAnalyzer:
     """
@@ -19,10 +77,8 @@ class TrendAnalyzer:
     def slope_intercept(self, series: list) -> Tuple[float, float]:
         if len(series) < 2:
             return 0.0, 0.0
-        X = np.arange(len(series)).reshape(-1, 1)
-        y = np.array(series)
-        model = LinearRegression().fit(X, y)
-        return float(model.coef_[0]), float(model.intercept_)
+        slope, intercept = batch_slope_intercept(pad_series([series]))
+        return float(slope[0]), float(intercept[0])
 
     def analyze(self) -> Dict[str, Any]:
         acc = self.profile.data['accuracy_trend']
@@ -39,4 +95,73 @@ class TrendAnalyzer:
             'acc_slope': acc_slope,
             'fouls_slope': fouls_slope,
             'improving': acc_slope > 0 and fouls_slope < 0
-        }
\ No newline at end of file
+        }
+
+
+class BatchTrendAnalyzer:
+    """
+    Vectorized TrendAnalyzer.analyze for many players at once.
+    Series are stacked into NaN-padded matrices, so slopes, moving averages
+    and the improving flag for a whole chunk of players come from a few
+    NumPy operations instead of a regression per player.
+    """
+    def __init__(self, window: int = 5, max_length: int = None, chunk_size: int = 10000):
+        self.window = window
+        self.max_length = max_length
+        self.chunk_size = chunk_size
+
+    def analyze(self, accuracy_series: Sequence[Sequence[float]], foul_series: Sequence[Sequence[float]]) -> Dict[str, np.ndarray]:
+        """
+        Analyze one chunk of players.
+
+        Args:
+            accuracy_series: One accuracy trend per player, as lists or a padded matrix.
+            foul_series: One foul trend per player, in the same order.
+
+        Returns:
+            dict: acc_slope, fouls_slope and improving arrays with one entry per
+            player, and acc_ma/fouls_ma matrices padded with NaN.
+        """
+        accuracy = pad_series(accuracy_series, self.max_length)
+        fouls = pad_series(foul_series, self.max_length)
+        acc_slope, _ = batch_slope_intercept(accuracy)
+        fouls_slope, _ = batch_slope_intercept(fouls)
+        return {
+            'acc_ma': batch_moving_average(accuracy, self.window),
+            'fouls_ma': batch_moving_average(fouls, self.window),
+            'acc_slope': acc_slope,
+            'fouls_slope': fouls_slope,
+            'improving': (acc_slope > 0) & (fouls_slope < 0),
+        }
+
+    def analyze_profiles(self, profiles: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Analyze profile documents chunk by chunk, yielding (player_id, summary)
+        pairs shaped like TrendAnalyzer.analyze output.
+        """
+        chunk: List[Dict[str, Any]] = []
+        for profile in profiles:
+            chunk.append(profile)
+            if len(chunk) >= self.chunk_size:
+                yield from self._analyze_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._analyze_chunk(chunk)
+
+    def _analyze_chunk(self, profiles: List[Dict[str, Any]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        result = self.analyze(
+            [profile.get('accuracy_trend', []) for profile in profiles],
+            [profile.get('foul_trend', []) for profile in profiles],
+        )
+        for row, profile in enumerate(profiles):
+            yield profile.get('player_id'), {
+                'acc_ma': self._trim(result['acc_ma'][row]),
+                'fouls_ma': self._trim(result['fouls_ma'][row]),
+                'acc_slope': float(result['acc_slope'][row]),
+                'fouls_slope': float(result['fouls_slope'][row]),
+                'improving': bool(result['improving'][row]),
+            }
+
+    @staticmethod
+    def _trim(row: np.ndarray) -> np.ndarray:
+        return row[~np.isnan(row)]
@@ -0,0 +1,112 @@
+import copy
+import random
+import timeit
+from utils.processors.eight_ball_processor import summarize_turns, apply_turn_summary
+
+TURNS = 10_000
+REPEAT = 20
+
+
+def build_player(turns, seed=42):
+    """Build a synthetic player with the given number of turns."""
+    rng = random.Random(seed)
+    return {
+        "username": "benchmark_player",
+        "games": 100,
+        "games_won": 50,
+        "games_lost": 50,
+        "balls_potted": 300,
+        "fouls": 10,
+        "result": "win",
+        "game_data": [
+            {
+                "timestamp": i,
+                "cue_ball_position": [rng.randint(0, 254), rng.randint(0, 127)],
+                "power": rng.uniform(0, 100),
+                "angle": rng.uniform(0, 360),
+                "ball_hit": rng.choice([None] + list(range(1, 16))),
+                "balls_collided": [],
+                "balls_potted": rng.sample(range(1, 16), rng.randint(0, 2)),
+                "walls_hit": [0] * rng.randint(0, 3),
+            }
+            for i in range(turns)
+        ],
+    }
+
+
+def run_per_stat(player):
+    """The per-stat analyses process_8ball_data ran before summarize_turns, one walk over the turns each."""
+    game_data = player.get("game_data", [])
+    total_shots = len(game_data)
+
+    total_potted = sum(len(turn.get("balls_potted", [])) for turn in game_data)
+    player["pottingAccuracy"] = total_potted / total_shots if total_shots > 0 else 0
+
+    player["games"] += 1
+    player["games_won"] += 1 if player.get("result", "") == "win" else 0
+    player["games_lost"] += 1 if player.get("result", "") == "loss" else 0
+    player["balls_potted"] += sum(len(turn.get("balls_potted", [])) for turn in game_data)
+
+    aggressive_shots = sum(1 for turn in game_data if len(turn.get("balls_potted", [])) > 0)
+    player["aggressiveShotRatio"] = aggressive_shots / total_shots if total_shots > 0 else 0
+    player["defensiveShotRatio"] = (total_shots - aggressive_shots) / total_shots if total_shots > 0 else 0
+
+    ball_hit_counts = {}
+    for turn in game_data:
+        ball_hit = turn.get("ball_hit")
+        if ball_hit is not None:
+            ball_hit_counts[ball_hit] = ball_hit_counts.get(ball_hit, 0) + 1
+    player["mostCommonBallHit"] = max(ball_hit_counts, key=ball_hit_counts.get, default=None)
+
+    total_wall_hits = sum(len(turn.get("walls_hit", [])) for turn in game_data)
+    player["averageWallHits"] = total_wall_hits / total_shots if total_shots > 0 else 0
+
+    max_potting_streak = 0
+    current_streak = 0
+    for turn in game_data:
+        if len(turn.get("balls_potted", [])) > 0:
+            current_streak += 1
+            max_potting_streak = max(max_potting_streak, current_streak)
+        else:
+            current_streak = 0
+    player["maxPottingStreak"] = max_potting_streak
+
+    cue_positions = [turn.get("cue_ball_position", [0, 0]) for turn in game_data]
+    x_positions = [pos[0] for pos in cue_positions]
+    y_positions = [pos[1] for pos in cue_positions]
+    player["averageCuePosition"] = {
+        "x": sum(x_positions) / len(x_positions) if x_positions else 0,
+        "y": sum(y_positions) / len(y_positions) if y_positions else 0
+    }
+
+    mid_game_index = total_shots // 2
+    early_game_pots = sum(len(game_data[i].get("balls_potted", [])) for i in range(mid_game_index))
+    player["earlyGamePots"] = early_game_pots
+    player["lateGamePots"] = sum(len(turn.get("balls_potted", [])) for turn in game_data) - early_game_pots
+
+
+def run_fused(player):
+    apply_turn_summary(player, summarize_turns(player["game_data"]))
+
+
+def main():
+    player = build_player(TURNS)
+    players = [copy.deepcopy(player) for _ in range(2 * REPEAT)]
+
+    # Both paths must agree before their timings mean anything
+    per_stat_player, fused_player = copy.deepcopy(player), copy.deepcopy(player)
+    run_per_stat(per_stat_player)
+    run_fused(fused_player)
+    assert per_stat_player == fused_player, "single pass and per-stat results differ"
+
+    per_stat = min(timeit.repeat(lambda: run_per_stat(players.pop()), number=1, repeat=REPEAT))
+    fused = min(timeit.repeat(lambda: run_fused(players.pop()), number=1, repeat=REPEAT))
+
+    print(f"8-ball turn analytics on a {TURNS}-turn player (best of {REPEAT})")
+    print(f"  per-stat functions: {per_stat * 1000:.2f} ms")
+    print(f"  single pass:        {fused * 1000:.2f} ms")
+    print(f"  speedup:            {per_stat / fused:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
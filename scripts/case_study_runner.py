@@ -3,8 +3,11 @@ import json
 from pymongo import MongoClient
 from ai_agent import DuelingDQNAgent
 from game_simulation import GameSimulator
-from trend_analysis import TrendAnalyzer
+from trend_analysis import BatchTrendAnalyzer
 from utils.visualization import Visualizer
+from utils.codec import encode_default
+from utils.profile_cache import profile_cache
+from config import Config
 
 class CaseStudyRunner:
     """
@@ -33,8 +36,11 @@ class CaseStudyRunner:
         )
 
     def reset(self) -> None:
-        """Clear stored profiles and reset agent weights."""
+        """Clear stored profiles and their archived trends, and reset agent weights."""
+        # Drop cached profiles first, or the simulation would resume from them
+        profile_cache.invalidate(self.db['player_profiles'])
         self.db['player_profiles'].delete_many({})
+        self.db[Config.PROFILE_ARCHIVE_COLLECTION].delete_many({})
         # reinitialize target network
         self.agent.update_target_model()
 
@@ -48,18 +54,20 @@ class CaseStudyRunner:
         agent_path = os.path.join(self.results_dir, "agent_weights.h5")
         self.agent.save(agent_path)
 
-        # Export profiles and trend summaries
-        summary = {}
+        # Export profiles and trend summaries, after writing back cached profile changes
+        profile_cache.flush()
+        profiles = []
         for pid in self.simulator.player_ids:
             profile = self.db['player_profiles'].find_one({"player_id": pid})
             with open(os.path.join(self.results_dir, f"{pid}_profile.json"), 'w') as f:
                 json.dump(profile, f, default=str, indent=2)
+            if profile:
+                profiles.append(profile)
 
-            analyzer = TrendAnalyzer(profile=type('P', (), {'data': profile}))
-            summary[pid] = analyzer.analyze()
+        summary = dict(BatchTrendAnalyzer().analyze_profiles(profiles))
 
         with open(os.path.join(self.results_dir, "trend_summary.json"), 'w') as f:
-            json.dump(summary, f, indent=2)
+            json.dump(summary, f, indent=2, default=encode_default)
 
         # Generate Visuals
         viz = Visualizer(db=self.db, player_ids=self.simulator.player_ids)
@@ -0,0 +1,44 @@
+import argparse
+import sys
+import requests
+from utils.db_utils import get_database
+from utils.indexes import ensure_indexes, missing_indexes
+
+
+def fetch_uncovered_queries(url, token):
+    """Fetch the query shapes a running service has seen that no declared index covers."""
+    response = requests.get(f"{url}/api/v1/admin/index-report", headers={"Authorization": token}, timeout=10)
+    response.raise_for_status()
+    return response.json()["uncovered"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report missing indexes and queries that no index covers.")
+    parser.add_argument("--ensure", action="store_true", help="Create missing declared indexes before reporting")
+    parser.add_argument("--url", help="Base URL of a running service whose recorded queries should be checked")
+    parser.add_argument("--token", default="", help="Authorization token for the running service")
+    args = parser.parse_args()
+
+    database = get_database()
+    if args.ensure:
+        ensure_indexes(database)
+
+    problems = 0
+    missing = missing_indexes(database)
+    for collection_name, names in missing.items():
+        print(f"MISSING  {collection_name}: {', '.join(names)}")
+        problems += len(names)
+
+    if args.url:
+        for shape in fetch_uncovered_queries(args.url, args.token):
+            sort = ", ".join(f"{field} {direction}" for field, direction in shape["sort"]) or "-"
+            print(f"UNCOVERED  {shape['collection']}: filter={shape['filter']} sort={sort} ({shape['count']} queries)")
+            problems += 1
+
+    if not problems:
+        print("All declared indexes exist and all recorded queries are covered.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 import requests
 from sdk.config import SDKConfig
 from utils.logger import logger
+from utils import codec
 
 class APIClient:
     def __init__(self, base_url: str = SDKConfig.BASE_URL):
@@ -11,10 +12,11 @@ class APIClient:
         url = f"{self.base_url}/api/v1/process-game-data"
         payload = {"game": game_type, "data": game_data}
         try:
-            response = requests.post(url, json=payload)
+            response = requests.post(url, data=codec.dumps(payload), headers={"Content-Type": "application/json"})
             response.raise_for_status()
             logger.info(f"API request successful: {response.status_code}")
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return codec.loads(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # ValueError: the response body was not JSON, e.g. an HTML error page from a proxy
             logger.error(f"API request failed: {e}")
             return {"error": "API request failed", "details": str(e)}
@@ -0,0 +1,13 @@
+import logging
+from sdk.config import SDKConfig
+from utils.logger import create_queue_handler
+
+# Logger for the SDK; its console handler runs on a background thread behind a bounded queue
+logger = logging.getLogger("SDK")
+logger.setLevel(logging.DEBUG)
+logger.propagate = False
+
+handler = logging.StreamHandler()
+handler.setLevel(getattr(logging, SDKConfig.LOG_LEVEL.upper(), logging.INFO))
+handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+logger.addHandler(create_queue_handler([handler]))
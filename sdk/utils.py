@@ -1,10 +1,6 @@
-import logging
 import json
 from typing import Any
-
-# Initialize the logger for the SDK
-logger = logging.getLogger("SDK")
-logger.setLevel(logging.DEBUG)
+from sdk.logger import logger
 
 def log_request(request_data: dict):
     """Helper function to log the request details."""
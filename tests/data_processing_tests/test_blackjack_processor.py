@@ -1,5 +1,8 @@
 import unittest
-from utils.processors.blackjack_processor import process_blackjack_data
+from unittest.mock import MagicMock, patch
+from utils.data_processing import bind_server_state, bind_batch_server_state, load_hand_stats_states, unpack_batch_results
+from utils.processors import InvalidGameDataError
+from utils.processors.blackjack_processor import process_blackjack_data, BlackjackHandAccumulator
 
 class TestBlackjackProcessor(unittest.TestCase):
     def setUp(self):
@@ -37,5 +40,139 @@ class TestBlackjackProcessor(unittest.TestCase):
         self.assertIn("maxWinStreak", player)
         self.assertIn("maxLossStreak", player)
 
+    def build_hands(self, count):
+        return [
+            {
+                "bet": 10 + (i * 7) % 40,
+                "blackjack": i % 6 == 0,
+                "bust": i % 5 == 0,
+                "double_down": i % 4 == 0,
+                "split": i % 9 == 0,
+                "win": i % 2 == 0,
+                "value": 12 + i % 10,
+                "card_values": [i % 10 + 1, (i * 3) % 10 + 1],
+                "hand_id": i,
+            }
+            for i in range(count)
+        ]
+
+    def test_accumulator_resumes_from_stored_state(self):
+        hands = self.build_hands(30)
+        single_pass = BlackjackHandAccumulator()
+        for hand in hands:
+            single_pass.add(hand)
+
+        first = BlackjackHandAccumulator()
+        for hand in hands[:12]:
+            first.add(hand)
+        resumed = BlackjackHandAccumulator.from_state(first.to_state())
+        for hand in hands[12:]:
+            resumed.add(hand)
+
+        self.assertEqual(resumed.hands, 30)
+        self.assertEqual(resumed.total_bet, single_pass.total_bet)
+        self.assertAlmostEqual(resumed.bet_m2, single_pass.bet_m2)
+        self.assertEqual(resumed.bets_increasing, single_pass.bets_increasing)
+
+    def test_client_state_is_ignored(self):
+        stored = BlackjackHandAccumulator()
+        hands = self.build_hands(6)
+        for hand in hands[:4]:
+            stored.add(hand)
+        forged = {"hands": 1000, "wins": 1000, "total_bet": 0}
+        game_data = {"players": [{"username": "player1", "hands": hands[4:], "handStatsState": forged,
+                                  "resumeHandStats": True}]}
+
+        player = process_blackjack_data(game_data, previous_states={"player1": stored.to_state()})[0]
+
+        self.assertEqual(player["totalHandsPlayed"], 6)
+        self.assertEqual(player["handStatsState"]["hands"], 6)
+        self.assertNotIn("resumeHandStats", player)
+
+    def test_resuming_is_opt_in(self):
+        stored = BlackjackHandAccumulator()
+        for hand in self.build_hands(4):
+            stored.add(hand)
+        game_data = {"players": [{"username": "player1", "hands": self.build_hands(2)}]}
+
+        player = process_blackjack_data(game_data, previous_states={"player1": stored.to_state()})[0]
+
+        self.assertEqual(player["totalHandsPlayed"], 2)
+
+    def test_resent_hands_are_counted_once(self):
+        stored = BlackjackHandAccumulator()
+        hands = self.build_hands(6)
+        for hand in hands[:4]:
+            stored.add(hand)
+        game_data = {"players": [{"username": "player1", "hands": hands, "resumeHandStats": True}]}
+
+        player = process_blackjack_data(game_data, previous_states={"player1": stored.to_state()})[0]
+
+        self.assertEqual(player["totalHandsPlayed"], 6)
+        self.assertEqual(player["handStatsState"]["last_hand_id"], 5)
+        with self.assertRaises(InvalidGameDataError):
+            process_blackjack_data({"players": [{"username": "player1", "hands": [{"bet": 5}],
+                                                 "resumeHandStats": True}]})
+
+    def test_invalid_state_and_hands_are_rejected(self):
+        with self.assertRaises(InvalidGameDataError):
+            BlackjackHandAccumulator.from_state({"hands": "12"})
+        with self.assertRaises(InvalidGameDataError):
+            BlackjackHandAccumulator.from_state({"bets_increasing": 1})
+        with self.assertRaises(InvalidGameDataError):
+            BlackjackHandAccumulator().add({"bet": "10"})
+        with self.assertRaises(InvalidGameDataError):
+            process_blackjack_data({"players": [{"username": "player1", "hands": 5}]})
+
+    def test_bind_server_state_loads_latest_state(self):
+        database = MagicMock()
+        database.__getitem__.return_value.aggregate.return_value = [{"_id": "player1", "state": {"hands": 3}}]
+        processor = bind_server_state(
+            process_blackjack_data, {"players": [{"username": "player1", "resumeHandStats": True}]}, database
+        )
+
+        self.assertEqual(processor.keywords["previous_states"], {"player1": {"hands": 3}})
+        database.__getitem__.assert_called_with("blackjack_game_data")
+        self.assertEqual(load_hand_stats_states([], database), {})
+        other = MagicMock()
+        self.assertIs(bind_server_state(other, {"players": []}, database), other)
+
+    def test_buffered_uploads_are_flushed_before_loading_state(self):
+        database = MagicMock()
+        database.__getitem__.return_value.aggregate.return_value = []
+        with patch("utils.data_processing.Config.WRITE_BUFFER_ENABLED", True), \
+                patch("utils.data_processing.get_write_buffer") as mock_get_write_buffer:
+            load_hand_stats_states(["player1"], database)
+        mock_get_write_buffer.return_value.flush.assert_called_once_with("blackjack_game_data")
+
+    def test_batch_uploads_for_the_same_player_run_in_sequence(self):
+        hands = self.build_hands(6)
+        uploads = [
+            {"players": [{"username": "player1", "hands": hands[:3], "resumeHandStats": True}]},
+            {"players": [{"username": "player2", "hands": hands[:2], "resumeHandStats": True}]},
+            {"players": [{"username": "player1", "hands": hands[2:], "resumeHandStats": True}]},
+        ]
+        database = MagicMock()
+        database.__getitem__.return_value.aggregate.return_value = []
+        other = MagicMock(return_value=[])
+
+        tasks, locations = bind_batch_server_state(
+            [(process_blackjack_data, upload) for upload in uploads] + [(other, {})], database
+        )
+        results = unpack_batch_results([processor(game_data) for processor, game_data in tasks], locations)
+
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual([result[0]["totalHandsPlayed"] for result in results[:3]], [3, 2, 6])
+        self.assertEqual(results[3], [])
+
+    def test_increasing_betting_trend(self):
+        player = {"username": "player1", "hands": [{"bet": bet} for bet in (5, 10, 15, 20, 25)]}
+        accumulator = BlackjackHandAccumulator()
+        for hand in player["hands"]:
+            accumulator.add(hand)
+        accumulator.apply(player)
+        self.assertEqual(player["bettingTrend"], "Increasing")
+        self.assertEqual(player["betVariance"], 50)
+
 if __name__ == "__main__":
     unittest.main()
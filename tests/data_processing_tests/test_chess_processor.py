@@ -1,5 +1,6 @@
 import unittest
-from utils.processors.chess_processor import process_chess_data
+from utils.processors import chess_processor
+from utils.processors.chess_processor import process_chess_data, summarize_moves, apply_move_summary
 
 class TestChessProcessor(unittest.TestCase):
     def setUp(self):
@@ -139,5 +140,15 @@ class TestChessProcessor(unittest.TestCase):
             "openingFrequencies": {"Ruy Lopez": 2}
         })
 
+    def test_openings_in_game_history(self):
+        """Test most common opening and diversity from the game history."""
+        player = {
+            "username": "chess_master",
+            "game_history": [{"opening": "Sicilian"}, {"opening": "French"}, {"opening": "Sicilian"}, {}]
+        }
+        chess_processor.analyze_openings_in_game_history(player)
+        self.assertEqual(player["mostCommonOpening"], "Sicilian")
+        self.assertEqual(player["openingDiversity"], 2)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from utils.processors.eight_ball_processor import process_8ball_data
+from utils.processors.eight_ball_processor import process_8ball_data, summarize_turns, apply_turn_summary
 
 class TestEightBallProcessor(unittest.TestCase):
     def setUp(self):
@@ -131,5 +131,30 @@ class TestEightBallProcessor(unittest.TestCase):
         self.assertIn("averageCuePosition", player)
         self.assertEqual(player["averageCuePosition"], {"x": 30.0, "y": 40.0})
 
+    def test_turn_summary_updates_totals_and_game_phases(self):
+        """Test that the turn summary adds the game to the totals and splits pots by game phase."""
+        player = {
+            "username": "test_player",
+            "games": 10,
+            "games_won": 5,
+            "games_lost": 5,
+            "balls_potted": 20,
+            "result": "win",
+            "game_data": [
+                {"timestamp": 1, "balls_potted": [1]},
+                {"timestamp": 2, "balls_potted": [2, 3]},
+                {"timestamp": 3, "balls_potted": []},
+                {"timestamp": 4, "balls_potted": [4]},
+            ]
+        }
+
+        apply_turn_summary(player, summarize_turns(player["game_data"]))
+
+        self.assertEqual((player["games"], player["games_won"], player["games_lost"]), (11, 6, 5))
+        self.assertEqual(player["balls_potted"], 24)
+        self.assertEqual((player["earlyGamePots"], player["lateGamePots"]), (3, 1))
+        self.assertEqual(player["maxPottingStreak"], 2)
+        self.assertEqual(player["mostCommonBallHit"], None)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from models.anomaly_detection import (
+    BatchAnomalyScanner,
+    batch_anomaly_mask,
+    welford_std,
+    welford_update,
+    welford_zscore,
+)
+from models.trend_analysis import pad_series
+
+
+class TestAnomalyDetection(unittest.TestCase):
+    def test_welford_matches_numpy(self):
+        values = np.random.default_rng(3).normal(10, 2, 200)
+        state = None
+        for value in values:
+            state = welford_update(state, value)
+
+        self.assertEqual(state["count"], 200)
+        self.assertAlmostEqual(state["mean"], values.mean())
+        self.assertAlmostEqual(welford_std(state), values.std(ddof=1))
+        self.assertAlmostEqual(welford_zscore(state, 20.0), (20.0 - values.mean()) / values.std(ddof=1))
+
+    def test_zscore_needs_enough_values_and_spread(self):
+        state = welford_update(welford_update(None, 1.0), 1.0)
+        self.assertIsNone(welford_zscore(state, 5.0))
+        self.assertIsNone(welford_zscore(welford_update(state, 2.0), 5.0, min_count=10))
+
+    def test_batch_mask_matches_per_row_zscores(self):
+        series = [[1.0, 1.1, 0.9, 1.0, 9.0], [2.0, 2.0], [3.0], [0.1, 0.2, 0.3, 5.0, 0.2, 0.1]]
+        mask = batch_anomaly_mask(pad_series(series), threshold=1.5)
+
+        for row, values in enumerate(series):
+            values = np.array(values)
+            expected = []
+            if len(values) >= 2 and values.std(ddof=1) > 0:
+                expected = np.flatnonzero(np.abs(values - values.mean()) / values.std(ddof=1) > 1.5).tolist()
+            self.assertEqual(np.flatnonzero(mask[row]).tolist(), expected)
+
+    def test_scanner_reports_players_with_anomalies(self):
+        steady = [0.5, 0.52, 0.48] * 5
+        profiles = [
+            {"player_id": "p1", "accuracy_trend": steady, "foul_trend": [1, 2] * 7},
+            {"player_id": "p2", "accuracy_trend": steady + [0.99], "foul_trend": [1, 2] * 7 + [9]},
+            {"player_id": "p3"},
+        ]
+
+        results = list(BatchAnomalyScanner(threshold=3.0, chunk_size=2).scan(profiles))
+
+        self.assertEqual(results, [("p2", {"accuracy_trend": [15], "foul_trend": [14]})])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from models.trend_analysis import (
+    BatchTrendAnalyzer,
+    TrendAnalyzer,
+    batch_moving_average,
+    batch_slope_intercept,
+    pad_series,
+)
+
+
+class TestBatchTrendAnalysis(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.series = [list(rng.random(length)) for length in (1, 3, 5, 12, 40)]
+
+    def test_slopes_match_polyfit(self):
+        slope, intercept = batch_slope_intercept(pad_series(self.series))
+
+        self.assertEqual((slope[0], intercept[0]), (0.0, 0.0))
+        for row, series in enumerate(self.series[1:], start=1):
+            expected_slope, expected_intercept = np.polyfit(np.arange(len(series)), series, 1)
+            self.assertAlmostEqual(slope[row], expected_slope)
+            self.assertAlmostEqual(intercept[row], expected_intercept)
+
+    def test_moving_average_matches_single_player_version(self):
+        analyzer = TrendAnalyzer(profile=None)
+        averages = batch_moving_average(pad_series(self.series), window=5)
+
+        for row, series in enumerate(self.series):
+            values = averages[row][~np.isnan(averages[row])]
+            np.testing.assert_allclose(values, analyzer.moving_average(series, window=5))
+
+    def test_analyze_profiles_matches_trend_analyzer(self):
+        profiles = [
+            {"player_id": f"p{index}", "accuracy_trend": series, "foul_trend": series[::-1],
+             "aggressiveness_trend": [], "win_trend": []}
+            for index, series in enumerate(self.series)
+        ]
+
+        results = dict(BatchTrendAnalyzer(chunk_size=2).analyze_profiles(profiles))
+
+        self.assertEqual(list(results), ["p0", "p1", "p2", "p3", "p4"])
+        for profile in profiles:
+            expected = TrendAnalyzer(profile=type("P", (), {"data": profile})).analyze()
+            actual = results[profile["player_id"]]
+            self.assertAlmostEqual(actual["acc_slope"], expected["acc_slope"])
+            self.assertAlmostEqual(actual["fouls_slope"], expected["fouls_slope"])
+            self.assertEqual(actual["improving"], expected["improving"])
+            np.testing.assert_allclose(actual["acc_ma"], expected["acc_ma"])
+
+    def test_pad_series_keeps_most_recent_values(self):
+        matrix = pad_series([[1, 2, 3, 4], [5]], length=2)
+        np.testing.assert_array_equal(matrix, np.array([[3, 4], [5, np.nan]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import datetime
+import unittest
+import numpy as np
+from bson import ObjectId
+from utils.codec import StdlibJSONCodec, OrjsonCodec, SocketIOJSON, get_codec, orjson
+
+
+class TestCodec(unittest.TestCase):
+    def setUp(self):
+        self.codecs = [StdlibJSONCodec()]
+        if orjson is not None:
+            self.codecs.append(OrjsonCodec())
+
+    def test_round_trips_numpy_datetime_and_object_id(self):
+        object_id = ObjectId()
+        document = {
+            "_id": object_id,
+            "created": datetime.datetime(2024, 1, 2, 3, 4, 5),
+            "winRate": np.float64(0.5),
+            "games": np.int64(12),
+            "shotAccuracyTrend": np.array([0.25, 0.5, 0.75]),
+            "nested": {"values": [1, 2.5, None]},
+        }
+        for codec in self.codecs:
+            with self.subTest(codec=codec.name):
+                decoded = codec.loads(codec.dumps(document))
+                self.assertEqual(decoded["_id"], str(object_id))
+                self.assertEqual(decoded["created"], "2024-01-02T03:04:05")
+                self.assertEqual(decoded["winRate"], 0.5)
+                self.assertEqual(decoded["games"], 12)
+                self.assertEqual(decoded["shotAccuracyTrend"], [0.25, 0.5, 0.75])
+                self.assertEqual(decoded["nested"], {"values": [1, 2.5, None]})
+
+    def test_codecs_produce_identical_output(self):
+        if orjson is None:
+            self.skipTest("orjson is not installed")
+        document = {"b": [1, 2.5, "x"], "a": {"nested": True}, 3: "int key"}
+        self.assertEqual(StdlibJSONCodec().dumps(document, sort_keys=False),
+                         OrjsonCodec().dumps(document, sort_keys=False))
+
+    def test_rejects_unknown_types(self):
+        for codec in self.codecs:
+            with self.subTest(codec=codec.name):
+                with self.assertRaises(TypeError):
+                    codec.dumps({"value": object()})
+
+    def test_get_codec_by_name(self):
+        self.assertIsInstance(get_codec("json"), StdlibJSONCodec)
+        expected = OrjsonCodec if orjson is not None else StdlibJSONCodec
+        self.assertIsInstance(get_codec("auto"), expected)
+
+    def test_socketio_adapter_accepts_json_module_arguments(self):
+        encoded = SocketIOJSON.dumps({"shot": 1}, separators=(",", ":"))
+        self.assertIsInstance(encoded, str)
+        self.assertEqual(SocketIOJSON.loads(encoded), {"shot": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
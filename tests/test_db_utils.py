@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from config import Config
+from utils import db_utils
 from utils.db_utils import store_processed_data
 
 class TestDbUtils(unittest.TestCase):
@@ -40,5 +41,138 @@ class TestDbUtils(unittest.TestCase):
 
         mock_collection.insert_many.assert_called_once_with(data)
 
+    @patch("utils.db_utils.get_db_connection")
+    def test_store_processed_data_keeps_shared_client_open(self, mock_get_db_connection):
+        mock_client = MagicMock()
+        mock_get_db_connection.return_value = mock_client
+
+        store_processed_data({"username": "player1"}, "8ball")
+
+        mock_client.close.assert_not_called()
+
+    @patch("utils.db_utils.get_write_buffer")
+    @patch("utils.db_utils.get_db_connection")
+    def test_store_processed_data_buffers_when_enabled(self, mock_get_db_connection, mock_get_write_buffer):
+        mock_collection = mock_get_db_connection.return_value["game_data_db"]["8ball_game_data"]
+        data = [{"username": "player1"}]
+
+        with patch.object(Config, "WRITE_BUFFER_ENABLED", True):
+            store_processed_data(data, "8ball")
+
+        mock_get_write_buffer.return_value.add.assert_called_once_with("8ball_game_data", data, on_written=None)
+        mock_collection.insert_many.assert_not_called()
+
+    @patch("utils.db_utils.get_db_connection")
+    def test_store_processed_data_reports_written_documents(self, mock_get_db_connection):
+        written = []
+        store_processed_data({"username": "player1"}, "8ball", on_written=written.extend)
+        self.assertEqual(written, [{"username": "player1"}])
+
+        mock_collection = mock_get_db_connection.return_value["game_data_db"]["8ball_game_data"]
+        mock_collection.insert_one.side_effect = Exception("unavailable")
+        with self.assertRaises(Exception):
+            store_processed_data({"username": "player2"}, "8ball", on_written=written.extend)
+        self.assertEqual(written, [{"username": "player1"}])
+
+
+class TestSharedClient(unittest.TestCase):
+    def setUp(self):
+        db_utils._client = None
+
+    def tearDown(self):
+        db_utils._client = None
+
+    @patch("utils.db_utils.MongoClient")
+    def test_client_is_created_once_per_process(self, mock_mongo_client):
+        first = db_utils.get_db_connection()
+        second = db_utils.get_db_connection()
+
+        self.assertIs(first, second)
+        mock_mongo_client.assert_called_once()
+        kwargs = mock_mongo_client.call_args.kwargs
+        self.assertEqual(kwargs["maxPoolSize"], Config.MONGO_MAX_POOL_SIZE)
+        self.assertEqual(kwargs["serverSelectionTimeoutMS"], Config.TIMEOUT * 1000)
+
+    @patch("utils.db_utils.os.getpid")
+    @patch("utils.db_utils.MongoClient")
+    def test_client_is_recreated_after_fork(self, mock_mongo_client, mock_getpid):
+        mock_mongo_client.side_effect = [MagicMock(), MagicMock()]
+        mock_getpid.return_value = 100
+        parent_client = db_utils.get_db_connection()
+        mock_getpid.return_value = 200
+        child_client = db_utils.get_db_connection()
+
+        self.assertIsNot(parent_client, child_client)
+        parent_client.close.assert_not_called()
+
+    def test_pool_stats_track_checkouts(self):
+        listener = db_utils.PoolStatsListener()
+        listener.connection_created(None)
+        listener.connection_checked_out(None)
+        listener.connection_checked_out(None)
+        listener.connection_checked_in(None)
+
+        stats = listener.snapshot()
+        self.assertEqual(stats["in_use"], 1)
+        self.assertEqual(stats["open"], 1)
+
+
+class TestStreamingReads(unittest.TestCase):
+    @patch("utils.db_utils.get_collection")
+    def test_iter_documents_streams_with_batch_size(self, mock_get_collection):
+        cursor = MagicMock()
+        cursor.__iter__.return_value = iter([{"_id": 1}, {"_id": 2}])
+        mock_get_collection.return_value.find.return_value = cursor
+
+        documents = db_utils.iter_documents("chess", {"username": "player1"}, {"rating": 1}, batch_size=50)
+
+        self.assertEqual(list(documents), [{"_id": 1}, {"_id": 2}])
+        mock_get_collection.return_value.find.assert_called_once_with({"username": "player1"}, {"rating": 1}, batch_size=50)
+        cursor.close.assert_called_once()
+
+    @patch("utils.db_utils.get_collection")
+    def test_find_page_returns_token_for_next_page(self, mock_get_collection):
+        find = mock_get_collection.return_value.find
+        find.return_value = [{"_id": i, "rating": 1000 + i} for i in range(3)]
+
+        documents, token = db_utils.find_page("chess", sort_field="rating", page_size=2)
+
+        self.assertEqual(len(documents), 2)
+        self.assertEqual(db_utils.decode_page_token(token), [1001, 1])
+        self.assertEqual(find.call_args.kwargs["limit"], 3)
+
+        find.return_value = [{"_id": 2, "rating": 1002}]
+        documents, next_token = db_utils.find_page("chess", {"username": "p"}, sort_field="rating", page_size=2, page_token=token)
+
+        self.assertIsNone(next_token)
+        query = find.call_args[0][0]
+        self.assertEqual(query["$and"][0], {"username": "p"})
+        self.assertEqual(query["$and"][1]["$or"][1], {"rating": 1001, "_id": {"$gt": 1}})
+
+    @patch("utils.db_utils.get_collection")
+    def test_find_page_handles_dotted_and_missing_sort_values(self, mock_get_collection):
+        find = mock_get_collection.return_value.find
+        find.return_value = [{"_id": 1, "stats": {"rating": 1500}}, {"_id": 2, "stats": {"rating": 1600}}]
+
+        _, token = db_utils.find_page("chess", sort_field="stats.rating", page_size=1)
+        self.assertEqual(db_utils.decode_page_token(token), [1500, 1])
+
+        find.return_value = [{"_id": 3}, {"_id": 4}]
+        _, token = db_utils.find_page("chess", sort_field="stats.rating", page_size=1)
+        self.assertEqual(db_utils.decode_page_token(token), [None, 3])
+
+        db_utils.find_page("chess", sort_field="stats.rating", page_size=1, page_token=token)
+        self.assertEqual(find.call_args[0][0], {"$or": [
+            {"stats.rating": {"$ne": None}},
+            {"stats.rating": None, "_id": {"$gt": 3}},
+        ]})
+
+        db_utils.find_page("chess", sort_field="stats.rating", ascending=False, page_size=1, page_token=token)
+        self.assertEqual(find.call_args[0][0], {"stats.rating": None, "_id": {"$lt": 3}})
+
+    def test_invalid_page_token(self):
+        with self.assertRaises(ValueError):
+            db_utils.decode_page_token("not-a-token")
+
 if __name__ == "__main__":
     unittest.main()
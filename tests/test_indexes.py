@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from pymongo import ASCENDING, DESCENDING
+from utils import indexes
+from utils.indexes import (
+    INDEX_REGISTRY,
+    ensure_indexes,
+    index_covers,
+    missing_indexes,
+    record_query_shape,
+    uncovered_query_shapes,
+)
+
+
+class TestIndexes(unittest.TestCase):
+    def setUp(self):
+        indexes._query_shapes.clear()
+
+    def test_registry_covers_recent_games_query(self):
+        declarations = INDEX_REGISTRY["eight_ball_game_data"]
+        self.assertTrue(any(
+            index_covers(declaration["keys"], ("player_id",), (("game_time", DESCENDING),))
+            for declaration in declarations
+        ))
+
+    def test_index_covers_prefix_and_sort(self):
+        keys = [("player_id", ASCENDING), ("game_time", DESCENDING)]
+        self.assertTrue(index_covers(keys, ("player_id",)))
+        self.assertTrue(index_covers(keys, ("player_id",), (("game_time", ASCENDING),)))
+        self.assertTrue(index_covers(keys, ("game_time", "player_id")))
+        self.assertFalse(index_covers(keys, ("game_time",)))
+        self.assertFalse(index_covers(keys, ("player_id",), (("score", ASCENDING),)))
+
+    def test_id_sorts_and_tie_breakers_are_covered(self):
+        record_query_shape("chess_game_data", None, sort=[("_id", ASCENDING)])
+        record_query_shape("chess_game_data", {"username": "p"}, sort=[("_id", DESCENDING)])
+        record_query_shape("chess_game_data", {"player_id": "p"}, sort=[("game_time", DESCENDING), ("_id", DESCENDING)])
+        record_query_shape("chess_game_data", {"_id": "abc", "username": "p"})
+        record_query_shape("chess_game_data", None, sort=[("rating", ASCENDING), ("_id", ASCENDING)])
+
+        self.assertEqual(uncovered_query_shapes(), [
+            {"collection": "chess_game_data", "filter": [], "sort": [["rating", ASCENDING], ["_id", ASCENDING]], "count": 1},
+        ])
+
+    def test_ensure_indexes_creates_declared_models(self):
+        database = MagicMock()
+        registry = {"chess_game_data": INDEX_REGISTRY["chess_game_data"]}
+
+        ensure_indexes(database, registry)
+
+        models = database["chess_game_data"].create_indexes.call_args[0][0]
+        self.assertEqual([model.document["name"] for model in models], ["player_id_game_time", "username"])
+
+    def test_missing_indexes(self):
+        database = MagicMock()
+        database.__getitem__.return_value.index_information.return_value = {
+            "_id_": {"key": [("_id", 1)]},
+            "player_id": {"key": [("player_id", 1)]},
+        }
+        registry = {"player_profiles": INDEX_REGISTRY["player_profiles"], "game_data": INDEX_REGISTRY["game_data"]}
+
+        missing = missing_indexes(database, registry)
+
+        self.assertEqual(missing, {"game_data": ["player_id_timestamp", "game_type_timestamp"]})
+
+    def test_db_utils_helpers_record_uncovered_queries(self):
+        with patch("utils.db_utils.get_database", return_value=MagicMock()):
+            from utils.db_utils import get_documents_by_field, find_one_or_default, get_document_by_id
+            get_documents_by_field("chess", "username", "player1")
+            get_documents_by_field("chess", "rating", 1500)
+            get_documents_by_field("chess", "rating", 1600)
+            find_one_or_default("chess", {"_id": "abc"})
+            get_document_by_id("chess", "abc")
+
+        record_query_shape("chess_game_data", {"player_id": "p"}, sort=[("game_time", DESCENDING)])
+
+        self.assertEqual(uncovered_query_shapes(), [
+            {"collection": "chess_game_data", "filter": ["rating"], "sort": [], "count": 2},
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
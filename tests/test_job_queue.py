@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+from utils.job_queue import JobQueue, JobQueueFullError
+
+
+def wait_for_status(queue, job_id, statuses, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job and job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+class TestJobQueue(unittest.TestCase):
+    def test_job_succeeds_and_records_result(self):
+        queue = JobQueue(max_size=10, workers=2)
+        job_id = queue.submit(lambda x: x * 2, 21)
+
+        job = wait_for_status(queue, job_id, {"succeeded", "failed"})
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"], 42)
+        self.assertIsNotNone(job["finished_at"])
+
+    def test_job_failure_is_recorded(self):
+        queue = JobQueue(max_size=10, workers=1)
+
+        def fail():
+            raise ValueError("boom")
+
+        job_id = queue.submit(fail)
+        job = wait_for_status(queue, job_id, {"succeeded", "failed"})
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("boom", job["error"])
+
+    def test_submit_raises_when_full(self):
+        queue = JobQueue(max_size=1, workers=1)
+        release = threading.Event()
+
+        running_id = queue.submit(release.wait)
+        wait_for_status(queue, running_id, {"running"})
+        queue.submit(release.wait)
+
+        with self.assertRaises(JobQueueFullError):
+            queue.submit(release.wait)
+        release.set()
+
+    def test_finished_jobs_expire(self):
+        queue = JobQueue(max_size=10, workers=1, result_ttl=0)
+        job_id = queue.submit(lambda: None)
+        wait_for_status(queue, job_id, {"succeeded"})
+
+        queue.submit(lambda: None)
+        self.assertIsNone(queue.get(job_id))
+
+    def test_unknown_job_returns_none(self):
+        self.assertIsNone(JobQueue().get("missing"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from utils.leaderboard import Leaderboard, TopKTable
+
+
+class TestTopKTable(unittest.TestCase):
+    def setUp(self):
+        self.table = TopKTable(3)
+        self.table.load([("a", 0.9), ("b", 0.8), ("c", 0.7), ("d", 0.6)])
+
+    def ranking(self):
+        return [player_id for _, player_id in self.table.entries]
+
+    def test_load_keeps_best_outside_entry_as_floor(self):
+        self.assertEqual(self.ranking(), ["a", "b", "c"])
+        self.assertEqual(self.table.floor, (-0.6, "d"))
+
+    def test_new_player_evicts_last_entry(self):
+        self.table.update("e", 0.85)
+
+        self.assertEqual(self.ranking(), ["a", "e", "b"])
+        self.assertEqual(self.table.rank("e"), 2)
+        self.assertIsNone(self.table.rank("c"))
+        self.assertEqual(self.table.floor, (-0.7, "c"))
+
+    def test_tracked_player_moves(self):
+        self.table.update("c", 0.95)
+        self.assertEqual(self.ranking(), ["c", "a", "b"])
+
+        self.table.update("c", 0.65)
+        self.assertEqual(self.ranking(), ["a", "b", "c"])
+        self.assertFalse(self.table.stale)
+
+    def test_drop_below_floor_marks_stale(self):
+        self.table.update("a", 0.5)
+        self.assertTrue(self.table.stale)
+
+    def test_ties_rank_by_player_id(self):
+        self.table.update("aa", 0.9)
+        self.assertEqual(self.ranking(), ["a", "aa", "b"])
+
+
+class TestLeaderboard(unittest.TestCase):
+    def setUp(self):
+        self.collection = MagicMock()
+        self.collection.find.return_value.sort.return_value.limit.return_value = [
+            {"player_id": "a", "score": 10},
+            {"player_id": "b", "score": 7},
+            {"player_id": "c", "score": 3},
+        ]
+        self.leaderboard = Leaderboard(lambda: {"leaderboard": self.collection}, size=2)
+
+    def test_top_reloads_once_then_serves_from_memory(self):
+        self.assertEqual(self.leaderboard.top("rating"), [
+            {"rank": 1, "player_id": "a", "score": 10},
+            {"rank": 2, "player_id": "b", "score": 7},
+        ])
+        self.leaderboard.record("c", {"rating": 8, "unknown": 1})
+
+        self.assertEqual([entry["player_id"] for entry in self.leaderboard.top("rating")], ["a", "c"])
+        self.assertEqual(self.collection.find.call_count, 1)
+        requests = self.collection.bulk_write.call_args[0][0]
+        self.assertEqual(len(requests), 1)
+
+    def test_rank_outside_table_is_counted(self):
+        self.collection.find_one.return_value = {"player_id": "z", "score": 2}
+        self.collection.count_documents.return_value = 41
+
+        entry = self.leaderboard.rank("win_rate", "z")
+
+        self.assertEqual(entry, {"rank": 42, "player_id": "z", "score": 2})
+        self.assertEqual(self.leaderboard.rank("win_rate", "a")["rank"], 1)
+        self.assertEqual(self.leaderboard.stats()["counted_ranks"], 1)
+
+    def test_record_processed_uses_chess_ratings(self):
+        self.leaderboard.record_processed("chess", [{"username": "p1", "rating": 1500}, {"username": "p2"}])
+
+        requests = self.collection.bulk_write.call_args[0][0]
+        self.assertEqual([request._filter for request in requests], [{"metric": "rating", "player_id": "p1"}])
+
+        self.collection.reset_mock()
+        self.leaderboard.record_processed("blackjack", [{"username": "p1"}])
+        self.collection.bulk_write.assert_not_called()
+
+
+    def test_tables_are_reloaded_after_the_interval(self):
+        self.leaderboard.top("rating")
+        self.leaderboard.top("rating")
+        self.assertEqual(self.collection.find.call_count, 1)
+
+        with patch("utils.leaderboard.time.monotonic", return_value=10 ** 9):
+            self.leaderboard.top("rating")
+        self.assertEqual(self.collection.find.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
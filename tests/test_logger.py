@@ -0,0 +1,142 @@
+import gzip
+import logging
+import os
+import queue
+import tempfile
+import unittest
+from logging.handlers import RotatingFileHandler
+from unittest.mock import MagicMock, patch
+from flask import Flask, request
+from utils.logger import (
+    render_payload,
+    log_payload,
+    DroppingQueueHandler,
+    create_queue_handler,
+    gzip_namer,
+    gzip_rotator,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        try:
+            self.messages.append(record.getMessage())
+        except Exception as e:
+            self.messages.append(f"error: {e}")
+
+
+class TestPayloadLogging(unittest.TestCase):
+    def setUp(self):
+        self.log = logging.getLogger("test-payload-logging")
+        self.log.propagate = False
+        self.handler = ListHandler()
+        self.log.addHandler(self.handler)
+        self.log.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        self.log.removeHandler(self.handler)
+
+    def test_payload_not_materialized_when_level_disabled(self):
+        self.log.setLevel(logging.INFO)
+        payload = MagicMock()
+        with patch("utils.logger.Config.LOG_PAYLOAD_SAMPLE_RATE", 1.0):
+            log_payload("Body: %s", payload=payload, log=self.log)
+        payload.assert_not_called()
+        self.assertEqual(self.handler.messages, [])
+
+    def test_sampled_payload_is_truncated(self):
+        with patch("utils.logger.Config.LOG_PAYLOAD_SAMPLE_RATE", 1.0), \
+                patch("utils.logger.Config.LOG_PAYLOAD_MAX_BYTES", 10):
+            log_payload("Body for %s: %s", "player1", payload=lambda: b"x" * 100, log=self.log)
+        self.assertEqual(self.handler.messages, ["Body for player1: xxxxxxxxxx... [truncated, 100 bytes]"])
+
+    def test_text_truncation_counts_characters(self):
+        self.assertEqual(render_payload("é" * 20, 5), "ééééé... [truncated, 20 characters]")
+
+    def test_unsampled_payload_is_omitted(self):
+        payload = MagicMock()
+        with patch("utils.logger.Config.LOG_PAYLOAD_SAMPLE_RATE", 0.0):
+            log_payload("Body: %s", payload=payload, log=self.log)
+        payload.assert_not_called()
+        self.assertEqual(self.handler.messages, ["Body: [payload not sampled]"])
+
+    def test_large_structures_are_bounded(self):
+        player = {"username": "player1", "game_data": [{"power": i} for i in range(10_000)]}
+        text = render_payload(player, 4096)
+        self.assertIn("'username': 'player1'", text)
+        self.assertLess(len(text), 4096)
+
+
+class TestQueueLogging(unittest.TestCase):
+    def test_full_queue_drops_and_counts_records(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        log = logging.getLogger("test-dropping-queue")
+        log.propagate = False
+        log.addHandler(handler)
+        try:
+            for i in range(5):
+                log.warning("record %d", i)
+        finally:
+            log.removeHandler(handler)
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_records_reach_handlers_through_listener(self):
+        target = ListHandler()
+        handler = create_queue_handler([target], max_size=10)
+        log = logging.getLogger("test-queue-listener")
+        log.propagate = False
+        log.addHandler(handler)
+        try:
+            log.warning("hello %s", "world")
+            handler.queue.join()
+        finally:
+            log.removeHandler(handler)
+        self.assertEqual(target.messages, ["hello world"])
+
+    def test_payload_is_rendered_on_the_calling_thread(self):
+        target = ListHandler()
+        handler = create_queue_handler([target], max_size=10)
+        log = logging.getLogger("test-queue-render-thread")
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        log.addHandler(handler)
+        player = {"username": "player1"}
+
+        try:
+            with Flask(__name__).test_request_context(headers={"X-Player": "player1"}), \
+                    patch("utils.logger.Config.LOG_PAYLOAD_SAMPLE_RATE", 1.0):
+                log_payload("headers %s", payload=lambda: request.headers.get("X-Player"), log=log)
+                log_payload("player %s", payload=player, log=log)
+                player["username"] = "changed"
+            handler.queue.join()
+        finally:
+            log.removeHandler(handler)
+        self.assertEqual(target.messages, ["headers player1", "player {'username': 'player1'}"])
+
+    def test_rotated_files_are_compressed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "app.log")
+            handler = RotatingFileHandler(path, maxBytes=50, backupCount=2)
+            handler.namer = gzip_namer
+            handler.rotator = gzip_rotator
+            log = logging.getLogger("test-gzip-rotation")
+            log.propagate = False
+            log.addHandler(handler)
+            try:
+                for i in range(5):
+                    log.warning("line %d with enough text to rotate", i)
+            finally:
+                log.removeHandler(handler)
+                handler.close()
+            self.assertTrue(os.path.exists(path + ".1.gz"))
+            with gzip.open(path + ".1.gz", "rt") as rotated:
+                self.assertIn("line", rotated.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,12 @@
+import json
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 from config import Config
 from flask import Flask
 from main import app
+from models import GamePayload
+from utils.result_cache import ResultCache
+from utils.processors import InvalidGameDataError
 
 class TestMain(unittest.TestCase):
     def setUp(self):
@@ -130,5 +134,247 @@ class TestMain(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("Database error", response.get_json().get("error"))
 
+    @patch("main.store_processed_data")
+    @patch("main.get_processor")
+    def test_process_game_data_batch_groups_inserts(self, mock_get_processor, mock_store_processed_data):
+        mock_processor = MagicMock()
+        mock_processor.side_effect = lambda data: [{"username": p["username"]} for p in data["players"]]
+        mock_get_processor.return_value = mock_processor
+
+        post_data = [
+            {"game": "8ball", "data": {"players": [{"username": "player1"}]}},
+            {"game": "8ball", "data": {"players": [{"username": "player2"}]}},
+            {"game": "chess", "data": {"players": [{"username": "player3"}]}},
+        ]
+
+        response = self.app.post(
+            "/api/v1/process-game-data/batch",
+            json=post_data,
+            headers={"Authorization": "expected_token"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["processed"], 3)
+        self.assertEqual(mock_processor.call_count, 3)
+        self.assertEqual(mock_store_processed_data.call_count, 2)
+        mock_store_processed_data.assert_any_call([{"username": "player1"}, {"username": "player2"}], "8ball",
+                                                  on_written=ANY)
+        mock_store_processed_data.assert_any_call([{"username": "player3"}], "chess", on_written=ANY)
+
+    @patch("main.Config.PLAYER_AGGREGATES_ENABLED", True)
+    @patch("main.apply_player_aggregates")
+    @patch("main.store_processed_data")
+    @patch("main.get_processor")
+    def test_process_game_data_batch_applies_aggregates_per_game(self, mock_get_processor, mock_store_processed_data,
+                                                                 mock_apply_player_aggregates):
+        mock_get_processor.return_value = MagicMock(
+            side_effect=lambda data: [{"username": p["username"]} for p in data["players"]]
+        )
+        mock_store_processed_data.side_effect = lambda documents, game, on_written: on_written(documents)
+        post_data = [
+            {"game": "8ball", "data": {"players": [{"username": "player1"}]}},
+            {"game": "8ball", "data": {"players": [{"username": "player2"}]}},
+            {"game": "chess", "data": {"players": [{"username": "player3"}]}},
+        ]
+
+        response = self.app.post(
+            "/api/v1/process-game-data/batch",
+            json=post_data,
+            headers={"Authorization": "expected_token"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_apply_player_aggregates.call_count, 4)
+        eight_ball = [{"username": "player1"}, {"username": "player2"}]
+        mock_apply_player_aggregates.assert_any_call("8ball", eight_ball, write=False)
+        mock_apply_player_aggregates.assert_any_call("8ball", eight_ball)
+        mock_apply_player_aggregates.assert_any_call("chess", [{"username": "player3"}], write=False)
+        mock_apply_player_aggregates.assert_any_call("chess", [{"username": "player3"}])
+
+    @patch("main.result_cache", new_callable=ResultCache)
+    @patch("main.Config.RESULT_CACHE_ENABLED", True)
+    @patch("main.Config.PLAYER_AGGREGATES_ENABLED", True)
+    @patch("main.apply_player_aggregates")
+    @patch("main.store_processed_data")
+    @patch("main.get_processor")
+    def test_unwritten_documents_are_not_recorded(self, mock_get_processor, mock_store_processed_data,
+                                                  mock_apply_player_aggregates, mock_cache):
+        # A buffered write that is dropped never reports the documents as written
+        mock_get_processor.return_value = MagicMock(return_value=[{"username": "player1"}])
+        post_data = {"game": "8ball", "data": {"players": [{"username": "player1"}]}}
+
+        for _ in range(2):
+            response = self.app.post("/api/v1/process-game-data", json=post_data,
+                                     headers={"Authorization": "expected_token"})
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(mock_store_processed_data.call_count, 2)
+        for call in mock_apply_player_aggregates.call_args_list:
+            self.assertFalse(call.kwargs["write"])
+        self.assertEqual(mock_cache.stats()["hits"], 0)
+
+    @patch("main.store_processed_data")
+    @patch("main.get_processor")
+    def test_process_game_data_batch_ndjson(self, mock_get_processor, mock_store_processed_data):
+        mock_get_processor.return_value = MagicMock(return_value=[{"username": "player1"}])
+        body = "\n".join(json.dumps({"game": "8ball", "data": {"players": []}}) for _ in range(2))
+
+        response = self.app.post(
+            "/api/v1/process-game-data/batch",
+            data=body,
+            content_type="application/x-ndjson",
+            headers={"Authorization": "expected_token"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        mock_store_processed_data.assert_called_once_with([{"username": "player1"}, {"username": "player1"}], "8ball",
+                                                          on_written=ANY)
+
+    @patch("main.store_processed_data")
+    @patch("main.get_processor")
+    def test_process_game_data_batch_rejects_invalid_item(self, mock_get_processor, mock_store_processed_data):
+        mock_get_processor.return_value = MagicMock(return_value=[])
+        post_data = [
+            {"game": "8ball", "data": {"players": []}},
+            {"data": {"players": []}},
+        ]
+
+        response = self.app.post(
+            "/api/v1/process-game-data/batch",
+            json=post_data,
+            headers={"Authorization": "expected_token"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["details"][0]["index"], 1)
+        mock_store_processed_data.assert_not_called()
+
+    @patch("main.store_processed_data")
+    @patch("main.get_processor")
+    def test_process_game_data_batch_rejects_invalid_game_data(self, mock_get_processor, mock_store_processed_data):
+        mock_get_processor.return_value = MagicMock(side_effect=InvalidGameDataError("Hand bet and value must be numbers"))
+
+        response = self.app.post(
+            "/api/v1/process-game-data/batch",
+            json=[{"game": "blackjack", "data": {"players": [{"username": "player1", "hands": [{"bet": "x"}]}]}}],
+            headers={"Authorization": "expected_token"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["error"], "Invalid game data")
+        mock_store_processed_data.assert_not_called()
+
+    @patch("main.job_queue")
+    @patch("main.get_processor")
+    def test_process_game_data_async_returns_job(self, mock_get_processor, mock_job_queue):
+        mock_get_processor.return_value = MagicMock()
+        mock_job_queue.submit.return_value = "job123"
+
+        response = self.app.post(
+            "/api/v1/process-game-data?async=true",
+            json={"game": "8ball", "data": {"players": []}},
+            headers={"Authorization": "expected_token"}
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()["job_id"], "job123")
+        self.assertEqual(response.headers["Location"], "/api/v1/jobs/job123")
+
+    @patch("main.job_queue")
+    def test_get_job_status_not_found(self, mock_job_queue):
+        mock_job_queue.get.return_value = None
+
+        response = self.app.get("/api/v1/jobs/missing", headers={"Authorization": "expected_token"})
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch("main.store_processed_data")
+    @patch("main.get_processor")
+    def test_process_game_data_decodes_body_once(self, mock_get_processor, mock_store_processed_data):
+        mock_get_processor.return_value = MagicMock(return_value=[{"username": "player1"}])
+
+        with patch("utils.request_context.GamePayload", wraps=GamePayload) as mock_model, \
+                patch.dict(app.config, {"DEBUG": True}):
+            response = self.app.post(
+                "/api/v1/process-game-data",
+                json={"game": "8ball", "data": {"players": []}},
+                headers={"Authorization": "expected_token"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Body-Decode-Count"], "1")
+        mock_model.assert_called_once()
+
+    def test_body_decode_count_header_only_in_debug_mode(self):
+        response = self.app.get("/health")
+        self.assertNotIn("X-Body-Decode-Count", response.headers)
+
+    @patch("main.result_cache", new_callable=ResultCache)
+    @patch("main.Config.RESULT_CACHE_ENABLED", True)
+    @patch("main.store_processed_data")
+    @patch("main.get_processor")
+    def test_duplicate_upload_returns_cached_outcome(self, mock_get_processor, mock_store_processed_data, mock_cache):
+        mock_processor = MagicMock(return_value=[{"username": "player1"}])
+        mock_get_processor.return_value = mock_processor
+        mock_store_processed_data.side_effect = lambda documents, game, on_written: on_written(documents)
+        post_data = {"game": "8ball", "data": {"players": [{"username": "player1", "games": 3}]}}
+
+        responses = [
+            self.app.post("/api/v1/process-game-data", json=post_data, headers={"Authorization": "expected_token"})
+            for _ in range(3)
+        ]
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200])
+        self.assertEqual(responses[2].get_json()["stored"], 1)
+        self.assertEqual(responses[2].headers["X-Result-Cache"], "hit")
+        mock_processor.assert_called_once()
+        mock_store_processed_data.assert_called_once()
+        self.assertEqual(mock_cache.stats()["hits"], 2)
+
+    @patch("main.find_page")
+    def test_list_game_documents_paginates(self, mock_find_page):
+        mock_find_page.return_value = ([{"_id": "a", "username": "player1"}], "next-token")
+
+        response = self.app.get(
+            "/api/v1/games/chess/documents?limit=5000&sort=rating&order=desc&fields=username&field=username&value=player1",
+            headers={"Authorization": "expected_token"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["next_page_token"], "next-token")
+        args, kwargs = mock_find_page.call_args
+        self.assertEqual(args, ("chess", {"username": "player1"}, {"username": 1}))
+        self.assertEqual(kwargs["page_size"], Config.PAGE_SIZE_MAX)
+        self.assertFalse(kwargs["ascending"])
+
+    @patch("main.find_page")
+    def test_list_game_documents_matches_numeric_values(self, mock_find_page):
+        mock_find_page.return_value = ([], None)
+
+        response = self.app.get("/api/v1/games/chess/documents?field=rating&value=1500",
+                                headers={"Authorization": "expected_token"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_find_page.call_args[0][1], {"rating": {"$in": ["1500", 1500]}})
+
+    def test_list_game_documents_unknown_game(self):
+        response = self.app.get("/api/v1/games/poker/documents", headers={"Authorization": "expected_token"})
+        self.assertEqual(response.status_code, 404)
+
+    @patch("main.leaderboard")
+    def test_leaderboard_routes(self, mock_leaderboard):
+        mock_leaderboard.top.return_value = [{"rank": 1, "player_id": "p1", "score": 0.9}]
+        mock_leaderboard.rank.return_value = None
+
+        response = self.app.get("/api/v1/leaderboards/win_rate?limit=10", headers={"Authorization": "expected_token"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["entries"][0]["player_id"], "p1")
+        mock_leaderboard.top.assert_called_once_with("win_rate", 10)
+
+        response = self.app.get("/api/v1/leaderboards/win_rate/players/p9", headers={"Authorization": "expected_token"})
+        self.assertEqual(response.status_code, 404)
+        response = self.app.get("/api/v1/leaderboards/elo", headers={"Authorization": "expected_token"})
+        self.assertEqual(response.status_code, 404)
+
 if __name__ == "__main__":
     unittest.main()
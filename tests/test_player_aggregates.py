@@ -0,0 +1,176 @@
+import copy
+import unittest
+from unittest.mock import MagicMock
+from pymongo.errors import BulkWriteError
+from utils.player_aggregates import apply_player_aggregates, build_delta, merge_delta
+
+
+class FakeAggregateCollection:
+    """Applies the update operators used by apply_player_aggregates to in-memory documents."""
+
+    def __init__(self):
+        self.documents = {}
+        self.bulk_write = MagicMock(side_effect=self._bulk_write)
+        self.before_write = None
+
+    def find(self, query):
+        return [copy.deepcopy(self.documents[_id]) for _id in query["_id"]["$in"] if _id in self.documents]
+
+    def _bulk_write(self, operations, ordered=True):
+        if self.before_write:
+            self.before_write()
+        errors = []
+        for index, operation in enumerate(operations):
+            _id = operation._filter["_id"]
+            if _id in self.documents and self.documents[_id].get("version") != operation._filter["version"]:
+                # The upsert finds no match and its insert collides with the existing _id
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+                continue
+            document = self.documents.setdefault(_id, {"_id": _id})
+            update = operation._doc
+            for field, value in update["$inc"].items():
+                if "." in field:
+                    parent, child = field.split(".", 1)
+                    document.setdefault(parent, {})
+                    document[parent][child] = document[parent].get(child, 0) + value
+                else:
+                    document[field] = document.get(field, 0) + value
+            for field, value in update["$max"].items():
+                document[field] = max(document.get(field, value), value)
+            for field, push in update["$push"].items():
+                document[field] = (document.get(field, []) + push["$each"])[push["$slice"]:]
+            document.update(update["$set"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+def blackjack_player(result, bets, state=None):
+    return {
+        "username": "player1",
+        "game_history": [{"result": result, "score_diff": 3}],
+        "hands": [{"bet": bet, "bust": index == 0, "win": index == 0} for index, bet in enumerate(bets)],
+        # Cumulative across uploads, so it must not be added to the totals
+        "handStatsState": state or {"hands": 100, "total_bet": 1000},
+    }
+
+
+class TestPlayerAggregates(unittest.TestCase):
+    def test_uploads_fold_into_running_totals(self):
+        collection = FakeAggregateCollection()
+        for result, bets in [("win", [10, 20]), ("win", [30]), ("loss", [40, 50])]:
+            player = blackjack_player(result, bets)
+            apply_player_aggregates("blackjack", [player], collection=collection, window=20)
+
+        document = collection.documents["blackjack:player1"]
+        self.assertEqual(document["games"], 3)
+        self.assertEqual(document["wins"], 2)
+        self.assertEqual(document["hands"], 5)
+        self.assertEqual(document["recent_results"], ["win", "win", "loss"])
+        self.assertEqual(document["max_win_streak"], 2)
+        self.assertEqual(document["streak_result"], "loss")
+
+        self.assertAlmostEqual(player["winRate"], 2 / 3)
+        self.assertEqual(player["recentWinCount"], 2)
+        self.assertEqual(player["maxWinStreak"], 2)
+        self.assertAlmostEqual(player["lifetimeAverageBet"], 30.0)
+        self.assertAlmostEqual(player["lifetimeBetVariance"], 200.0)
+        self.assertEqual(collection.bulk_write.call_count, 3)
+
+    def test_uploads_of_one_player_in_a_call_fold_in_order(self):
+        collection = FakeAggregateCollection()
+        players = [blackjack_player("win", [10]), blackjack_player("loss", [20])]
+        apply_player_aggregates("blackjack", players, collection=collection, window=20)
+
+        document = collection.documents["blackjack:player1"]
+        self.assertEqual(collection.bulk_write.call_count, 1)
+        self.assertEqual(document["recent_results"], ["win", "loss"])
+        self.assertEqual(document["streak_result"], "loss")
+        self.assertEqual(document["version"], 1)
+        self.assertEqual(players[0]["totalGames"], 1)
+        self.assertEqual(players[1]["totalGames"], 2)
+
+    def test_concurrent_update_is_retried(self):
+        collection = FakeAggregateCollection()
+        apply_player_aggregates("blackjack", [blackjack_player("win", [10])], collection=collection, window=20)
+
+        def concurrent_upload():
+            collection.before_write = None
+            apply_player_aggregates("blackjack", [blackjack_player("win", [10])], collection=collection, window=20)
+
+        collection.before_write = concurrent_upload
+        player = blackjack_player("loss", [10])
+        apply_player_aggregates("blackjack", [player], collection=collection, window=20)
+
+        document = collection.documents["blackjack:player1"]
+        self.assertEqual(document["games"], 3)
+        self.assertEqual(document["recent_results"], ["win", "win", "loss"])
+        self.assertEqual(document["streak_result"], "loss")
+        self.assertEqual(document["streak_length"], 1)
+        self.assertEqual(document["max_win_streak"], 2)
+        self.assertEqual(document["version"], 3)
+        self.assertEqual(player["totalGames"], 3)
+
+    def test_persistent_conflict_raises(self):
+        collection = FakeAggregateCollection()
+        collection.documents["blackjack:player1"] = {"_id": "blackjack:player1", "version": 1}
+        collection.find = MagicMock(return_value=[{"_id": "blackjack:player1", "version": 0}])
+        with self.assertRaises(RuntimeError):
+            apply_player_aggregates("blackjack", [blackjack_player("win", [10])], collection=collection,
+                                    window=20, max_attempts=2)
+        self.assertEqual(collection.bulk_write.call_count, 2)
+
+    def test_resent_history_is_not_counted_twice(self):
+        collection = FakeAggregateCollection()
+        history = [{"result": "win", "score_diff": 2, "timestamp": 100}, {"result": "loss", "score_diff": -1, "timestamp": 200}]
+        for games in (history[:1], history, history + [{"result": "win", "score_diff": 4, "timestamp": 300}]):
+            player = {"username": "p", "game_history": games}
+            apply_player_aggregates("chess", [player], collection=collection, window=20)
+
+        document = collection.documents["chess:p"]
+        self.assertEqual(document["games"], 3)
+        self.assertEqual(document["recent_results"], ["win", "loss", "win"])
+        self.assertEqual(document["last_game_timestamp"], 300)
+        self.assertEqual(player["totalGames"], 3)
+
+    def test_resent_payload_adds_nothing(self):
+        collection = FakeAggregateCollection()
+        eight_ball = {"username": "p", "game_history": [{"result": "win", "score_diff": 2, "timestamp": 100}],
+                      "game_data": [{}, {}], "earlyGamePots": 1, "lateGamePots": 2, "maxPottingStreak": 2}
+        blackjack = {"username": "p", "game_history": [{"result": "win", "score_diff": 2, "timestamp": 100}],
+                     "hands": [{"bet": 10, "hand_id": 1}, {"bet": 20, "hand_id": 2}]}
+        for _ in range(2):
+            apply_player_aggregates("8ball", [copy.deepcopy(eight_ball)], collection=collection, window=20)
+            apply_player_aggregates("blackjack", [copy.deepcopy(blackjack)], collection=collection, window=20)
+
+        document = collection.documents["8ball:p"]
+        self.assertEqual((document["games"], document["shots"], document["balls_potted"]), (1, 2, 3))
+        self.assertEqual(document["recent_potting_accuracy"], [0])
+        document = collection.documents["blackjack:p"]
+        self.assertEqual((document["games"], document["hands"], document["total_bet"]), (1, 2, 30))
+        self.assertEqual(document["last_hand_id"], 2)
+
+        # New hands are counted even without a new game
+        blackjack["hands"].append({"bet": 30, "hand_id": 3})
+        apply_player_aggregates("blackjack", [blackjack], collection=collection, window=20)
+        self.assertEqual((document["games"], document["hands"], document["total_bet"]), (1, 3, 60))
+
+    def test_windows_are_capped(self):
+        update, aggregate = merge_delta(
+            {"recent_results": ["loss"] * 3, "streak_result": "loss", "streak_length": 3},
+            build_delta("chess", {"username": "p", "game_history": [{"result": "win", "score_diff": 1}]}),
+            window=3
+        )
+        self.assertEqual(aggregate["recent_results"], ["loss", "loss", "win"])
+        self.assertEqual(update["$push"]["recent_results"], {"$each": ["win"], "$slice": -3})
+        self.assertEqual(update["$max"]["max_loss_streak"], 3)
+
+    def test_chess_openings_are_counted_per_field(self):
+        delta = build_delta("chess", {
+            "username": "p",
+            "game_history": [{"result": "win", "opening": "Sicilian"}, {"result": "loss", "opening": "Sicilian"}],
+        })
+        self.assertEqual(delta["inc"]["openings.Sicilian"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
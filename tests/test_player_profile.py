@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+from models.player_profile import PlayerProfile, SMOOTHED_TRENDS
+
+
+def make_profile(document=None):
+    db = MagicMock()
+    db.__getitem__.return_value.find_one.return_value = document
+    return PlayerProfile("p1", db, cache_enabled=False)
+
+
+def reference_ewma(series, alpha=0.3):
+    value = series[0]
+    for x in series:
+        value = alpha * x + (1 - alpha) * value
+    return value
+
+
+class TestSmoothedTrends(unittest.TestCase):
+    def setUp(self):
+        self.accuracies = [0.2, 0.9, 0.4, 0.6, 0.3, 0.8, 0.5, 0.7]
+        self.profile = make_profile()
+        for game, accuracy in enumerate(self.accuracies):
+            self.profile.update_after_game(accuracy, game % 3, 40.0 + game, 2, 1, game % 2 == 0)
+
+    def test_incremental_state_matches_full_recomputation(self):
+        simple = self.profile.current_smoothed_values()
+        ewma = self.profile.current_smoothed_values(method="ewma")
+
+        self.assertAlmostEqual(simple["accuracy_trend"], np.mean(self.accuracies[-5:]))
+        self.assertAlmostEqual(simple["foul_trend"], np.mean([game % 3 for game in range(8)][-5:]))
+        self.assertAlmostEqual(ewma["accuracy_trend"], reference_ewma(self.accuracies))
+        self.assertEqual(set(simple), set(SMOOTHED_TRENDS))
+
+    def test_series_end_with_the_current_values(self):
+        series = self.profile.get_smoothed_trends()
+        values = self.profile.current_smoothed_values()
+
+        self.assertEqual(len(series["accuracy_trend"]), len(self.accuracies) - 4)
+        self.assertAlmostEqual(series["accuracy_trend"][-1], values["accuracy_trend"])
+        self.assertAlmostEqual(self.profile.get_smoothed_trends(method="ewma")["accuracy_trend"][-1],
+                               self.profile.current_smoothed_values(method="ewma")["accuracy_trend"])
+
+    def test_state_is_saved_with_each_game(self):
+        update = self.profile.collection.update_one.call_args[0][1]
+        self.assertEqual(update["$set"]["smoothing"]["rolling_count"]["accuracy_trend"], 5)
+
+    def test_smoothing_does_not_read_history(self):
+        self.profile.data["accuracy_trend"] = None
+        self.assertAlmostEqual(self.profile.current_smoothed_values()["accuracy_trend"], np.mean(self.accuracies[-5:]))
+
+    def test_other_window_uses_recent_games(self):
+        self.assertAlmostEqual(self.profile.current_smoothed_values(window_size=2)["accuracy_trend"], 0.6)
+
+    def test_state_is_built_for_existing_profiles(self):
+        profile = make_profile({"player_id": "p1", "accuracy_trend": [0.5, 0.7, 0.9], "games_played": 3})
+
+        self.assertAlmostEqual(profile.current_smoothed_values()["accuracy_trend"], 0.7)
+        self.assertAlmostEqual(profile.current_smoothed_values(method="ewma")["accuracy_trend"], reference_ewma([0.5, 0.7, 0.9]))
+        self.assertEqual(profile.current_smoothed_values()["win_trend"], 0.0)
+
+
+class TestAnomalies(unittest.TestCase):
+    def test_streaming_detector_flags_outlier(self):
+        profile = make_profile()
+        for game in range(12):
+            profile.update_after_game(0.5 + 0.01 * (game % 3), 1, 40.0, 2, 1, True)
+        self.assertNotIn("anomalies", profile.data)
+
+        profile.update_after_game(0.99, 1, 40.0, 2, 1, True)
+
+        anomalies = profile.data["anomalies"]
+        self.assertEqual([(a["game_number"], a["metric"]) for a in anomalies], [(13, "accuracy_trend")])
+        self.assertGreater(anomalies[0]["z_score"], 3.0)
+        state = profile.data["anomaly_state"]["accuracy_trend"]
+        self.assertEqual(state["count"], 13)
+        self.assertAlmostEqual(state["mean"], np.mean(profile.data["accuracy_trend"]))
+        update = profile.collection.update_one.call_args[0][1]
+        self.assertEqual(update["$push"]["anomalies"]["$each"], anomalies)
+
+    def test_detect_anomalies_returns_indices(self):
+        profile = make_profile({"player_id": "p1", "accuracy_trend": [0.5] * 10 + [0.51] * 10 + [5.0]})
+
+        self.assertEqual(profile.detect_anomalies(threshold=3.0), [20])
+        self.assertEqual(make_profile().detect_anomalies(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
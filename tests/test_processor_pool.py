@@ -0,0 +1,33 @@
+import os
+import unittest
+from unittest.mock import patch
+from config import Config
+from utils import processor_pool
+
+
+def tag_with_pid(game_data):
+    return {"players": game_data["players"], "pid": os.getpid()}
+
+
+class TestProcessorPool(unittest.TestCase):
+    def tearDown(self):
+        processor_pool.shutdown_processor_pool()
+
+    @patch.object(Config, "PROCESSOR_POOL_WORKERS", 0)
+    def test_runs_inline_when_pool_disabled(self):
+        result = processor_pool.run_processor(tag_with_pid, {"players": ["p1"]})
+        self.assertEqual(result["pid"], os.getpid())
+        self.assertIsNone(processor_pool.get_executor())
+
+    @patch.object(Config, "PROCESSOR_POOL_START_METHOD", "fork")
+    @patch.object(Config, "PROCESSOR_POOL_WORKERS", 2)
+    def test_runs_in_worker_processes(self):
+        results = processor_pool.run_processors([
+            (tag_with_pid, {"players": ["p1"]}),
+            (tag_with_pid, {"players": ["p2"]}),
+        ])
+        self.assertEqual([r["players"] for r in results], [["p1"], ["p2"]])
+        self.assertTrue(all(r["pid"] != os.getpid() for r in results))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,277 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from pymongo.errors import BulkWriteError
+from utils.profile_cache import ProfileCache, merge_updates
+
+
+def make_collection(name="game_database.player_profiles"):
+    collection = MagicMock()
+    collection.full_name = name
+    return collection
+
+
+class TestProfileCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ProfileCache(max_entries=2, ttl=60, flush_interval=60)
+        self.collection = make_collection()
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_hits_and_misses(self):
+        self.assertIsNone(self.cache.get(self.collection, "p1"))
+        data = self.cache.put(self.collection, "p1", {"player_id": "p1"})
+
+        self.assertIs(self.cache.get(self.collection, "p1"), data)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+
+    def test_expired_entries_are_misses(self):
+        self.cache.put(self.collection, "p1", {"player_id": "p1"})
+        with patch("utils.profile_cache.time.monotonic", return_value=10 ** 9):
+            self.assertIsNone(self.cache.get(self.collection, "p1"))
+
+    def test_saves_are_coalesced_into_one_write(self):
+        data = {"player_id": "p1", "games_played": 1}
+        self.cache.mark_dirty(self.collection, "p1", data)
+        data["games_played"] = 2
+        self.cache.mark_dirty(self.collection, "p1", data)
+        self.cache.mark_dirty(self.collection, "p2", {"player_id": "p2"})
+
+        self.cache.flush()
+        self.cache.flush()
+
+        self.collection.bulk_write.assert_called_once()
+        requests = self.collection.bulk_write.call_args[0][0]
+        self.assertEqual([request._filter for request in requests], [{"player_id": "p1"}, {"player_id": "p2"}])
+        self.assertEqual(requests[0]._doc, {"$set": {"player_id": "p1", "games_played": 2}})
+        self.assertEqual(self.cache.stats()["dirty"], 0)
+
+    def test_writes_do_not_see_later_changes(self):
+        smoothing = {"ewma": 0.5}
+        data = {"player_id": "p1", "games_played": 1, "smoothing": smoothing}
+        self.cache.mark_dirty(self.collection, "p1", data, {"$inc": {"games_played": 1}, "$set": {"smoothing": smoothing}})
+        smoothing["ewma"] = 0.9
+        self.cache.mark_dirty(self.collection, "p2", data)
+        writes = self.cache._take(dict(self.cache._entries))
+        data["games_played"] = 2
+
+        self.cache._write(writes)
+
+        requests = self.collection.bulk_write.call_args[0][0]
+        self.assertEqual(requests[0]._doc["$set"], {"smoothing": {"ewma": 0.5}})
+        self.assertEqual(requests[1]._doc["$set"]["games_played"], 1)
+
+    def test_dirty_entry_is_kept_over_a_fresh_load(self):
+        dirty = self.cache.mark_dirty(self.collection, "p1", {"player_id": "p1", "games_played": 3})
+        self.assertIs(self.cache.put(self.collection, "p1", {"player_id": "p1", "games_played": 0}), dirty)
+
+    def test_evicted_dirty_entries_are_written(self):
+        self.cache.mark_dirty(self.collection, "p1", {"player_id": "p1"})
+        self.cache.put(self.collection, "p2", {"player_id": "p2"})
+        self.cache.put(self.collection, "p3", {"player_id": "p3"})
+
+        requests = self.collection.bulk_write.call_args[0][0]
+        self.assertEqual([request._filter for request in requests], [{"player_id": "p1"}])
+        self.assertIsNone(self.cache.get(self.collection, "p1"))
+
+    def test_invalidate(self):
+        other = make_collection("other.player_profiles")
+        self.cache.mark_dirty(self.collection, "p1", {"player_id": "p1"})
+        self.cache.put(other, "p1", {"player_id": "p1"})
+
+        self.cache.invalidate(self.collection, "p1")
+
+        self.collection.bulk_write.assert_called_once()
+        self.assertIsNone(self.cache.get(self.collection, "p1"))
+        self.assertIsNotNone(self.cache.get(other, "p1"))
+
+    def test_failed_write_stays_dirty(self):
+        self.collection.bulk_write.side_effect = Exception("down")
+        self.cache.mark_dirty(self.collection, "p1", {"player_id": "p1"})
+
+        self.cache.flush()
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["write_errors"], stats["dirty"]), (1, 1))
+        self.collection.bulk_write.side_effect = None
+
+
+    def test_failed_eviction_and_invalidate_keep_changes(self):
+        self.collection.bulk_write.side_effect = Exception("down")
+        self.cache.mark_dirty(self.collection, "p1", {"player_id": "p1"})
+        p2 = self.cache.mark_dirty(self.collection, "p2", {"player_id": "p2"})
+        self.cache.put(self.collection, "p3", {"player_id": "p3"})
+        self.cache.invalidate(self.collection, "p2")
+
+        self.assertEqual(self.cache.stats()["unsaved"], 2)
+        self.assertIs(self.cache.get(self.collection, "p2"), p2)
+
+        self.collection.bulk_write.side_effect = None
+        self.cache.flush()
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["unsaved"], stats["dirty"]), (0, 0))
+        requests = self.collection.bulk_write.call_args[0][0]
+        self.assertEqual(sorted(request._filter["player_id"] for request in requests), ["p1", "p2"])
+
+    def test_failed_write_on_expiry_keeps_entry(self):
+        self.collection.bulk_write.side_effect = Exception("down")
+        data = self.cache.mark_dirty(self.collection, "p1", {"player_id": "p1"})
+        with patch("utils.profile_cache.time.monotonic", return_value=10 ** 9):
+            self.assertIs(self.cache.get(self.collection, "p1"), data)
+        self.collection.bulk_write.side_effect = None
+
+    def test_writes_happen_outside_the_lock(self):
+        self.cache.put(self.collection, "p2", {"player_id": "p2"})
+        blocked = []
+
+        def bulk_write(requests, ordered):
+            reader = threading.Thread(target=self.cache.get, args=(self.collection, "p2"))
+            reader.start()
+            reader.join(timeout=1)
+            blocked.append(reader.is_alive())
+
+        self.collection.bulk_write.side_effect = bulk_write
+        self.cache.mark_dirty(self.collection, "p1", {"player_id": "p1"})
+        self.cache.flush()
+        self.collection.bulk_write.side_effect = None
+
+        self.assertEqual(blocked, [False])
+
+    def test_changes_made_during_a_failed_write_follow_it(self):
+        data = {"player_id": "p1"}
+
+        def failing_write(requests, ordered):
+            self.cache.mark_dirty(self.collection, "p1", data, {"$inc": {"games_played": 2}})
+            raise Exception("down")
+
+        self.cache.mark_dirty(self.collection, "p1", data, {"$inc": {"games_played": 1}, "$set": {"rank": 1}})
+        self.collection.bulk_write.side_effect = failing_write
+        self.cache.flush()
+        self.collection.bulk_write.side_effect = None
+        self.cache.flush()
+
+        update = self.collection.bulk_write.call_args[0][0][0]._doc
+        self.assertEqual(update, {"$inc": {"games_played": 3}, "$set": {"rank": 1}})
+        self.assertEqual(self.cache.stats()["dirty"], 0)
+
+    def test_partial_bulk_write_failure_keeps_only_failed_entries(self):
+        self.collection.bulk_write.side_effect = BulkWriteError({"writeErrors": [{"index": 1, "code": 2}]})
+        self.cache.mark_dirty(self.collection, "p1", {"player_id": "p1"}, {"$inc": {"games_played": 1}})
+        self.cache.mark_dirty(self.collection, "p2", {"player_id": "p2"}, {"$inc": {"games_played": 1}})
+        self.cache.flush()
+        self.collection.bulk_write.side_effect = None
+        self.cache.flush()
+
+        requests = self.collection.bulk_write.call_args[0][0]
+        self.assertEqual([request._filter for request in requests], [{"player_id": "p2"}])
+        stats = self.cache.stats()
+        self.assertEqual((stats["write_errors"], stats["profiles_written"], stats["dirty"]), (1, 2, 0))
+
+class TestPlayerProfileCaching(unittest.TestCase):
+    def test_instances_share_one_read_and_one_write(self):
+        from models.player_profile import PlayerProfile
+
+        cache = ProfileCache(flush_interval=60)
+        db = MagicMock()
+        collection = db.__getitem__.return_value
+        collection.full_name = "sim.player_profiles"
+        collection.find_one.return_value = None
+
+        with patch("models.player_profile.profile_cache", cache):
+            for _ in range(3):
+                PlayerProfile("p1", db).update_after_game(0.5, 1, 40.0, 3, 1, True)
+            cache.flush()
+        cache.close()
+
+        collection.find_one.assert_called_once()
+        collection.update_one.assert_not_called()
+        collection.bulk_write.assert_called_once()
+        update = collection.bulk_write.call_args[0][0][0]._doc
+        self.assertEqual(update["$inc"]["games_played"], 3)
+        self.assertEqual(update["$push"]["accuracy_trend"]["$each"], [0.5, 0.5, 0.5])
+        self.assertEqual(update["$max"], {"highest_consecutive_wins": 3})
+
+    @patch("models.player_profile.Config")
+    def test_trends_are_bounded_and_rolled_up(self, mock_config):
+        from models.player_profile import PlayerProfile
+
+        mock_config.PROFILE_CACHE_WRITE_BACK = False
+        mock_config.LEADERBOARD_ENABLED = False
+        mock_config.PROFILE_TREND_WINDOW = 2
+        mock_config.PROFILE_STREAK_WINDOW = 2
+        mock_config.PROFILE_ARCHIVE_BUCKET_SIZE = 10
+        mock_config.PROFILE_SMOOTHING_WINDOW = 2
+        mock_config.PROFILE_EWMA_ALPHA = 0.3
+        mock_config.ANOMALY_MIN_GAMES = 10
+        mock_config.ANOMALY_Z_THRESHOLD = 3.0
+        db = MagicMock()
+        collection = db.__getitem__.return_value
+        collection.find_one.return_value = None
+
+        profile = PlayerProfile("p1", db, cache_enabled=False)
+        for accuracy in (0.1, 0.2, 0.3, 0.4):
+            profile.update_after_game(accuracy, 0, 40.0, 1, 1, False)
+
+        self.assertEqual(profile.data["accuracy_trend"], [0.3, 0.4])
+        self.assertEqual([e["game_number"] for e in profile.data["performance_trend"]], [3, 4])
+        self.assertEqual(profile.data["trend_rollup"]["games"], 2)
+        self.assertAlmostEqual(profile.data["trend_rollup"]["accuracy_sum"], 0.3)
+
+        update = collection.update_one.call_args[0][1]
+        self.assertEqual(update["$push"]["accuracy_trend"], {"$each": [0.4], "$slice": -2})
+        self.assertEqual(update["$inc"]["trend_rollup.games"], 1)
+        self.assertNotIn("performance_trend", update.get("$set", {}))
+        archived = collection.bulk_write.call_args[0][0][0]
+        self.assertEqual(archived._filter, {"player_id": "p1", "bucket": 0, "last_game_number": {"$not": {"$gte": 2}}})
+        self.assertEqual(archived._doc["$max"], {"last_game_number": 2})
+
+    @patch("models.player_profile.Config")
+    def test_archived_entries_are_not_archived_again(self, mock_config):
+        from models.player_profile import PlayerProfile
+
+        mock_config.PROFILE_ARCHIVE_BUCKET_SIZE = 10
+        db = MagicMock()
+        db.__getitem__.return_value.find_one.return_value = None
+        archive = MagicMock()
+        archive.bulk_write.side_effect = [
+            BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "duplicate key"}]}),
+            None,
+        ]
+        profile = PlayerProfile("p1", db, cache_enabled=False)
+        profile.db = {mock_config.PROFILE_ARCHIVE_COLLECTION: archive}
+
+        profile._archive({"$inc": {}}, [{"game_number": 1}, {"game_number": 2}])
+
+        self.assertEqual(archive.bulk_write.call_count, 2)
+        retried = archive.bulk_write.call_args_list[1][0][0]
+        self.assertEqual([operation._doc["$max"]["last_game_number"] for operation in retried], [2])
+        self.assertTrue(archive.bulk_write.call_args_list[1][1]["ordered"])
+
+
+class TestMergeUpdates(unittest.TestCase):
+    def test_merges_operators(self):
+        first = {"$inc": {"games": 1, "streak": 1}, "$max": {"best": 2}, "$set": {"rate": 0.5},
+                 "$push": {"trend": {"$each": [1], "$slice": -3}}, "$setOnInsert": {"created_at": 1}}
+        second = {"$inc": {"games": 1}, "$max": {"best": 1}, "$set": {"rate": 0.4, "streak": 0},
+                  "$push": {"trend": {"$each": [2], "$slice": -3}}, "$setOnInsert": {"created_at": 2}}
+
+        merged = merge_updates(first, second)
+
+        self.assertEqual(merged, {
+            "$inc": {"games": 2}, "$max": {"best": 2}, "$set": {"rate": 0.4, "streak": 0},
+            "$push": {"trend": {"$each": [1, 2], "$slice": -3}}, "$setOnInsert": {"created_at": 1},
+        })
+
+    def test_folds_later_operators_into_set(self):
+        merged = merge_updates({"$set": {"streak": 0}}, {"$inc": {"streak": 1}})
+        self.assertEqual(merged, {"$set": {"streak": 1}})
+
+        with self.assertRaises(ValueError):
+            merge_updates({"$push": {"trend": {"$each": [1]}}}, {"$inc": {"trend": 1}})
+
+
+if __name__ == "__main__":
+    unittest.main()
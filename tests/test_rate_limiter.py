@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import MagicMock
+from utils.rate_limiter import InMemoryRateLimitBackend, MongoRateLimitBackend, RateLimiter
+
+
+class TestInMemoryRateLimitBackend(unittest.TestCase):
+    def test_blocks_requests_over_the_limit(self):
+        backend = InMemoryRateLimitBackend()
+        results = [backend.hit("client", 3, 60, now=10.0)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        backend = InMemoryRateLimitBackend()
+        for _ in range(10):
+            backend.hit("client", 10, 60, now=30.0)
+
+        # Halfway through the next window half of the previous count still applies
+        allowed = [backend.hit("client", 10, 60, now=90.0)[0] for _ in range(6)]
+        self.assertEqual(allowed, [True] * 5 + [False])
+
+    def test_idle_windows_are_forgotten(self):
+        backend = InMemoryRateLimitBackend()
+        for _ in range(3):
+            backend.hit("client", 3, 60, now=0.0)
+        self.assertTrue(backend.hit("client", 3, 60, now=500.0)[0])
+
+    def test_retry_after_when_blocked(self):
+        backend = InMemoryRateLimitBackend()
+        backend.hit("client", 1, 60, now=15.0)
+        allowed, remaining, retry_after = backend.hit("client", 1, 60, now=15.0)
+        self.assertFalse(allowed)
+        self.assertEqual(remaining, 0)
+        self.assertAlmostEqual(retry_after, 45.0)
+
+    def test_least_recently_used_keys_are_evicted(self):
+        backend = InMemoryRateLimitBackend(max_keys=2)
+        backend.hit("a", 5, 60, now=0.0)
+        backend.hit("b", 5, 60, now=0.0)
+        backend.hit("a", 5, 60, now=1.0)
+        backend.hit("c", 5, 60, now=2.0)
+
+        self.assertEqual(list(backend._windows), ["a", "c"])
+        self.assertEqual(backend.stats()["evictions"], 1)
+
+
+class TestMongoRateLimitBackend(unittest.TestCase):
+    def test_counts_with_atomic_increment(self):
+        database = MagicMock()
+        collection = database.__getitem__.return_value
+        collection.find_one_and_update.return_value = {"count": 3}
+        collection.find_one.return_value = None
+        backend = MongoRateLimitBackend(lambda: database)
+
+        allowed, remaining, _ = backend.hit("client", 3, 60, now=70.0)
+
+        self.assertTrue(allowed)
+        self.assertEqual(remaining, 0)
+        query, update = collection.find_one_and_update.call_args[0]
+        self.assertEqual(query, {"_id": "client:1"})
+        self.assertEqual(update["$inc"], {"count": 1})
+        collection.create_index.assert_called_once_with("expires_at", expireAfterSeconds=0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(
+            InMemoryRateLimitBackend(),
+            default_limit=5,
+            window=60,
+            route_limits={"/batch": 2},
+            api_key_limits={"premium": 50}
+        )
+
+    def test_route_and_api_key_limits(self):
+        self.assertEqual(self.limiter.limit_for("/single"), 5)
+        self.assertEqual(self.limiter.limit_for("/single", "premium"), 50)
+        self.assertEqual(self.limiter.limit_for("/batch", "premium"), 2)
+
+    def test_routes_and_clients_are_limited_separately(self):
+        for _ in range(2):
+            self.assertTrue(self.limiter.check("/batch", "1.2.3.4", now=0.0)[0])
+        self.assertFalse(self.limiter.check("/batch", "1.2.3.4", now=0.0)[0])
+        self.assertTrue(self.limiter.check("/single", "1.2.3.4", now=0.0)[0])
+        self.assertTrue(self.limiter.check("/batch", "5.6.7.8", now=0.0)[0])
+        self.assertEqual(self.limiter.stats()["rejected"], 1)
+
+    def test_shared_token_is_limited_per_ip(self):
+        for _ in range(2):
+            self.assertTrue(self.limiter.check("/batch", "1.2.3.4", "expected_token", now=0.0)[0])
+        self.assertFalse(self.limiter.check("/batch", "1.2.3.4", "expected_token", now=0.0)[0])
+        self.assertTrue(self.limiter.check("/batch", "5.6.7.8", "expected_token", now=0.0)[0])
+
+    def test_listed_api_key_is_limited_across_ips(self):
+        self.limiter.route_limits = {}
+        self.limiter.api_key_limits = {"premium": 2}
+        self.assertTrue(self.limiter.check("/single", "1.2.3.4", "premium", now=0.0)[0])
+        self.assertTrue(self.limiter.check("/single", "5.6.7.8", "premium", now=0.0)[0])
+        self.assertFalse(self.limiter.check("/single", "9.9.9.9", "premium", now=0.0)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from pydantic import BaseModel
+from utils.result_cache import ResultCache, payload_fingerprint
+
+
+class Payload(BaseModel):
+    game: str
+    data: dict
+
+
+class TestResultCache(unittest.TestCase):
+    def test_fingerprint_ignores_key_order(self):
+        first = Payload(game="chess", data={"players": [{"username": "a", "rating": 1200}], "round": 1})
+        second = Payload(game="chess", data={"round": 1, "players": [{"rating": 1200, "username": "a"}]})
+        changed = Payload(game="chess", data={"round": 2, "players": [{"rating": 1200, "username": "a"}]})
+
+        self.assertEqual(payload_fingerprint(first), payload_fingerprint(second))
+        self.assertNotEqual(payload_fingerprint(first)[0], payload_fingerprint(changed)[0])
+
+    def test_hits_misses_and_bytes_saved(self):
+        cache = ResultCache(max_entries=10, ttl=60)
+        self.assertIsNone(cache.get("abc", 100))
+        cache.put("abc", {"stored": 2})
+
+        self.assertEqual(cache.get("abc", 100), {"stored": 2})
+        self.assertEqual(cache.get("abc", 100), {"stored": 2})
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+        self.assertEqual(stats["bytes_saved"], 200)
+
+    def test_entries_expire(self):
+        cache = ResultCache(ttl=10)
+        with patch("utils.result_cache.time.monotonic", return_value=100.0):
+            cache.put("abc", {"stored": 1})
+        with patch("utils.result_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("abc"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", {"stored": 1})
+        cache.put("b", {"stored": 1})
+        cache.get("a")
+        cache.put("c", {"stored": 1})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+
+    def test_falls_back_to_persistent_collection(self):
+        collection = MagicMock()
+        collection.find_one.return_value = {"_id": "abc", "result": {"stored": 3}}
+        cache = ResultCache(get_collection=lambda: collection)
+
+        self.assertEqual(cache.get("abc"), {"stored": 3})
+        self.assertEqual(cache.get("abc"), {"stored": 3})
+        collection.find_one.assert_called_once()
+
+        cache.put("def", {"stored": 1})
+        collection.update_one.assert_called_once()
+        self.assertEqual(collection.update_one.call_args[0][0], {"_id": "def"})
+
+
+if __name__ == "__main__":
+    unittest.main()
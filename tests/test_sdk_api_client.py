@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import patch, MagicMock
 from sdk.api_client import APIClient
 from sdk.config import SDKConfig
 
@@ -34,3 +35,11 @@ def test_api_client_failure():
     api_client = APIClient("http://invalid_url")
     response = api_client.process_game_data("blackjack", game_data)
     assert response["error"] == "API request failed"
+
+
+# Test: API Client maps a non-JSON response to the error result
+def test_api_client_non_json_response():
+    response = MagicMock(status_code=200, content=b"<html>Bad Gateway</html>")
+    with patch("sdk.api_client.requests.post", return_value=response):
+        result = APIClient(SDKConfig.BASE_URL).process_game_data("blackjack", {"players": []})
+    assert result["error"] == "API request failed"
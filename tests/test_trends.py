@@ -0,0 +1,46 @@
+import unittest
+from utils.trends import least_squares_slope, linear_fill, recent_trend_pipeline, summarize_recent_games
+
+
+class TestTrends(unittest.TestCase):
+    def test_least_squares_slope(self):
+        self.assertAlmostEqual(least_squares_slope([1, 3, 5, 7]), 2.0)
+        self.assertAlmostEqual(least_squares_slope([0.5, 0.6, 0.4, 0.5]), -0.02)
+        self.assertEqual(least_squares_slope([4]), 0.0)
+        self.assertEqual(least_squares_slope([]), 0.0)
+
+    def test_slope_skips_missing_values(self):
+        self.assertAlmostEqual(least_squares_slope([None, 2, 4, None]), 2.0)
+
+    def test_linear_fill(self):
+        self.assertEqual(linear_fill([None, 1, None, None, 4, None]), [None, 1, 2.0, 3.0, 4, None])
+
+    def test_summarize_recent_games(self):
+        games = [
+            {"accuracy": 0.4, "fouls": 3, "win": False},
+            {"fouls": 2, "win": True},
+            {"accuracy": 0.6, "fouls": 1, "win": True},
+        ]
+
+        summary = summarize_recent_games(games)
+
+        self.assertEqual(summary["games"], 3)
+        self.assertEqual(summary["wins"], 2)
+        self.assertAlmostEqual(summary["accuracy_series"][1], 0.5)
+        self.assertAlmostEqual(summary["accuracy_slope"], 0.1)
+        self.assertAlmostEqual(summary["fouls_slope"], -1.0)
+        self.assertIsNone(summarize_recent_games([]))
+
+    def test_pipeline_selects_recent_window_before_filling(self):
+        pipeline = recent_trend_pipeline("p1", 5)
+
+        self.assertEqual([list(stage)[0] for stage in pipeline],
+                         ["$match", "$sort", "$limit", "$setWindowFields", "$group", "$project"])
+        self.assertEqual(pipeline[2]["$limit"], 5)
+        output = pipeline[3]["$setWindowFields"]["output"]
+        self.assertEqual(output["accuracy"], {"$linearFill": "$accuracy"})
+        self.assertIn("fouls_slope", pipeline[5]["$project"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+from pymongo.errors import BulkWriteError
+from utils.write_buffer import WriteBehindBuffer
+
+
+class TestWriteBehindBuffer(unittest.TestCase):
+    def setUp(self):
+        self.database = MagicMock()
+        self.collection = self.database.__getitem__.return_value
+        self.collection.bulk_write.side_effect = lambda ops, ordered: MagicMock(inserted_count=len(ops))
+
+    def test_flushes_when_size_threshold_reached(self):
+        buffer = WriteBehindBuffer(lambda: self.database, max_documents=3, max_age=60)
+        buffer.add("8ball_game_data", [{"n": 1}, {"n": 2}])
+        self.collection.bulk_write.assert_not_called()
+
+        buffer.add("8ball_game_data", {"n": 3})
+
+        self.collection.bulk_write.assert_called_once()
+        ops, kwargs = self.collection.bulk_write.call_args
+        self.assertEqual(len(ops[0]), 3)
+        self.assertFalse(kwargs["ordered"])
+        buffer.close()
+
+    def test_flushes_when_age_threshold_reached(self):
+        buffer = WriteBehindBuffer(lambda: self.database, max_documents=100, max_age=0.05)
+        buffer.add("chess_game_data", {"n": 1})
+
+        deadline = time.time() + 2
+        while not self.collection.bulk_write.called and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.collection.bulk_write.assert_called_once()
+        buffer.close()
+
+    def test_close_flushes_remaining_documents_and_records_latency(self):
+        buffer = WriteBehindBuffer(lambda: self.database, max_documents=100, max_age=60)
+        buffer.add("8ball_game_data", {"n": 1})
+        buffer.add("chess_game_data", {"n": 2})
+
+        buffer.close()
+
+        self.assertEqual(self.collection.bulk_write.call_count, 2)
+        stats = buffer.stats()
+        self.assertEqual(stats["flushes"], 2)
+        self.assertEqual(stats["documents_written"], 2)
+        self.assertEqual(stats["buffered_documents"], 0)
+        self.assertGreaterEqual(stats["max_flush_seconds"], stats["average_flush_seconds"])
+
+    def test_write_errors_are_counted(self):
+        self.collection.bulk_write.side_effect = Exception("unavailable")
+        buffer = WriteBehindBuffer(lambda: self.database, max_documents=1, max_age=60)
+
+        buffer.add("8ball_game_data", {"n": 1})
+
+        self.assertEqual(buffer.stats()["write_errors"], 1)
+        buffer.close()
+
+    def test_failed_flush_is_retried_before_documents_are_reported(self):
+        failures = [Exception("unavailable")]
+
+        def bulk_write(ops, ordered):
+            if failures:
+                raise failures.pop()
+            return MagicMock(inserted_count=len(ops))
+
+        self.collection.bulk_write.side_effect = bulk_write
+        written = []
+        buffer = WriteBehindBuffer(lambda: self.database, max_documents=100, max_age=60, max_retries=2)
+        buffer.add("8ball_game_data", [{"n": 1}, {"n": 2}], on_written=written.append)
+
+        buffer.flush()
+        self.assertEqual(written, [])
+        self.assertEqual(buffer.stats()["buffered_documents"], 2)
+
+        buffer.flush()
+        self.assertEqual(written, [[{"n": 1}, {"n": 2}]])
+        stats = buffer.stats()
+        self.assertEqual((stats["retries"], stats["documents_written"], stats["documents_dropped"]), (2, 2, 0))
+        buffer.close()
+
+    def test_rejected_and_exhausted_documents_are_dropped(self):
+        self.collection.bulk_write.side_effect = BulkWriteError({
+            "writeErrors": [{"index": 1, "code": 121, "errmsg": "Document failed validation"}],
+            "nInserted": 1,
+        })
+        written = []
+        buffer = WriteBehindBuffer(lambda: self.database, max_documents=100, max_age=60, max_retries=1)
+        buffer.add("8ball_game_data", [{"n": 1}, {"n": 2}], on_written=written.append)
+        buffer.flush()
+
+        self.assertEqual(written, [[{"n": 1}]])
+        self.assertEqual(buffer.stats()["documents_dropped"], 1)
+
+        self.collection.bulk_write.side_effect = Exception("unavailable")
+        buffer.add("8ball_game_data", {"n": 3}, on_written=written.append)
+        buffer.flush()
+        buffer.flush()
+
+        self.assertEqual(written, [[{"n": 1}]])
+        stats = buffer.stats()
+        self.assertEqual((stats["documents_dropped"], stats["buffered_documents"]), (2, 0))
+        buffer.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import datetime
+import json
+import numpy as np
+from bson import ObjectId
+from flask.json.provider import JSONProvider
+from config import Config
+from utils.logger import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_default(obj):
+    """Convert values the JSON encoders do not handle natively."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibJSONCodec:
+    """Codec backed by the standard library json module."""
+    name = "json"
+
+    def dumps(self, obj, sort_keys=False):
+        return json.dumps(obj, default=encode_default, sort_keys=sort_keys, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """Codec backed by orjson, which serializes NumPy arrays and datetimes natively."""
+    name = "orjson"
+    OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def dumps(self, obj, sort_keys=False):
+        option = (self.OPTIONS | orjson.OPT_SORT_KEYS) if sort_keys else self.OPTIONS
+        return orjson.dumps(obj, default=encode_default, option=option)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+def get_codec(name=None):
+    """Return the JSON codec selected by name, or by ``Config.JSON_CODEC``.
+
+    Args:
+        name (str): "json", "orjson" or "auto" (orjson when it is installed).
+    """
+    name = (name or Config.JSON_CODEC).lower()
+    if name == "json":
+        return StdlibJSONCodec()
+    if orjson is None:
+        if name == "orjson":
+            logger.warning("orjson is not installed, falling back to the json module.")
+        return StdlibJSONCodec()
+    return OrjsonCodec()
+
+
+codec = get_codec()
+
+
+def dumps(obj, sort_keys=False):
+    """Serialize an object to UTF-8 encoded JSON bytes with the configured codec."""
+    return codec.dumps(obj, sort_keys=sort_keys)
+
+
+def loads(data):
+    """Deserialize JSON from bytes or str with the configured codec."""
+    return codec.loads(data)
+
+
+class CodecJSONProvider(JSONProvider):
+    """Flask JSON provider that routes ``jsonify`` and ``request.get_json`` through the codec."""
+
+    def dumps(self, obj, **kwargs):
+        return codec.dumps(obj, sort_keys=kwargs.get("sort_keys", False)).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(codec.dumps(obj), mimetype="application/json")
+
+
+class SocketIOJSON:
+    """json-module-like adapter for Socket.IO, which passes json.dumps keyword arguments."""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return codec.dumps(obj).decode("utf-8")
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return codec.loads(s)
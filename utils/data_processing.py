@@ -1,6 +1,10 @@
+import functools
+from config import Config
+from utils.db_utils import get_database, get_collection_name
+from utils.write_buffer import get_write_buffer
 from utils.processors.eight_ball_processor import process_8ball_data
 from utils.processors.chess_processor import process_chess_data
-from utils.processors.blackjack_processor import process_blackjack_data
+from utils.processors.blackjack_processor import process_blackjack_data, process_blackjack_uploads, resuming_usernames
 
 def get_processor(game):
     """Get the appropriate data processor for the specified game.
@@ -18,3 +22,103 @@ def get_processor(game):
         # Add other games here, e.g., "chess": process_chess_data
     }
     return processors.get(game)
+
+
+def load_hand_stats_states(usernames, database=None):
+    """Load the hand statistics state stored with each player's latest blackjack upload.
+
+    Blackjack uploads still waiting in the write buffer are flushed first, so
+    the state read includes them.
+
+    Args:
+        usernames (list): The players to load.
+        database: The database to read, defaults to ``get_database()``.
+
+    Returns:
+        dict: Username -> stored state, for players that have one.
+    """
+    usernames = sorted(set(usernames))
+    if not usernames:
+        return {}
+    collection_name = get_collection_name("blackjack")
+    if Config.WRITE_BUFFER_ENABLED:
+        get_write_buffer().flush(collection_name)
+    database = database if database is not None else get_database()
+    pipeline = [
+        {"$match": {"username": {"$in": usernames}, "handStatsState": {"$type": "object"}}},
+        {"$sort": {"_id": -1}},
+        {"$group": {"_id": "$username", "state": {"$first": "$handStatsState"}}},
+    ]
+    return {doc["_id"]: doc["state"] for doc in database[collection_name].aggregate(pipeline)}
+
+
+def bind_server_state(processor, game_data, database=None):
+    """Bind the state a processor resumes from, loaded server-side instead of taken from the upload.
+
+    Only players that set ``resumeHandStats`` have their state loaded.
+
+    Returns:
+        callable: The processor, with ``previous_states`` bound for blackjack.
+            ``functools.partial`` objects pickle, so the result can still run
+            in the processor pool.
+    """
+    if processor is not process_blackjack_data:
+        return processor
+    return functools.partial(processor, previous_states=load_hand_stats_states(resuming_usernames(game_data), database))
+
+
+def bind_batch_server_state(tasks, database=None):
+    """Bind server-side state to a batch of ``(processor, game_data)`` tasks.
+
+    Blackjack uploads that resume the same player are chained into one task
+    that processes them in order, so each continues from the state the one
+    before it left rather than all starting from the stored state.
+
+    Returns:
+        tuple: The tasks to run, and for each input task the index of the task
+            holding its result along with its position in that task's result
+            list, or None when the task's result is the input's own.
+    """
+    resuming = {
+        index: set(resuming_usernames(game_data))
+        for index, (processor, game_data) in enumerate(tasks) if processor is process_blackjack_data
+    }
+    states = load_hand_stats_states(
+        [username for usernames in resuming.values() for username in usernames], database
+    )
+
+    # Group the uploads that share a resuming player, directly or through another upload
+    groups = {}
+    group_of_player = {}
+    for index, usernames in resuming.items():
+        members = [index]
+        for group in {group_of_player[username] for username in usernames if username in group_of_player}:
+            members.extend(groups.pop(group))
+        for member in members:
+            for username in resuming[member]:
+                group_of_player[username] = index
+        groups[index] = sorted(members)
+
+    planned = []
+    locations = [None] * len(tasks)
+    for index, (processor, game_data) in enumerate(tasks):
+        if index not in resuming:
+            locations[index] = (len(planned), None)
+            planned.append((processor, game_data))
+        elif index in groups and len(groups[index]) == 1:
+            locations[index] = (len(planned), None)
+            planned.append((functools.partial(processor, previous_states=states), game_data))
+    for members in groups.values():
+        if len(members) > 1:
+            for position, member in enumerate(members):
+                locations[member] = (len(planned), position)
+            planned.append((
+                functools.partial(process_blackjack_uploads, previous_states=states),
+                [tasks[member][1] for member in members],
+            ))
+    return planned, locations
+
+
+def unpack_batch_results(results, locations):
+    """Return each input task's result from the results of ``bind_batch_server_state``'s tasks."""
+    return [results[task] if position is None else results[task][position] for task, position in locations]
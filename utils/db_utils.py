@@ -1,18 +1,151 @@
+import atexit
+import base64
 import os
-from pymongo import MongoClient, ASCENDING, DESCENDING
+import threading
+from collections import Counter
+from pymongo import MongoClient, ASCENDING, DESCENDING, monitoring
 from pymongo.errors import DuplicateKeyError
+from bson import json_util
 from config import Config
 from utils.logger import logger
+from utils.write_buffer import get_write_buffer
+from utils.indexes import record_query_shape
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so pool usage can be reported."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def _count(self, event_name):
+        with self._lock:
+            self._counts[event_name] += 1
+
+    def snapshot(self):
+        """Return the event counts and the number of connections currently checked out."""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["in_use"] = counts.get("checked_out", 0) - counts.get("checked_in", 0)
+        counts["open"] = counts.get("created", 0) - counts.get("closed", 0)
+        return counts
+
+    def pool_created(self, event):
+        self._count("pools_created")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count("pools_cleared")
+
+    def pool_closed(self, event):
+        self._count("pools_closed")
+
+    def connection_created(self, event):
+        self._count("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count("closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count("checkout_failed")
+
+    def connection_checked_out(self, event):
+        self._count("checked_out")
+
+    def connection_checked_in(self, event):
+        self._count("checked_in")
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_pool_stats = PoolStatsListener()
+
 
 def get_db_connection():
-    """Establish a connection to the MongoDB database."""
-    connection_string = Config.MONGODB_URI
-    if not connection_string:
-        raise EnvironmentError("MONGODB_URI is not set in the configuration.")
-    return MongoClient(connection_string)
-
-def store_processed_data(data, game):
-    """Store the processed game data in the database, with additional analytics for 8-ball."""
+    """Return the process-wide MongoDB client, creating it on first use.
+
+    The client owns a connection pool sized by MONGO_MAX_POOL_SIZE and is shared
+    by every helper in this module. A client inherited across a fork is never
+    reused; the child process builds its own.
+    """
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            connection_string = Config.MONGODB_URI
+            if not connection_string:
+                raise EnvironmentError("MONGODB_URI is not set in the configuration.")
+            timeout_ms = Config.TIMEOUT * 1000
+            _client = MongoClient(
+                connection_string,
+                maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                connectTimeoutMS=timeout_ms,
+                serverSelectionTimeoutMS=timeout_ms,
+                socketTimeoutMS=timeout_ms,
+                waitQueueTimeoutMS=timeout_ms,
+                event_listeners=[_pool_stats],
+            )
+            _client_pid = os.getpid()
+            logger.info("Created MongoDB client with max pool size %d.", Config.MONGO_MAX_POOL_SIZE)
+        return _client
+
+
+def get_database():
+    """Return the application database from the shared client."""
+    return get_db_connection()[Config.DATABASE_NAME]
+
+
+def get_pool_stats():
+    """Return connection pool settings and event counts for the shared client."""
+    stats = _pool_stats.snapshot()
+    stats["max_pool_size"] = Config.MONGO_MAX_POOL_SIZE
+    stats["min_pool_size"] = Config.MONGO_MIN_POOL_SIZE
+    return stats
+
+
+def close_db_connection():
+    """Close the shared client owned by this process."""
+    global _client
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+            logger.info("Database connection closed.")
+        _client = None
+
+
+def _reset_after_fork():
+    # The parent's sockets must not be used by the child; drop the reference without closing it.
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(close_db_connection)
+
+
+def store_processed_data(data, game, on_written=None):
+    """Store the processed game data in the database, with additional analytics for 8-ball.
+
+    Args:
+        on_written (callable): Called with the list of documents once they are
+            written. With the write buffer enabled that happens later, from the
+            thread that flushes them, and only for documents that were written.
+    """
     try:
         client = get_db_connection()
         db = client[Config.DATABASE_NAME]
@@ -33,6 +166,11 @@ def store_processed_data(data, game):
                     doc.setdefault("foul_rate", 0.0)
                     doc.setdefault("ai_behavior_adjustments", {})
 
+        if Config.WRITE_BUFFER_ENABLED:
+            get_write_buffer().add(collection_name, data, on_written=on_written)
+            logger.info("Buffered data for collection: %s", collection_name)
+            return
+
         if isinstance(data, list):
             logger.info("Inserting multiple documents into collection: %s", collection_name)
             collection.insert_many(data)
@@ -44,21 +182,25 @@ def store_processed_data(data, game):
     except Exception as e:
         logger.exception("An error occurred while storing data in the database.")
         raise
-    finally:
-        client.close()
-        logger.info("Database connection closed.")
-        
+
+    if on_written is not None:
+        on_written(data if isinstance(data, list) else [data])
+
+def get_collection_name(game):
+    """Return the name of the collection holding a game's data."""
+    return f"{game}_game_data"
+
 def get_collection(game):
     """Get the collection for the specific game."""
-    client = get_db_connection()
-    db = client[Config.DATABASE_NAME]
-    collection_name = f"{game}_game_data"
-    return db[collection_name]
+    return get_database()[get_collection_name(game)]
 
 def get_all_documents(game):
-    """Retrieve all documents from a specific game's collection."""
-    collection = get_collection(game)
-    return list(collection.find())
+    """Retrieve all documents from a specific game's collection.
+
+    Loads the whole collection into memory; use ``iter_documents`` or
+    ``find_page`` for large collections.
+    """
+    return list(iter_documents(game))
 
 def get_document_by_id(game, doc_id):
     """Retrieve a document by its ID."""
@@ -67,8 +209,7 @@ def get_document_by_id(game, doc_id):
 
 def get_documents_by_field(game, field, value):
     """Retrieve documents based on a specific field and value."""
-    collection = get_collection(game)
-    return list(collection.find({field: value}))
+    return list(iter_documents(game, {field: value}))
 
 def update_document(game, doc_id, update_data):
     """Update a specific document by its ID."""
@@ -79,6 +220,7 @@ def update_document(game, doc_id, update_data):
 def update_documents_by_field(game, field, value, update_data):
     """Update multiple documents based on a field and value."""
     collection = get_collection(game)
+    record_query_shape(get_collection_name(game), {field: value})
     collection.update_many({field: value}, {"$set": update_data})
     logger.info("Documents with %s = %s updated.", field, value)
 
@@ -91,6 +233,7 @@ def delete_document(game, doc_id):
 def delete_documents_by_field(game, field, value):
     """Delete multiple documents based on a field and value."""
     collection = get_collection(game)
+    record_query_shape(get_collection_name(game), {field: value})
     collection.delete_many({field: value})
     logger.info("Documents with %s = %s deleted.", field, value)
 
@@ -101,8 +244,7 @@ def count_documents(game):
 
 def aggregate_documents(game, pipeline):
     """Perform aggregation operations on the collection."""
-    collection = get_collection(game)
-    return list(collection.aggregate(pipeline))
+    return list(iter_aggregate(game, pipeline))
 
 def create_index(game, field, direction=ASCENDING):
     """Create an index on a field in the collection."""
@@ -119,6 +261,7 @@ def drop_index(game, field):
 def check_for_duplicate(game, field, value):
     """Check if a document with a specific field value already exists (to avoid duplicates)."""
     collection = get_collection(game)
+    record_query_shape(get_collection_name(game), {field: value})
     return collection.count_documents({field: value}) > 0
 
 def insert_if_not_exists(game, data):
@@ -137,18 +280,140 @@ def insert_if_not_exists(game, data):
 def find_one_or_default(game, filter_query, default=None):
     """Retrieve one document matching the query, or return a default value if not found."""
     collection = get_collection(game)
+    record_query_shape(get_collection_name(game), filter_query)
     return collection.find_one(filter_query) or default
 
 def find_documents_with_projection(game, filter_query, projection):
     """Retrieve documents matching a query with a specified projection (fields to include)."""
-    collection = get_collection(game)
-    return list(collection.find(filter_query, projection))
+    return list(iter_documents(game, filter_query, projection))
 
 def sort_documents(game, field, ascending=True):
     """Sort the documents by a specific field."""
-    collection = get_collection(game)
     sort_order = ASCENDING if ascending else DESCENDING
-    return list(collection.find().sort(field, sort_order))
+    return list(iter_documents(game, sort=[(field, sort_order)]))
+
+def iter_documents(game, filter_query=None, projection=None, sort=None, batch_size=None):
+    """Yield documents matching a query without loading them all into memory.
+
+    Args:
+        game (str): The game whose collection is read.
+        filter_query (dict): The query filter.
+        projection (dict): Fields to include or exclude.
+        sort (list): (field, direction) pairs.
+        batch_size (int): Documents fetched per round trip, defaults to ``Config.DB_CURSOR_BATCH_SIZE``.
+
+    Yields:
+        dict: The matching documents, one at a time.
+    """
+    collection = get_collection(game)
+    record_query_shape(get_collection_name(game), filter_query, sort)
+    cursor = collection.find(filter_query or {}, projection, batch_size=batch_size or Config.DB_CURSOR_BATCH_SIZE)
+    if sort:
+        cursor = cursor.sort(sort)
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+def iter_aggregate(game, pipeline, batch_size=None):
+    """Yield the results of an aggregation pipeline without loading them all into memory.
+
+    Stages may spill to disk, so large sorts and groups do not hit the server's memory limit.
+    """
+    collection = get_collection(game)
+    cursor = collection.aggregate(
+        pipeline, allowDiskUse=True, batchSize=batch_size or Config.DB_CURSOR_BATCH_SIZE
+    )
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+def encode_page_token(values):
+    """Encode the sort key values of the last document of a page as an opaque token."""
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode("utf-8")).decode("ascii")
+
+def decode_page_token(token):
+    """Decode a token produced by ``encode_page_token``.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Invalid page token") from e
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid page token")
+    return values
+
+def _sort_value(document, path):
+    """Return the value at a dotted path, or None where MongoDB sorts the document as null."""
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+def _keyset_after(sort_field, last_value, last_id, ascending):
+    """Return the filter matching the documents sorted after ``(last_value, last_id)``."""
+    after = "$gt" if ascending else "$lt"
+    same_value = {sort_field: last_value, "_id": {after: last_id}}
+    if last_value is None:
+        # {field: None} matches null and missing values, which sort before every other value,
+        # and comparison operators do not match across types, so $gt null would match nothing
+        if ascending:
+            return {"$or": [{sort_field: {"$ne": None}}, same_value]}
+        return same_value
+    return {"$or": [{sort_field: {after: last_value}}, same_value]}
+
+def find_page(game, filter_query=None, projection=None, sort_field="_id", ascending=True, page_size=100, page_token=None):
+    """Return one page of documents using keyset pagination.
+
+    Documents are ordered by ``sort_field`` with ``_id`` as a tie-breaker, and
+    the next page starts after the last returned document. Unlike skip/limit
+    this costs the same for every page, and documents inserted meanwhile do
+    not shift the pages.
+
+    ``sort_field`` may be a dotted path. Documents where it is missing or null
+    sort first, as in MongoDB, and are paged like any other value. Values of
+    different non-null types are not compared, so the field should hold one type.
+
+    Args:
+        page_token (str): The ``next_page_token`` of the previous page, if any.
+
+    Returns:
+        tuple: (documents, next_page_token) where the token is None on the last page.
+
+    Raises:
+        ValueError: If the page token is malformed.
+    """
+    direction = ASCENDING if ascending else DESCENDING
+    query = dict(filter_query or {})
+    if page_token:
+        last_value, last_id = decode_page_token(page_token)
+        if sort_field == "_id":
+            keyset = {"_id": {"$gt" if ascending else "$lt": last_id}}
+        else:
+            keyset = _keyset_after(sort_field, last_value, last_id, ascending)
+        query = {"$and": [query, keyset]} if query else keyset
+
+    if projection and any(projection.values()):
+        # Inclusion projections must keep the sort key so the next token can be built
+        projection = {**projection, sort_field: 1}
+
+    sort = [(sort_field, direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+    collection = get_collection(game)
+    record_query_shape(get_collection_name(game), filter_query, sort)
+    documents = list(collection.find(query, projection, sort=sort, limit=page_size + 1))
+
+    next_page_token = None
+    if len(documents) > page_size:
+        documents = documents[:page_size]
+        last = documents[-1]
+        next_page_token = encode_page_token([_sort_value(last, sort_field), last["_id"]])
+    return documents, next_page_token
 
 def get_distinct_values(game, field):
     """Retrieve distinct values for a given field."""
@@ -171,7 +436,7 @@ def perform_transaction(operations):
         logger.error("Transaction aborted due to error: %s", e)
         raise
     finally:
-        client.close()
+        session.end_session()
 
 def create_user(game, username, password):
     """Create a new user (example use case)."""
@@ -0,0 +1,157 @@
+import threading
+from collections import Counter
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from utils.logger import logger
+
+# Game types whose results are stored in "{game}_game_data" collections
+GAME_TYPES = ("8ball", "eight_ball", "chess", "blackjack")
+
+GAME_DATA_INDEXES = [
+    {"keys": [("player_id", ASCENDING), ("game_time", DESCENDING)], "name": "player_id_game_time"},
+    {"keys": [("username", ASCENDING)], "name": "username"},
+]
+
+# Collection name -> declared indexes
+INDEX_REGISTRY = {
+    **{f"{game}_game_data": GAME_DATA_INDEXES for game in GAME_TYPES},
+    "player_profiles": [
+        {"keys": [("player_id", ASCENDING)], "name": "player_id", "unique": True},
+    ],
+    "player_profile_archive": [
+        {"keys": [("player_id", ASCENDING), ("bucket", ASCENDING)], "name": "player_id_bucket", "unique": True},
+    ],
+    "leaderboard": [
+        {"keys": [("metric", ASCENDING), ("player_id", ASCENDING)], "name": "metric_player_id", "unique": True},
+        {"keys": [("metric", ASCENDING), ("score", DESCENDING), ("player_id", ASCENDING)], "name": "metric_score"},
+    ],
+    "game_data": [
+        {"keys": [("player_id", ASCENDING), ("timestamp", DESCENDING)], "name": "player_id_timestamp"},
+        {"keys": [("game_type", ASCENDING), ("timestamp", DESCENDING)], "name": "game_type_timestamp"},
+    ],
+}
+
+
+def ensure_indexes(database, registry=None):
+    """Create every declared index that does not exist yet.
+
+    ``create_indexes`` is a no-op for indexes that already exist with the same
+    definition, so this is safe to run on every startup. A collection whose
+    existing index conflicts with the declaration is logged and skipped.
+
+    Args:
+        database: The pymongo database.
+        registry (dict): Collection name -> index declarations, defaults to INDEX_REGISTRY.
+
+    Returns:
+        dict: Collection name -> names of the ensured indexes.
+    """
+    ensured = {}
+    for collection_name, declarations in (registry or INDEX_REGISTRY).items():
+        models = [
+            IndexModel(declaration["keys"], **{k: v for k, v in declaration.items() if k != "keys"})
+            for declaration in declarations
+        ]
+        try:
+            ensured[collection_name] = database[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            logger.error("Could not ensure indexes on %s: %s", collection_name, e)
+    logger.info("Ensured indexes on %d collections.", len(ensured))
+    return ensured
+
+
+def ensure_indexes_in_background(get_database):
+    """Ensure the declared indexes on a daemon thread so startup does not wait for MongoDB."""
+    def run():
+        try:
+            ensure_indexes(get_database())
+        except Exception:
+            logger.exception("Failed to ensure indexes.")
+
+    thread = threading.Thread(target=run, name="ensure-indexes", daemon=True)
+    thread.start()
+    return thread
+
+
+_query_shapes = Counter()
+_query_shapes_lock = threading.Lock()
+
+
+def record_query_shape(collection_name, filter_query=None, sort=None):
+    """Count a query by collection, filtered fields and sort keys, ignoring the values."""
+    filter_fields = tuple(sorted(filter_query or {}))
+    sort_keys = tuple(sort or ())
+    with _query_shapes_lock:
+        _query_shapes[(collection_name, filter_fields, sort_keys)] += 1
+
+
+# Every collection has a unique index on _id
+ID_INDEX = {"keys": [("_id", ASCENDING)], "name": "_id_"}
+
+
+def index_covers(index_keys, filter_fields, sort_keys=()):
+    """Check whether an index serves equality filters on some fields followed by a sort.
+
+    The filtered fields must be the index's leading keys, in any order, and
+    the sort keys must follow them in the index order or its exact reverse.
+    A trailing ``_id`` sort key after filtered or sorted fields only breaks
+    ties between equal values, as in ``find_page``, so the index need not
+    contain it.
+    """
+    sort_keys = list(sort_keys)
+    if len(filter_fields) + len(sort_keys) > 1 and sort_keys and sort_keys[-1][0] == "_id":
+        sort_keys = sort_keys[:-1]
+    index_fields = [field for field, _ in index_keys]
+    prefix_length = len(filter_fields)
+    if set(index_fields[:prefix_length]) != set(filter_fields):
+        return False
+    if not sort_keys:
+        return True
+    following = index_keys[prefix_length:prefix_length + len(sort_keys)]
+    if [field for field, _ in following] != [field for field, _ in sort_keys]:
+        return False
+    directions = [(index_direction, sort_direction) for (_, index_direction), (_, sort_direction) in zip(following, sort_keys)]
+    return all(a == b for a, b in directions) or all(a == -b for a, b in directions)
+
+
+def uncovered_query_shapes(registry=None):
+    """Return recorded query shapes that no declared index serves.
+
+    Every collection is treated as having its ``_id`` index, so lookups by
+    _id and sorts on _id are covered. Queries with neither a filter nor a
+    sort are full reads by design and are not reported either.
+
+    Returns:
+        list: One dict per uncovered shape, most frequent first.
+    """
+    registry = registry or INDEX_REGISTRY
+    with _query_shapes_lock:
+        shapes = _query_shapes.most_common()
+
+    uncovered = []
+    for (collection_name, filter_fields, sort_keys), count in shapes:
+        if "_id" in filter_fields or not (filter_fields or sort_keys):
+            continue
+        declarations = registry.get(collection_name, []) + [ID_INDEX]
+        if any(index_covers(declaration["keys"], filter_fields, sort_keys) for declaration in declarations):
+            continue
+        uncovered.append({
+            "collection": collection_name,
+            "filter": list(filter_fields),
+            "sort": [list(key) for key in sort_keys],
+            "count": count,
+        })
+    return uncovered
+
+
+def missing_indexes(database, registry=None):
+    """Return declared indexes that do not exist in the database, by collection."""
+    missing = {}
+    for collection_name, declarations in (registry or INDEX_REGISTRY).items():
+        existing = database[collection_name].index_information()
+        existing_keys = [[tuple(key) for key in info["key"]] for info in existing.values()]
+        absent = [declaration["name"] for declaration in declarations
+                  if [tuple(key) for key in declaration["keys"]] not in existing_keys]
+        if absent:
+            missing[collection_name] = absent
+    return missing
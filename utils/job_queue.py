@@ -0,0 +1,117 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from queue import Queue, Full
+from config import Config
+from utils.logger import logger
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the work queue is at capacity."""
+    pass
+
+
+class JobQueue:
+    """
+    Bounded in-process work queue served by a pool of worker threads.
+    Keeps a registry of job states so callers can poll for completion.
+    """
+    def __init__(self, max_size=1000, workers=4, result_ttl=3600):
+        self.max_size = max_size
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self._queue = Queue(maxsize=max_size)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads if they are not already running."""
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run_worker, name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info("Started %d job queue workers.", self.workers)
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a callable for background execution.
+
+        Returns:
+            str: The id of the queued job.
+
+        Raises:
+            JobQueueFullError: If the queue is at capacity.
+        """
+        self.start()
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._prune_expired()
+            self._jobs[job_id] = job
+        try:
+            self._queue.put_nowait((job_id, func, args, kwargs))
+        except Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            logger.warning("Job queue is full (%d jobs), rejecting submission.", self.max_size)
+            raise JobQueueFullError("Job queue is full")
+        logger.debug("Queued job %s.", job_id)
+        return job_id
+
+    def get(self, job_id):
+        """Return a snapshot of a job's state, or None if it is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def qsize(self):
+        """Return the number of jobs waiting to be picked up by a worker."""
+        return self._queue.qsize()
+
+    def _run_worker(self):
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            self._update(job_id, status="running", started_at=time.time())
+            try:
+                result = func(*args, **kwargs)
+                self._update(job_id, status="succeeded", result=result, finished_at=time.time())
+                logger.info("Job %s succeeded.", job_id)
+            except Exception as e:
+                logger.exception("Job %s failed.", job_id)
+                self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+            finally:
+                self._queue.task_done()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _prune_expired(self):
+        """Drop finished jobs older than the result TTL, oldest first."""
+        cutoff = time.time() - self.result_ttl
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job["finished_at"] is None or job["finished_at"] > cutoff:
+                break
+            self._jobs.popitem(last=False)
+
+
+job_queue = JobQueue(
+    max_size=Config.JOB_QUEUE_MAX_SIZE,
+    workers=Config.JOB_WORKERS,
+    result_ttl=Config.JOB_RESULT_TTL
+)
@@ -0,0 +1,250 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from config import Config
+from utils.db_utils import get_database
+from utils.logger import logger
+
+# Metric -> (source collection, player id field) used to backfill the leaderboard
+LEADERBOARD_SOURCES = {
+    "win_rate": ("player_profiles", "player_id"),
+    "rating": ("chess_game_data", "username"),
+    "highest_consecutive_wins": ("player_profiles", "player_id"),
+}
+LEADERBOARD_METRICS = tuple(LEADERBOARD_SOURCES)
+LEADERBOARD_COLLECTION = "leaderboard"
+
+
+class TopKTable:
+    """
+    The best ``size`` scores of one metric, kept in rank order in memory.
+    Entries are ``(-score, player_id)`` tuples, so ties rank by player_id.
+    ``floor`` is the best entry known to be outside the table. When a tracked
+    player drops below it the table can no longer tell who moved up, so it
+    is marked stale and reloaded on the next read.
+    ``loaded_at`` is the monotonic time of the last load.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.entries = []
+        self.scores = {}
+        self.floor = None
+        self.stale = True
+        self.loaded_at = None
+
+    def load(self, rows):
+        """Replace the table with (player_id, score) rows ranked best first, at most size + 1 of them."""
+        self.entries = [(-score, player_id) for player_id, score in rows[:self.size]]
+        self.scores = dict(rows[:self.size])
+        self.floor = (-rows[self.size][1], rows[self.size][0]) if len(rows) > self.size else None
+        self.stale = False
+        self.loaded_at = time.monotonic()
+
+    def update(self, player_id, score):
+        """Fold a player's new score into the table."""
+        if self.stale:
+            return
+        key = (-score, player_id)
+        previous = self.scores.pop(player_id, None)
+        if previous is not None:
+            self.entries.remove((-previous, player_id))
+            if self.floor is not None and key > self.floor:
+                self.stale = True
+                return
+        elif len(self.entries) >= self.size:
+            if key > self.entries[-1]:
+                self.floor = key if self.floor is None else min(self.floor, key)
+                return
+            evicted = self.entries.pop()
+            del self.scores[evicted[1]]
+            self.floor = evicted if self.floor is None else min(self.floor, evicted)
+        bisect.insort(self.entries, key)
+        self.scores[player_id] = score
+
+    def rank(self, player_id):
+        """Return the 1-based rank of a tracked player, or None if the player is not in the table."""
+        score = self.scores.get(player_id)
+        if score is None:
+            return None
+        return bisect.bisect_left(self.entries, (-score, player_id)) + 1
+
+
+class Leaderboard:
+    """
+    Materialized leaderboards for LEADERBOARD_METRICS.
+    Each player's latest score per metric is stored in the leaderboard
+    collection, and the top ``size`` of every metric is kept in memory and
+    updated as scores are recorded, so reading a table does not touch
+    MongoDB. Scores recorded by other processes only reach a table when it
+    is reloaded, at most ``reload_interval`` seconds after its last load.
+    Ranks outside the tables are counted with the (metric, score, player_id) index.
+    """
+    def __init__(self, get_database, size=100, collection_name=LEADERBOARD_COLLECTION, reload_interval=30.0):
+        self.get_database = get_database
+        self.size = size
+        self.reload_interval = reload_interval
+        self.collection_name = collection_name
+        self.tables = {metric: TopKTable(size) for metric in LEADERBOARD_METRICS}
+        self._lock = threading.Lock()
+        self._stats = {"reloads": 0, "memory_ranks": 0, "counted_ranks": 0}
+
+    def _collection(self):
+        return self.get_database()[self.collection_name]
+
+    def record(self, player_id, scores):
+        """Store a player's latest scores and fold them into the top-K tables.
+
+        Args:
+            player_id (str): The player's id.
+            scores (dict): Metric -> score; unknown metrics and None values are ignored.
+        """
+        self.record_many([(player_id, scores)])
+
+    def record_many(self, entries):
+        """Store the latest scores of several players with one bulk write.
+
+        Args:
+            entries (list): (player_id, scores) pairs as taken by ``record``.
+        """
+        updates = [
+            (player_id, metric, score)
+            for player_id, scores in entries
+            for metric, score in scores.items()
+            if metric in self.tables and score is not None
+        ]
+        if not updates:
+            return
+        now = datetime.now(timezone.utc)
+        self._collection().bulk_write([
+            UpdateOne(
+                {"metric": metric, "player_id": player_id},
+                {"$set": {"score": score, "updated_at": now}},
+                upsert=True,
+            )
+            for player_id, metric, score in updates
+        ], ordered=False)
+        with self._lock:
+            for player_id, metric, score in updates:
+                self.tables[metric].update(player_id, score)
+
+    def record_processed(self, game_type, processed_data):
+        """Record the scores that processed game documents carry, e.g. chess ratings."""
+        documents = processed_data if isinstance(processed_data, list) else [processed_data]
+        collection_name = f"{game_type}_game_data"
+        entries = []
+        for metric, (source, id_field) in LEADERBOARD_SOURCES.items():
+            if source != collection_name:
+                continue
+            entries.extend(
+                (document[id_field], {metric: document.get(metric)})
+                for document in documents
+                if isinstance(document, dict) and document.get(id_field) is not None
+            )
+        self.record_many(entries)
+
+    def _table(self, metric):
+        # Called with the lock held
+        table = self.tables[metric]
+        if table.stale or time.monotonic() - table.loaded_at >= self.reload_interval:
+            cursor = self._collection().find(
+                {"metric": metric}, {"_id": 0, "player_id": 1, "score": 1}
+            ).sort([("score", -1), ("player_id", 1)]).limit(self.size + 1)
+            table.load([(doc["player_id"], doc["score"]) for doc in cursor])
+            self._stats["reloads"] += 1
+            logger.info("Reloaded %s leaderboard with %d players.", metric, len(table.entries))
+        return table
+
+    def top(self, metric, limit=None):
+        """Return the best players for a metric.
+
+        Args:
+            metric (str): One of LEADERBOARD_METRICS.
+            limit (int): Number of entries, at most the table size.
+
+        Returns:
+            list: Dicts with rank, player_id and score, best first.
+        """
+        with self._lock:
+            entries = self._table(metric).entries[:limit or self.size]
+        return [
+            {"rank": rank, "player_id": player_id, "score": -negated_score}
+            for rank, (negated_score, player_id) in enumerate(entries, start=1)
+        ]
+
+    def rank(self, metric, player_id):
+        """Return a player's rank for a metric.
+
+        Returns:
+            dict: rank, player_id and score, or None if the player has no score for the metric.
+        """
+        with self._lock:
+            table = self._table(metric)
+            rank = table.rank(player_id)
+            if rank is not None:
+                self._stats["memory_ranks"] += 1
+                return {"rank": rank, "player_id": player_id, "score": table.scores[player_id]}
+
+        collection = self._collection()
+        doc = collection.find_one({"metric": metric, "player_id": player_id})
+        if not doc:
+            return None
+        score = doc["score"]
+        ahead = collection.count_documents({
+            "metric": metric,
+            "$or": [{"score": {"$gt": score}}, {"score": score, "player_id": {"$lt": player_id}}],
+        })
+        with self._lock:
+            self._stats["counted_ranks"] += 1
+        return {"rank": ahead + 1, "player_id": player_id, "score": score}
+
+    def rebuild(self, batch_size=None):
+        """Backfill the leaderboard collection from LEADERBOARD_SOURCES.
+
+        Returns:
+            int: The number of scores written.
+        """
+        database = self.get_database()
+        batch_size = batch_size or Config.DB_CURSOR_BATCH_SIZE
+        written = 0
+        for metric, (source, id_field) in LEADERBOARD_SOURCES.items():
+            # Latest score per player; per-game collections hold one document per upload
+            pipeline = [
+                {"$match": {metric: {"$type": "number"}, id_field: {"$exists": True}}},
+                {"$sort": {"_id": 1}},
+                {"$group": {"_id": f"${id_field}", "score": {"$last": f"${metric}"}}},
+            ]
+            requests = []
+            for doc in database[source].aggregate(pipeline, allowDiskUse=True, batchSize=batch_size):
+                requests.append(UpdateOne(
+                    {"metric": metric, "player_id": doc["_id"]},
+                    {"$set": {"score": doc["score"]}},
+                    upsert=True,
+                ))
+                if len(requests) >= batch_size:
+                    database[self.collection_name].bulk_write(requests, ordered=False)
+                    written += len(requests)
+                    requests = []
+            if requests:
+                database[self.collection_name].bulk_write(requests, ordered=False)
+                written += len(requests)
+        with self._lock:
+            for table in self.tables.values():
+                table.stale = True
+        logger.info("Rebuilt leaderboard with %d scores.", written)
+        return written
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "tables": {metric: len(table.entries) for metric, table in self.tables.items()},
+            }
+
+
+leaderboard = Leaderboard(
+    get_database,
+    size=Config.LEADERBOARD_SIZE,
+    reload_interval=Config.LEADERBOARD_RELOAD_INTERVAL,
+)
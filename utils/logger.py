@@ -1,6 +1,11 @@
+import atexit
+import gzip
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import shutil
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from config import Config
 
 # Adjust log level and file path based on the configuration
@@ -11,6 +16,85 @@ LOG_DIR = "logs"
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records are dropped and counted when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Formatting is left to the listener thread; log_payload renders payloads before they get here
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class FormattingQueueListener(QueueListener):
+    """QueueListener that merges each record's message with its arguments once, for all its handlers."""
+
+    def prepare(self, record):
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+        except Exception:
+            # Left unmerged, so the handlers report the error through handleError
+            pass
+        return record
+
+
+_queue_handlers = []
+
+
+def create_queue_handler(handlers, max_size=None):
+    """Route records through a bounded queue to handlers running on a background thread.
+
+    The calling thread only enqueues the record. Merging the message with its
+    arguments, formatting and all I/O happen in a listener thread, which is
+    stopped (and drained) at exit. Arguments are therefore rendered after the
+    call returns and show any later changes to mutable values; pass payloads
+    through ``log_payload``, which renders them before they are queued.
+
+    Args:
+        handlers (list): The handlers that should receive the records.
+        max_size (int): Queue capacity, defaults to ``Config.LOG_QUEUE_MAX_SIZE``.
+
+    Returns:
+        DroppingQueueHandler: The handler to attach to a logger.
+    """
+    log_queue = queue.Queue(maxsize=max_size or Config.LOG_QUEUE_MAX_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    listener = FormattingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    _queue_handlers.append(queue_handler)
+    return queue_handler
+
+
+def get_dropped_log_records():
+    """Return how many log records were dropped because a log queue was full."""
+    return sum(handler.dropped for handler in _queue_handlers)
+
+
+def gzip_namer(name):
+    """Name rotated log files with a .gz suffix."""
+    return name + ".gz"
+
+
+def gzip_rotator(source, dest):
+    """Compress a rotated log file and remove the uncompressed copy."""
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
 # File-based logging setup
 file_handler = RotatingFileHandler(
     Config.LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3
@@ -19,6 +103,9 @@ file_handler.setLevel(LOG_LEVEL)
 file_handler.setFormatter(
     logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
 )
+if Config.LOG_COMPRESS_ROTATED:
+    file_handler.namer = gzip_namer
+    file_handler.rotator = gzip_rotator
 
 # Console logging setup
 console_handler = logging.StreamHandler()
@@ -27,8 +114,8 @@ console_handler.setFormatter(
     logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
 )
 
-# Logger configuration
-logging.basicConfig(level=LOG_LEVEL, handlers=[file_handler, console_handler])
+# Logger configuration: the file and console handlers run behind a queue
+logging.basicConfig(level=LOG_LEVEL, handlers=[create_queue_handler([file_handler, console_handler])])
 logger = logging.getLogger("AI-Agent-Service")
 
 # Function to add contextual logging
@@ -60,6 +147,67 @@ def verbose(self, message, *args, **kwargs):
 
 logging.Logger.verbose = verbose
 
+# Payload logging: sampled, truncated and only formatted when the level is enabled
+import random
+import reprlib
+
+_payload_repr = reprlib.Repr()
+_payload_repr.maxlevel = 4
+_payload_repr.maxdict = 20
+_payload_repr.maxlist = 20
+_payload_repr.maxstring = 200
+_payload_repr.maxother = 200
+
+
+def render_payload(payload, max_length):
+    """Render a payload as text, truncated to ``max_length`` bytes for bytes
+    payloads and characters otherwise.
+
+    The payload may be a value or a zero-argument callable producing it.
+    Dicts and lists are rendered with reprlib, which bounds the work by
+    nesting depth and item count rather than size.
+    """
+    payload = payload() if callable(payload) else payload
+    if isinstance(payload, (bytes, bytearray)):
+        size = len(payload)
+        if size > max_length:
+            text = bytes(payload[:max_length]).decode("utf-8", errors="replace")
+            return f"{text}... [truncated, {size} bytes]"
+        return bytes(payload).decode("utf-8", errors="replace")
+    text = payload if isinstance(payload, str) else _payload_repr.repr(payload)
+    if len(text) > max_length:
+        return f"{text[:max_length]}... [truncated, {len(text)} characters]"
+    return text
+
+
+def log_payload(message, *args, payload, level=logging.DEBUG, log=None):
+    """Log a message whose last ``%s`` is a payload-sized value.
+
+    Nothing is formatted when ``level`` is disabled. Otherwise the message is
+    logged, but the payload is only included for a ``LOG_PAYLOAD_SAMPLE_RATE``
+    fraction of records and is truncated to ``LOG_PAYLOAD_MAX_BYTES`` (bytes
+    for binary payloads, characters otherwise).
+
+    A sampled payload is rendered here, on the calling thread, so callables
+    that need the request context work and later changes to the payload do
+    not show up in the record. Only the rendered text is queued.
+
+    Args:
+        message (str): Format string; its last placeholder receives the payload.
+        payload: The value to log, or a zero-argument callable returning it.
+        level (int): Logging level of the record.
+        log (logging.Logger): Logger to use, defaults to the application logger.
+    """
+    log = log or logger
+    if not log.isEnabledFor(level):
+        return
+    if random.random() < Config.LOG_PAYLOAD_SAMPLE_RATE:
+        payload = render_payload(payload, Config.LOG_PAYLOAD_MAX_BYTES)
+    else:
+        payload = "[payload not sampled]"
+    log.log(level, message, *args, payload, stacklevel=2)
+
+
 # Structured logging for external systems
 try:
     import json
@@ -1,6 +1,8 @@
+import logging
 import time
 from flask import request, jsonify
-from utils.logger import logger
+from utils.logger import logger, log_payload
+from utils.request_context import get_request_json, get_json_decode_count
 
 def logging_middleware(app):
     """Logging middleware to log requests and responses."""
@@ -8,14 +10,20 @@ def logging_middleware(app):
     @app.before_request
     def before_request_logging():
         """Log incoming request details."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         logger.debug("Incoming request: %s %s", request.method, request.url)
-        logger.debug("Request headers: %s", dict(request.headers))
+        log_payload("Request headers: %s", payload=lambda: dict(request.headers))
         if request.is_json:
-            logger.debug("Request JSON body: %s", request.get_json())
+            log_payload("Request JSON body: %s", payload=get_request_json)
 
     @app.after_request
     def after_request_logging(response):
         """Log outgoing response details."""
         logger.debug("Outgoing response status: %s", response.status)
-        logger.debug("Outgoing response data: %s", response.get_data(as_text=True))
+        if not response.is_streamed:
+            log_payload("Outgoing response data: %s", payload=response.get_data)
+        # Diagnostic header, kept out of production responses
+        if app.debug:
+            response.headers["X-Body-Decode-Count"] = str(get_json_decode_count())
         return response
@@ -1,34 +1,31 @@
-from flask import request, jsonify
-from time import time
+from flask import request, jsonify, g
 from utils.logger import logger
+from utils.rate_limiter import rate_limiter
 
-# Simple in-memory store for rate limiting (could be replaced with Redis or similar)
-request_timestamps = {}
-
-def rate_limit_middleware(app):
-    """Rate limiting middleware to limit requests per minute."""
-    
-    RATE_LIMIT = 100  # Max 100 requests per minute
-    TIME_WINDOW = 60  # Time window in seconds (1 minute)
+def rate_limit_middleware(app, limiter=rate_limiter):
+    """Rate limiting middleware using a sliding-window counter per client and route."""
     
     @app.before_request
     def limit_requests():
-        """Limit requests to a specific rate."""
-        user_ip = request.remote_addr
-        current_time = time()
-        
-        # Initialize request history for the user
-        if user_ip not in request_timestamps:
-            request_timestamps[user_ip] = []
+        """Limit requests to the configured rate."""
+        route = request.url_rule.rule if request.url_rule else request.path
+        api_key = request.headers.get("Authorization")
+        allowed, limit, remaining, retry_after = limiter.check(route, request.remote_addr, api_key)
+        g.rate_limit = (limit, remaining)
         
-        # Clean up timestamps that are older than the time window
-        request_timestamps[user_ip] = [t for t in request_timestamps[user_ip] if current_time - t < TIME_WINDOW]
-        
-        # If user has exceeded the rate limit, block the request
-        if len(request_timestamps[user_ip]) >= RATE_LIMIT:
-            logger.warning("Rate limit exceeded for IP: %s", user_ip)
-            return jsonify({"error": "Rate limit exceeded, try again later."}), 429
-        
-        # Record the current request time
-        request_timestamps[user_ip].append(current_time)
-        logger.debug("Request from IP: %s within rate limit.", user_ip)
+        # If the client has exceeded the rate limit, block the request
+        if not allowed:
+            logger.warning("Rate limit exceeded for %s on %s", request.remote_addr, route)
+            response = jsonify({"error": "Rate limit exceeded, try again later."})
+            response.headers["Retry-After"] = str(retry_after)
+            return response, 429
+        logger.debug("Request from IP: %s within rate limit.", request.remote_addr)
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        """Report the client's limit and remaining requests."""
+        if "rate_limit" in g:
+            limit, remaining = g.rate_limit
+            response.headers["X-RateLimit-Limit"] = str(limit)
+            response.headers["X-RateLimit-Remaining"] = str(remaining)
+        return response
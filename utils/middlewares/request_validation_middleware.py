@@ -1,7 +1,10 @@
 from flask import request, jsonify
 from pydantic import ValidationError
-from models import GamePayload
 from utils.logger import logger
+from utils.request_context import get_game_payload
+
+# Routes that accept a multi-item body and validate every item themselves
+SELF_VALIDATING_PATHS = {"/api/v1/process-game-data/batch"}
 
 def request_validation_middleware(app):
     """Request validation middleware to validate incoming requests."""
@@ -9,15 +12,19 @@ def request_validation_middleware(app):
     @app.before_request
     def validate_request():
         """Validate incoming JSON payload using Pydantic models."""
+        if request.method not in ("POST", "PUT", "PATCH") or request.path in SELF_VALIDATING_PATHS:
+            return None
         if request.is_json:
             try:
-                request_json = request.get_json()
-                # Validate request payload using Pydantic model
-                payload = GamePayload(**request_json)
+                # Validate request payload using Pydantic model; handlers reuse the result
+                get_game_payload()
                 logger.debug("Request payload validated successfully.")
             except ValidationError as e:
                 logger.warning("Invalid request payload: %s", e.json())
                 return jsonify({"error": "Invalid payload", "details": e.errors()}), 400
+            except TypeError:
+                logger.warning("Request body is not a JSON object.")
+                return jsonify({"error": "Invalid or missing JSON payload"}), 400
         else:
             logger.warning("Request body is not JSON.")
             return jsonify({"error": "Invalid or missing JSON payload"}), 400
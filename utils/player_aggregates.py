@@ -0,0 +1,360 @@
+from collections import defaultdict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config import Config
+from utils.db_utils import get_database
+from utils.logger import logger
+from utils.profile_cache import merge_updates
+
+# Results kept in the recent-games window; recent* stats use the last RECENT_GAMES of them
+RECENT_GAMES = 5
+
+
+def aggregate_id(game, username):
+    """Return the _id of a player's aggregate document for a game."""
+    return f"{game}:{username}"
+
+
+def _field_name(key):
+    # MongoDB field names cannot contain dots or start with a dollar sign
+    return str(key).replace(".", "_").replace("$", "_")
+
+
+def _timestamp(game):
+    timestamp = game.get("timestamp")
+    return timestamp if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool) else None
+
+
+def new_games(player, since=None):
+    """Return the games of this upload that the aggregate has not counted yet.
+
+    Games come from ``game_history`` or, without one, the player's ``result``.
+    Clients may resend their whole history, so history entries with a
+    ``timestamp`` at or before ``since``, the latest timestamp already
+    counted, are skipped. Entries without a timestamp cannot be matched and
+    are always counted.
+    """
+    game_history = [game for game in player.get("game_history", []) if isinstance(game, dict)]
+    if game_history:
+        if since is None:
+            return game_history
+        return [game for game in game_history if _timestamp(game) is None or _timestamp(game) > since]
+    if player.get("result"):
+        return [{"result": player["result"], "score_diff": player.get("score_diff", 0)}]
+    return []
+
+
+def history_delta(games):
+    """Return the increments and window entries contributed by the new games."""
+    results = [game.get("result") for game in games]
+    timestamps = [timestamp for timestamp in map(_timestamp, games) if timestamp is not None]
+    return {
+        "inc": {
+            "games": len(games),
+            "wins": results.count("win"),
+            "losses": results.count("loss"),
+            "ties": results.count("tie"),
+            "score_diff_total": sum(game.get("score_diff", 0) for game in games),
+        },
+        "max": {"last_game_timestamp": max(timestamps)} if timestamps else {},
+        "push": {
+            "recent_results": results,
+            "recent_score_diffs": [game.get("score_diff", 0) for game in games],
+        },
+    }
+
+
+def eight_ball_delta(player, delta, games, previous):
+    """Add the totals of the new 8-ball game, taken from the processed player.
+
+    The turns describe the upload's game, so they are only counted when the
+    upload has a game the aggregate has not counted yet.
+    """
+    if not games:
+        return
+    shots = len(player.get("game_data", []))
+    delta["inc"].update({
+        "shots": shots,
+        "balls_potted": player.get("earlyGamePots", 0) + player.get("lateGamePots", 0),
+        "wall_hits": round(player.get("averageWallHits", 0) * shots),
+    })
+    delta["max"]["max_potting_streak"] = player.get("maxPottingStreak", 0)
+    delta["push"]["recent_potting_accuracy"] = [player.get("pottingAccuracy", 0)]
+
+
+def chess_delta(player, delta, games, previous):
+    """Add the totals of the new chess games, taken from the processed player.
+
+    The move totals describe the upload's game, so they are only counted when
+    the upload has a game the aggregate has not counted yet.
+    """
+    if not games:
+        return
+    delta["inc"].update({
+        "moves": player.get("totalMoves", 0),
+        "time_spent": player.get("totalTimeSpent", 0),
+        "checks": player.get("totalChecks", 0),
+        "checkmates": player.get("totalCheckmates", 0),
+        "captured_pieces": player.get("totalCapturedPieces", 0),
+    })
+    for game in games:
+        if game.get("opening"):
+            key = f"openings.{_field_name(game['opening'])}"
+            delta["inc"][key] = delta["inc"].get(key, 0) + 1
+
+
+def blackjack_delta(player, delta, games, previous):
+    """Add the totals of the hands in this upload that the aggregate has not counted yet.
+
+    Hands with a ``hand_id`` are new when the id is above the aggregate's
+    ``last_hand_id``. Hands without one are only counted when the upload has
+    a new game. The processed player's ``handStatsState`` may resume from
+    earlier uploads, so the increments are taken from the hands instead.
+    """
+    last_hand_id = previous.get("last_hand_id")
+    hands = []
+    hand_ids = []
+    for hand in player.get("hands", []):
+        if not isinstance(hand, dict):
+            continue
+        hand_id = hand.get("hand_id")
+        if not (isinstance(hand_id, int) and not isinstance(hand_id, bool)):
+            if games:
+                hands.append(hand)
+        elif last_hand_id is None or hand_id > last_hand_id:
+            hands.append(hand)
+            hand_ids.append(hand_id)
+    bets = [hand.get("bet", 0) for hand in hands]
+    delta["inc"].update({
+        "hands": len(hands),
+        "total_bet": sum(bets),
+        "bet_squares_total": sum(bet * bet for bet in bets),
+        "blackjacks": sum(1 for hand in hands if hand.get("blackjack", False)),
+        "busts": sum(1 for hand in hands if hand.get("bust", False)),
+        "hand_wins": sum(1 for hand in hands if hand.get("win", False)),
+    })
+    if hand_ids:
+        delta["max"]["last_hand_id"] = max(hand_ids)
+
+
+GAME_DELTAS = {
+    "8ball": eight_ball_delta,
+    "chess": chess_delta,
+    "blackjack": blackjack_delta,
+}
+
+
+def build_delta(game, player, previous=None):
+    """Return the ``$inc``, ``$max`` and ``$push`` contributions of one processed player.
+
+    Only games and hands the aggregate has not counted yet contribute, so a
+    resent upload or a retried request adds nothing.
+
+    Args:
+        previous (dict): The aggregate the delta applies to; its
+            ``last_game_timestamp`` is used by ``new_games``.
+    """
+    previous = previous or {}
+    games = new_games(player, previous.get("last_game_timestamp"))
+    delta = history_delta(games)
+    game_delta = GAME_DELTAS.get(game)
+    if game_delta:
+        game_delta(player, delta, games, previous)
+    return delta
+
+
+def _max_run(results, result, run=0):
+    # ``run`` is the length of the streak of ``result`` that the new results continue
+    best = run
+    for value in results:
+        run = run + 1 if value == result else 0
+        best = max(best, run)
+    return best
+
+
+def merge_delta(previous, delta, window):
+    """Apply a delta to the previous aggregate document.
+
+    The streak fields are ``$set`` from ``previous``, so the update must only
+    be applied if the document is still at ``previous``'s version; see
+    ``apply_player_aggregates``.
+
+    Returns:
+        tuple: (update, aggregate) where ``update`` is the MongoDB update
+        document and ``aggregate`` is the resulting state, used to derive the
+        player's statistics without reading the document back.
+    """
+    aggregate = dict(previous)
+    for field, value in delta["inc"].items():
+        if "." in field:
+            parent, child = field.split(".", 1)
+            nested = dict(aggregate.get(parent, {}))
+            nested[child] = nested.get(child, 0) + value
+            aggregate[parent] = nested
+        else:
+            aggregate[field] = aggregate.get(field, 0) + value
+    for field, value in delta["max"].items():
+        aggregate[field] = max(aggregate.get(field, value), value)
+    for field, values in delta["push"].items():
+        aggregate[field] = (list(aggregate.get(field, [])) + values)[-window:]
+
+    # Streaks continue from the stored current streak, so only the new results are walked
+    results = delta["push"]["recent_results"]
+    streak_result = previous.get("streak_result")
+    streak_length = previous.get("streak_length", 0)
+    for result in results:
+        if result == streak_result:
+            streak_length += 1
+        else:
+            streak_result, streak_length = result, 1
+    win_run = previous.get("streak_length", 0) if previous.get("streak_result") == "win" else 0
+    loss_run = previous.get("streak_length", 0) if previous.get("streak_result") == "loss" else 0
+    streak_max = {
+        "max_win_streak": _max_run(results, "win", run=win_run),
+        "max_loss_streak": _max_run(results, "loss", run=loss_run),
+    }
+    for field, value in streak_max.items():
+        aggregate[field] = max(aggregate.get(field, 0), value)
+    aggregate["streak_result"] = streak_result
+    aggregate["streak_length"] = streak_length
+
+    update = {
+        "$inc": delta["inc"],
+        "$max": {**delta["max"], **streak_max},
+        "$push": {field: {"$each": values, "$slice": -window} for field, values in delta["push"].items()},
+        "$set": {"streak_result": streak_result, "streak_length": streak_length},
+    }
+    return update, aggregate
+
+
+def apply_aggregate_stats(game, player, aggregate):
+    """Overwrite the player's history statistics with values derived from the aggregate."""
+    games = aggregate.get("games", 0)
+    recent_results = aggregate.get("recent_results", [])[-RECENT_GAMES:]
+    recent_score_diffs = aggregate.get("recent_score_diffs", [])[-RECENT_GAMES:]
+
+    player["winRate"] = aggregate.get("wins", 0) / games if games else 0
+    player["totalGames"] = games
+    if recent_results:
+        player["lastGameResult"] = recent_results[-1]
+    player["recentWinCount"] = recent_results.count("win")
+    player["recentLossCount"] = recent_results.count("loss")
+    player["recentTieCount"] = recent_results.count("tie")
+    player["recentAverageScoreDiff"] = sum(recent_score_diffs) / len(recent_score_diffs) if recent_score_diffs else 0
+    player["maxWinStreak"] = aggregate.get("max_win_streak", 0)
+    player["maxLossStreak"] = aggregate.get("max_loss_streak", 0)
+
+    if game == "8ball":
+        shots = aggregate.get("shots", 0)
+        player["lifetimePottingAccuracy"] = aggregate.get("balls_potted", 0) / shots if shots else 0
+        player["lifetimeAverageWallHits"] = aggregate.get("wall_hits", 0) / shots if shots else 0
+        player["bestPottingStreak"] = aggregate.get("max_potting_streak", 0)
+        player["recentPottingAccuracy"] = aggregate.get("recent_potting_accuracy", [])
+    elif game == "chess":
+        moves = aggregate.get("moves", 0)
+        openings = aggregate.get("openings", {})
+        player["lifetimeAverageMoveTime"] = aggregate.get("time_spent", 0) / moves if moves else 0
+        player["lifetimeMostCommonOpening"] = max(openings, key=openings.get, default=None)
+        player["lifetimeOpeningDiversity"] = len(openings)
+    elif game == "blackjack":
+        hands = aggregate.get("hands", 0)
+        mean_bet = aggregate.get("total_bet", 0) / hands if hands else 0
+        player["lifetimeHandsPlayed"] = hands
+        player["lifetimeAverageBet"] = mean_bet
+        player["lifetimeBetVariance"] = max(aggregate.get("bet_squares_total", 0) / hands - mean_bet ** 2, 0) if hands >= 2 else 0
+        player["lifetimeBustRate"] = aggregate.get("busts", 0) / hands if hands else 0
+        player["lifetimeHandWinRate"] = aggregate.get("hand_wins", 0) / hands if hands else 0
+
+
+def _fold_players(game, players, previous, window):
+    # One update for all of a player's uploads in a call, so they apply in order
+    update = None
+    aggregate = previous
+    folded = []
+    for player in players:
+        delta = build_delta(game, player, aggregate)
+        player_update, aggregate = merge_delta(aggregate, delta, window)
+        update = player_update if update is None else merge_updates(update, player_update)
+        folded.append((player, aggregate))
+    version = previous.get("version")
+    update.setdefault("$set", {})["version"] = (version or 0) + 1
+    update["$setOnInsert"] = {"game": game, "username": players[0]["username"]}
+    # A missing version matches documents written before versions were stored
+    return UpdateOne({"_id": aggregate_id(game, players[0]["username"]), "version": version}, update, upsert=True), folded
+
+
+def apply_player_aggregates(game, players, collection=None, window=None, max_attempts=None, write=True):
+    """Fold each processed player's new games into their aggregate document.
+
+    The stored aggregates are read with one query and updated with one
+    unordered bulk write of ``$inc``/``$max``/``$push``+``$slice`` upserts, so
+    the work per upload depends only on the new games and not on how long a
+    player's history is.
+
+    Each update only matches the document version it was computed from. When
+    a concurrent upload changed a document first, the upsert fails with a
+    duplicate key error and that player's aggregate is read and computed again.
+
+    Args:
+        game (str): The game type.
+        players (list): Players returned by the game's processor. Their history
+            statistics are replaced in place with values taken from the aggregates.
+        collection: The aggregates collection, defaults to ``Config.PLAYER_AGGREGATES_COLLECTION``.
+        window (int): Entries kept in the recent-games windows.
+        max_attempts (int): Attempts per document, defaults to ``Config.PLAYER_AGGREGATE_MAX_ATTEMPTS``.
+        write (bool): If False, only set the players' statistics from what the
+            aggregates would become, without updating them. Used before the
+            players are stored, so the aggregates only count stored uploads.
+
+    Raises:
+        RuntimeError: If a document still conflicts after ``max_attempts`` attempts.
+    """
+    players = [player for player in players if isinstance(player, dict) and player.get("username")]
+    if not players:
+        return
+    collection = collection if collection is not None else get_database()[Config.PLAYER_AGGREGATES_COLLECTION]
+    window = window or Config.PLAYER_AGGREGATE_WINDOW
+    max_attempts = max_attempts or Config.PLAYER_AGGREGATE_MAX_ATTEMPTS
+
+    pending = defaultdict(list)
+    for player in players:
+        pending[aggregate_id(game, player["username"])].append(player)
+
+    for attempt in range(1, max_attempts + 1):
+        existing = {document["_id"]: document for document in collection.find({"_id": {"$in": list(pending)}})}
+        document_ids = list(pending)
+        operations = []
+        folded = []
+        for document_id in document_ids:
+            operation, document_folded = _fold_players(game, pending[document_id], existing.get(document_id, {}), window)
+            operations.append(operation)
+            folded.append(document_folded)
+
+        if not write:
+            for document_folded in folded:
+                for player, aggregate in document_folded:
+                    apply_aggregate_stats(game, player, aggregate)
+            return
+
+        conflicts = set()
+        try:
+            collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            conflicts = {error["index"] for error in errors}
+
+        for index, document_folded in enumerate(folded):
+            if index not in conflicts:
+                for player, aggregate in document_folded:
+                    apply_aggregate_stats(game, player, aggregate)
+        logger.info("Updated %d %s player aggregates.", len(operations) - len(conflicts), game)
+
+        pending = {document_ids[index]: pending[document_ids[index]] for index in sorted(conflicts)}
+        if not pending:
+            return
+        logger.debug("Retrying %d %s player aggregates changed by a concurrent upload (attempt %d).",
+                     len(pending), game, attempt)
+
+    raise RuntimeError(f"Could not update {len(pending)} {game} player aggregates after {max_attempts} attempts")
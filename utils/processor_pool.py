@@ -0,0 +1,76 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from config import Config
+from utils.logger import logger
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process pool used for CPU-bound game processors.
+
+    The pool is created lazily so that pre-forking servers build it in each
+    worker process rather than inheriting a pool whose processes belong to the
+    parent. Workers are started with ``PROCESSOR_POOL_START_METHOD`` (forkserver
+    by default), so they import modules instead of copying the whole
+    application and its ML libraries. Those start methods also re-import the
+    script that was run as ``__main__``, as ``__mp_main__``; main.py skips its
+    start-up work in that case.
+
+    Returns:
+        ProcessPoolExecutor: The shared executor, or None if the pool is disabled.
+    """
+    global _executor, _executor_pid
+    if Config.PROCESSOR_POOL_WORKERS <= 0:
+        return None
+
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            context = multiprocessing.get_context(Config.PROCESSOR_POOL_START_METHOD)
+            _executor = ProcessPoolExecutor(max_workers=Config.PROCESSOR_POOL_WORKERS, mp_context=context)
+            _executor_pid = os.getpid()
+            logger.info("Started processor pool with %d workers.", Config.PROCESSOR_POOL_WORKERS)
+        return _executor
+
+
+def run_processor(processor, game_data):
+    """Run a game processor, in the process pool when it is enabled.
+
+    Processors are module-level functions, so only a reference to them is
+    pickled; the payload itself crosses the process boundary once each way.
+    """
+    executor = get_executor()
+    if executor is None:
+        return processor(game_data)
+    return executor.submit(processor, game_data).result()
+
+
+def run_processors(tasks):
+    """Run several ``(processor, game_data)`` pairs concurrently.
+
+    Returns:
+        list: The processor outputs, in the order of the tasks.
+    """
+    executor = get_executor()
+    if executor is None:
+        return [processor(game_data) for processor, game_data in tasks]
+    futures = [executor.submit(processor, game_data) for processor, game_data in tasks]
+    return [future.result() for future in futures]
+
+
+def shutdown_processor_pool():
+    """Stop the processor pool and wait for running tasks to finish."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=True)
+            logger.info("Processor pool shut down.")
+        _executor = None
+
+
+atexit.register(shutdown_processor_pool)
@@ -0,0 +1,2 @@
+class InvalidGameDataError(ValueError):
+    """Raised by a game processor when uploaded game data cannot be processed."""
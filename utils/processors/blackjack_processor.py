@@ -1,8 +1,26 @@
-from utils.logger import logger
+from utils.logger import logger, log_payload
+from utils.processors import InvalidGameDataError
 from datetime import datetime
 
-def process_blackjack_data(game_data):
-    """Process game data specific to blackjack."""
+def process_blackjack_data(game_data, previous_states=None):
+    """Process game data specific to blackjack.
+
+    A player's hand statistics cover the hands in the upload unless the player
+    sets ``resumeHandStats``. They then continue from the state stored with the
+    player's previous upload, and every hand must carry an increasing integer
+    ``hand_id``; hands at or below the stored state's last id are already
+    counted and are skipped, so resent hands and retried requests count once.
+
+    Args:
+        game_data (dict): The uploaded game data.
+        previous_states (dict): Username -> hand statistics state stored with the
+            player's previous upload, loaded server-side. Any ``handStatsState``
+            sent by the client is ignored.
+
+    Raises:
+        InvalidGameDataError: If a hand or a stored state has values of the wrong type.
+    """
+    previous_states = previous_states or {}
     players = game_data.get("players", [])
     logger.info("Processing data for %d players in blackjack.", len(players))
 
@@ -15,14 +33,20 @@ def process_blackjack_data(game_data):
         # Calculate win rate
         calculate_win_rate(player)
 
-        # Total hands played
-        calculate_total_hands_played(player)
-
-        # Total bets and average bet size
-        calculate_total_bet_and_average_bet(player)
-
-        # Blackjack occurrences and bust rate
-        calculate_blackjack_and_bust_rate(player)
+        # Hand-based statistics from a single streaming pass, optionally resuming from the stored state
+        player.pop("handStatsState", None)
+        resume = player.pop("resumeHandStats", False) is True
+        accumulator = BlackjackHandAccumulator.from_state(
+            previous_states.get(player.get("username")) if resume else None
+        )
+        hands = player.get("hands", [])
+        if not isinstance(hands, list):
+            raise InvalidGameDataError("Player hands must be a list")
+        for hand in hands:
+            if resume and not (isinstance(hand, dict) and _is_hand_id(hand.get("hand_id"))):
+                raise InvalidGameDataError("Each hand must have an integer hand_id to resume hand statistics")
+            accumulator.add(hand)
+        accumulator.apply(player)
 
         # Game history analysis
         analyze_game_history(player)
@@ -30,34 +54,197 @@ def process_blackjack_data(game_data):
         # Streak analysis
         analyze_win_loss_streak(player)
 
-        # Advanced strategy analysis
-        analyze_advanced_strategies(player)
-
-        # Additional Metrics
-        calculate_bet_variance(player)
-        calculate_average_hand_value(player)
-
         # Add custom player stats (e.g., recent trends)
         add_custom_player_stats(player)
 
         # Additional analyses
-        calculate_average_bet_size(player)
         calculate_bet_ratio(player)
-        calculate_hand_win_rate(player)
         track_recent_trends(player)
-        calculate_hand_valuation(player)
-        detect_trend_in_betting(player)
         assess_risk_level(player)
-        track_blackjack_frequency(player)
-        analyze_recent_blackjack_trends(player)
         generate_game_summary(player)
 
-        logger.debug("Calculated advanced stats for player %s: %s", player.get("username"), player)
+        log_payload("Calculated advanced stats for player %s: %s", player.get("username"), payload=player)
     
     logger.info("Finished processing blackjack data.")
     return players
 
 
+def resuming_usernames(game_data):
+    """Return the usernames of the players in an upload that resume their hand statistics."""
+    players = game_data.get("players") if isinstance(game_data, dict) else None
+    if not isinstance(players, list):
+        return []
+    return [
+        player["username"] for player in players
+        if isinstance(player, dict) and player.get("resumeHandStats") is True
+        and isinstance(player.get("username"), str)
+    ]
+
+
+def process_blackjack_uploads(uploads, previous_states=None):
+    """Process several blackjack uploads in order.
+
+    Each upload resumes from the hand statistics the uploads before it
+    produced, so two uploads for the same player in one batch both count.
+
+    Returns:
+        list: The processed players of each upload.
+    """
+    states = dict(previous_states or {})
+    results = []
+    for game_data in uploads:
+        usernames = set(resuming_usernames(game_data))
+        players = process_blackjack_data(game_data, states)
+        for player in players:
+            if player.get("username") in usernames:
+                states[player["username"]] = player["handStatsState"]
+        results.append(players)
+    return results
+
+
+class BlackjackHandAccumulator:
+    """
+    Streaming accumulator for per-hand blackjack statistics.
+    Each hand is visited once; bet variance uses Welford's algorithm, and the
+    running state can be stored and resumed when more hands arrive later.
+    Hands with a ``hand_id`` at or below ``last_hand_id`` are already counted
+    and are skipped.
+    """
+    COUNT_FIELDS = ("hands", "blackjacks", "busts", "doubles", "splits", "wins")
+    NUMBER_FIELDS = ("total_bet", "bet_mean", "bet_m2", "total_value", "total_valuation")
+    STATE_FIELDS = COUNT_FIELDS + NUMBER_FIELDS + ("last_bet", "bets_increasing", "last_hand_id")
+
+    def __init__(self):
+        self.hands = 0
+        self.total_bet = 0
+        self.bet_mean = 0.0
+        self.bet_m2 = 0.0
+        self.blackjacks = 0
+        self.busts = 0
+        self.doubles = 0
+        self.splits = 0
+        self.wins = 0
+        self.total_value = 0
+        self.total_valuation = 0
+        self.last_bet = None
+        self.bets_increasing = True
+        self.last_hand_id = None
+
+    @classmethod
+    def from_state(cls, state):
+        """Create an accumulator, resuming from a state produced by ``to_state`` if given.
+
+        Raises:
+            InvalidGameDataError: If the state is not a dict or a field has the wrong type.
+        """
+        accumulator = cls()
+        if not state:
+            return accumulator
+        if not isinstance(state, dict):
+            raise InvalidGameDataError("Hand statistics state must be an object")
+        for field in cls.STATE_FIELDS:
+            if field not in state:
+                continue
+            value = state[field]
+            if field in cls.COUNT_FIELDS:
+                valid = isinstance(value, int) and not isinstance(value, bool) and value >= 0
+            elif field == "bets_increasing":
+                valid = isinstance(value, bool)
+            elif field == "last_hand_id":
+                valid = value is None or _is_hand_id(value)
+            else:
+                valid = _is_number(value) or (field == "last_bet" and value is None)
+            if not valid:
+                raise InvalidGameDataError(f"Invalid hand statistics state field '{field}': {value!r}")
+            setattr(accumulator, field, value)
+        return accumulator
+
+    def to_state(self):
+        """Return the running totals as a plain dict that can be stored and resumed."""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    def add(self, hand):
+        """Fold one hand into the running statistics.
+
+        Returns:
+            bool: False if the hand was skipped because it is already counted.
+
+        Raises:
+            InvalidGameDataError: If the hand is not an object or has non-numeric values.
+        """
+        if not isinstance(hand, dict):
+            raise InvalidGameDataError("Each hand must be an object")
+        hand_id = hand.get("hand_id")
+        if hand_id is not None:
+            if not _is_hand_id(hand_id):
+                raise InvalidGameDataError("Hand hand_id must be an integer")
+            if self.last_hand_id is not None and hand_id <= self.last_hand_id:
+                return False
+        bet = hand.get("bet", 0)
+        value = hand.get("value", 0)
+        card_values = hand.get("card_values", [])
+        if not _is_number(bet) or not _is_number(value):
+            raise InvalidGameDataError("Hand bet and value must be numbers")
+        if not isinstance(card_values, list) or not all(_is_number(card) for card in card_values):
+            raise InvalidGameDataError("Hand card_values must be a list of numbers")
+        self.hands += 1
+        self.total_bet += bet
+        delta = bet - self.bet_mean
+        self.bet_mean += delta / self.hands
+        self.bet_m2 += delta * (bet - self.bet_mean)
+
+        if self.last_bet is not None and bet <= self.last_bet:
+            self.bets_increasing = False
+        self.last_bet = bet
+
+        if hand.get("blackjack", False):
+            self.blackjacks += 1
+        if hand.get("bust", False):
+            self.busts += 1
+        if hand.get("double_down", False):
+            self.doubles += 1
+        if hand.get("split", False):
+            self.splits += 1
+        if hand.get("win", False):
+            self.wins += 1
+        self.total_value += value
+        self.total_valuation += sum(card_values)
+        if hand_id is not None:
+            self.last_hand_id = hand_id
+        return True
+
+    def apply(self, player):
+        """Write the hand statistics onto the player and store the resumable state."""
+        hands = self.hands
+        player["totalHandsPlayed"] = hands
+        player["totalBetAmount"] = self.total_bet
+        player["averageBet"] = self.total_bet / hands if hands else 0
+        player["averageBetSize"] = player["averageBet"]
+        player["blackjackCount"] = self.blackjacks
+        player["bustRate"] = self.busts / hands if hands else 0
+        player["doubleDownCount"] = self.doubles
+        player["splitCount"] = self.splits
+        player["betVariance"] = self.bet_m2 / hands if hands >= 2 else 0
+        player["averageHandValue"] = self.total_value / hands if hands else 0
+        player["handWinRate"] = self.wins / hands if hands else 0
+        player["averageHandValuation"] = self.total_valuation / hands if hands else 0
+        if hands < 5:
+            player["bettingTrend"] = "Insufficient data"
+        else:
+            player["bettingTrend"] = "Increasing" if self.bets_increasing else "Decreasing"
+        player["blackjackFrequency"] = self.blackjacks / hands if hands else 0
+        player["recentBlackjackTrend"] = "Frequent" if self.blackjacks > hands * 0.3 else "Infrequent"
+        player["handStatsState"] = self.to_state()
+        logger.debug("Player %s hand statistics: %s", player.get("username"), player["handStatsState"])
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_hand_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
 
 def calculate_win_rate(player):
     """Calculate win rate for the player."""
@@ -70,32 +257,6 @@ def calculate_win_rate(player):
     logger.debug("Player %s win rate: %f", player.get("username"), player["winRate"])
 
 
-def calculate_total_hands_played(player):
-    """Calculate the total number of hands played by the player."""
-    hands = player.get("hands", [])
-    player["totalHandsPlayed"] = len(hands)
-    logger.debug("Player %s total hands played: %d", player.get("username"), player["totalHandsPlayed"])
-
-
-def calculate_total_bet_and_average_bet(player):
-    """Calculate total bet and average bet size for the player."""
-    hands = player.get("hands", [])
-    total_bet = sum(hand.get("bet", 0) for hand in hands)
-    player["totalBetAmount"] = total_bet
-    player["averageBet"] = total_bet / len(hands) if hands else 0
-    logger.debug("Player %s total bet: %f, average bet: %f", player.get("username"), player["totalBetAmount"], player["averageBet"])
-
-
-def calculate_blackjack_and_bust_rate(player):
-    """Calculate the number of blackjacks and bust rate for the player."""
-    hands = player.get("hands", [])
-    blackjacks = sum(1 for hand in hands if hand.get("blackjack", False))
-    busts = sum(1 for hand in hands if hand.get("bust", False))
-    player["blackjackCount"] = blackjacks
-    player["bustRate"] = busts / len(hands) if hands else 0
-    logger.debug("Player %s blackjacks: %d, bust rate: %f", player.get("username"), player["blackjackCount"], player["bustRate"])
-
-
 def analyze_game_history(player):
     """Analyze the player's game history."""
     game_history = player.get("game_history", [])
@@ -109,7 +270,7 @@ def analyze_game_history(player):
         player["recentLossCount"] = sum(1 for game in last_5_games if game["result"] == "loss")
         player["recentTieCount"] = sum(1 for game in last_5_games if game["result"] == "tie")
 
-        logger.debug("Player %s recent game analysis: %s", player.get("username"), player)
+        log_payload("Player %s recent game analysis: %s", player.get("username"), payload=player)
 
 
 def analyze_win_loss_streak(player):
@@ -139,43 +300,11 @@ def analyze_win_loss_streak(player):
     logger.debug("Player %s win streak: %d, loss streak: %d", player.get("username"), win_streak, loss_streak)
 
 
-def analyze_advanced_strategies(player):
-    """Analyze advanced strategies used by the player (doubling down, splitting)."""
-    hands = player.get("hands", [])
-    total_doubles = sum(1 for hand in hands if hand.get("double_down", False))
-    total_splits = sum(1 for hand in hands if hand.get("split", False))
-    player["doubleDownCount"] = total_doubles
-    player["splitCount"] = total_splits
-    logger.debug("Player %s double downs: %d, splits: %d", player.get("username"), total_doubles, total_splits)
-
-
-def calculate_bet_variance(player):
-    """Calculate the variance of the player's bets."""
-    hands = player.get("hands", [])
-    if len(hands) < 2:
-        player["betVariance"] = 0
-        return
-
-    bets = [hand.get("bet", 0) for hand in hands]
-    mean_bet = sum(bets) / len(bets)
-    variance = sum((bet - mean_bet) ** 2 for bet in bets) / len(bets)
-    player["betVariance"] = variance
-    logger.debug("Player %s bet variance: %f", player.get("username"), player["betVariance"])
-
-
-def calculate_average_hand_value(player):
-    """Calculate the average hand value for the player."""
-    hands = player.get("hands", [])
-    total_value = sum(hand.get("value", 0) for hand in hands)
-    player["averageHandValue"] = total_value / len(hands) if hands else 0
-    logger.debug("Player %s average hand value: %f", player.get("username"), player["averageHandValue"])
-
-
 def add_custom_player_stats(player):
     """Add custom stats to the player based on specific requirements."""
     player["isHighRoller"] = player["averageBet"] > 100
     player["recentActivityDate"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    logger.debug("Player %s custom stats: %s", player.get("username"), player)
+    log_payload("Player %s custom stats: %s", player.get("username"), payload=player)
 
 
 def validate_game_data(game_data):
@@ -188,14 +317,6 @@ def validate_game_data(game_data):
         return False
     return True
 
-def calculate_average_bet_size(player):
-    """Calculate the average bet size for the player across all hands."""
-    hands = player.get("hands", [])
-    total_bet = sum(hand.get("bet", 0) for hand in hands)
-    player["averageBetSize"] = total_bet / len(hands) if hands else 0
-    logger.debug("Player %s average bet size: %f", player.get("username"), player["averageBetSize"])
-
-
 def calculate_bet_ratio(player):
     """Calculate the ratio of total bet to total hands played."""
     total_bet = player.get("totalBetAmount", 0)
@@ -204,14 +325,6 @@ def calculate_bet_ratio(player):
     logger.debug("Player %s bet ratio: %f", player.get("username"), player["betRatio"])
 
 
-def calculate_hand_win_rate(player):
-    """Calculate the win rate based on hands played."""
-    hands = player.get("hands", [])
-    total_wins = sum(1 for hand in hands if hand.get("win", False))
-    player["handWinRate"] = total_wins / len(hands) if hands else 0
-    logger.debug("Player %s hand win rate: %f", player.get("username"), player["handWinRate"])
-
-
 def track_recent_trends(player):
     """Track the recent trends in the player's game results (win/loss ratio)."""
     game_history = player.get("game_history", [])
@@ -226,27 +339,6 @@ def track_recent_trends(player):
     logger.debug("Player %s recent trends: %s", player.get("username"), player["recentTrend"])
 
 
-def calculate_hand_valuation(player):
-    """Calculate the hand valuation based on the cards and result."""
-    hands = player.get("hands", [])
-    hand_values = [sum(hand.get("card_values", [])) for hand in hands]
-    player["averageHandValuation"] = sum(hand_values) / len(hand_values) if hands else 0
-    logger.debug("Player %s average hand valuation: %f", player.get("username"), player["averageHandValuation"])
-
-
-def detect_trend_in_betting(player):
-    """Detect any significant trend in the player's betting pattern."""
-    hands = player.get("hands", [])
-    if len(hands) < 5:
-        player["bettingTrend"] = "Insufficient data"
-        return
-
-    bets = [hand.get("bet", 0) for hand in hands]
-    bet_changes = [bets[i] - bets[i - 1] for i in range(1, len(bets))]
-    player["bettingTrend"] = "Increasing" if all(change > 0 for change in bet_changes) else "Decreasing"
-    logger.debug("Player %s betting trend: %s", player.get("username"), player["bettingTrend"])
-
-
 def assess_risk_level(player):
     """Assess the risk level based on betting size and win rate."""
     win_rate = player.get("winRate", 0)
@@ -260,22 +352,6 @@ def assess_risk_level(player):
     logger.debug("Player %s risk level: %s", player.get("username"), player["riskLevel"])
 
 
-def track_blackjack_frequency(player):
-    """Track how often the player gets a blackjack."""
-    hands = player.get("hands", [])
-    blackjacks = sum(1 for hand in hands if hand.get("blackjack", False))
-    player["blackjackFrequency"] = blackjacks / len(hands) if hands else 0
-    logger.debug("Player %s blackjack frequency: %f", player.get("username"), player["blackjackFrequency"])
-
-
-def analyze_recent_blackjack_trends(player):
-    """Analyze trends in the player's blackjack results."""
-    hands = player.get("hands", [])
-    blackjack_count = sum(1 for hand in hands if hand.get("blackjack", False))
-    player["recentBlackjackTrend"] = "Frequent" if blackjack_count > len(hands) * 0.3 else "Infrequent"
-    logger.debug("Player %s recent blackjack trend: %s", player.get("username"), player["recentBlackjackTrend"])
-
-
 def generate_game_summary(player):
     """Generate a summary of the player's overall performance."""
     games_played = player.get("games_played", 0)
@@ -1,4 +1,5 @@
-from utils.logger import logger
+from collections import Counter
+from utils.logger import logger, log_payload
 
 def process_chess_data(game_data):
     """Process game data specific to chess."""
@@ -14,32 +15,9 @@ def process_chess_data(game_data):
         # Calculate win rate
         calculate_win_rate(player)
 
-        # Analyze moves
-        analyze_moves(player)
-
-        # Categorize moves by phase
-        categorize_moves_by_phase(player)
-
-        # Analyze captured pieces
-        analyze_captured_pieces(player)
-
-        # Analyze checks and checkmates
-        analyze_checks_and_checkmates(player)
-
-        # Advanced analysis: Piece movement patterns
-        analyze_piece_movement_patterns(player)
-
-        # Advanced analysis: Positional preferences
-        analyze_positional_preferences(player)
-
-        # Advanced analysis: Opening repertoire
-        analyze_opening_repertoire(player)
-
-        # Advanced analysis: Elo-based performance metrics
-        analyze_elo_performance(player)
-
-        # Advanced analysis: Positional heatmaps for board control
-        analyze_board_control(player)
+        # Move-based analyses (totals, phases, captures, checks, piece patterns,
+        # positional preferences, openings, Elo and board control) in one pass over moves
+        apply_move_summary(player, summarize_moves(player.get("moves", []), player.get("rating", 0)))
 
         # Advanced analysis: Opponent-specific performance metrics
         analyze_opponent_performance(player, players)
@@ -56,13 +34,10 @@ def process_chess_data(game_data):
         # Behavioral analysis based on game history
         analyze_behavioral_trends(player)
 
-        # Additional analysis (e.g., total time spent)
-        analyze_total_time_spent(player)
-
         # Add custom player stats (e.g., recent trends)
         add_custom_player_stats(player)
 
-        logger.debug("Calculated advanced stats for player %s: %s", player.get("username"), player)
+        log_payload("Calculated advanced stats for player %s: %s", player.get("username"), payload=player)
 
     logger.info("Finished processing chess data.")
     return players
@@ -76,104 +51,124 @@ def calculate_win_rate(player):
     logger.debug("Player %s win rate: %f", player.get("username"), player["winRate"])
 
 
-def analyze_moves(player):
-    """Analyze the moves made by the player."""
-    moves = player.get("moves", [])
-    player["totalMoves"] = len(moves)
-    player["averageMoveTime"] = sum(move.get("time", 0) for move in moves) / len(moves) if moves else 0
-    logger.debug("Player %s total moves: %d, average move time: %f", player.get("username"), player["totalMoves"], player["averageMoveTime"])
-
-
-def categorize_moves_by_phase(player):
-    """Categorize moves made by the player into early, middle, and late game."""
-    moves = player.get("moves", [])
-    early_game_moves = [move for move in moves if move.get("move_number") <= 10]
-    middle_game_moves = [move for move in moves if 11 <= move.get("move_number") <= 30]
-    late_game_moves = [move for move in moves if move.get("move_number") > 30]
-    player["earlyGameMoves"] = len(early_game_moves)
-    player["middleGameMoves"] = len(middle_game_moves)
-    player["lateGameMoves"] = len(late_game_moves)
-    logger.debug("Player %s early, middle, and late game moves: %d, %d, %d", player.get("username"), player["earlyGameMoves"], player["middleGameMoves"], player["lateGameMoves"])
-
-
-def analyze_captured_pieces(player):
-    """Analyze the pieces captured by the player."""
-    moves = player.get("moves", [])
-    captured_pieces = [move.get("captured_piece") for move in moves if move.get("captured_piece")]
-    player["totalCapturedPieces"] = len(captured_pieces)
-    player["mostCapturedPiece"] = max(set(captured_pieces), key=captured_pieces.count, default=None)
-    logger.debug("Player %s total captured pieces: %d, most captured piece: %s", player.get("username"), player["totalCapturedPieces"], player["mostCapturedPiece"])
+def summarize_moves(moves, rating=0):
+    """Walk a player's moves once and accumulate every move-based statistic.
+
+    Args:
+        moves (list): The player's moves.
+        rating (int): The player's rating, used for the Elo difference.
+
+    Returns:
+        dict: Raw totals and counters used by ``apply_move_summary``.
+    """
+    total_time = 0
+    early_game_moves = 0
+    middle_game_moves = 0
+    late_game_moves = 0
+    total_checks = 0
+    total_checkmates = 0
+    elo_difference_total = 0
+    elo_difference_count = 0
+    captured_pieces = Counter()
+    piece_moves = Counter()
+    square_counts = Counter()
+    openings = Counter()
 
+    for move in moves:
+        total_time += move.get("time", 0)
 
-def analyze_checks_and_checkmates(player):
-    """Analyze checks and checkmates in the player's games."""
-    moves = player.get("moves", [])
-    player["totalChecks"] = sum(1 for move in moves if move.get("check", False))
-    player["totalCheckmates"] = sum(1 for move in moves if move.get("checkmate", False))
-    logger.debug("Player %s total checks: %d, total checkmates: %d", player.get("username"), player["totalChecks"], player["totalCheckmates"])
+        move_number = move.get("move_number")
+        if move_number <= 10:
+            early_game_moves += 1
+        elif move_number <= 30:
+            middle_game_moves += 1
+        else:
+            late_game_moves += 1
 
+        captured_piece = move.get("captured_piece")
+        if captured_piece:
+            captured_pieces[captured_piece] += 1
+        if move.get("check", False):
+            total_checks += 1
+        if move.get("checkmate", False):
+            total_checkmates += 1
 
-def analyze_piece_movement_patterns(player):
-    """Analyze the movement patterns of the player's pieces."""
-    moves = player.get("moves", [])
-    piece_moves = {}
-    for move in moves:
         piece = move.get("piece")
         if piece:
-            piece_moves[piece] = piece_moves.get(piece, 0) + 1
-    player["pieceMovementPatterns"] = piece_moves
-    logger.debug("Player %s piece movement patterns: %s", player.get("username"), player["pieceMovementPatterns"])
-
-
-def analyze_positional_preferences(player):
-    """Analyze the player's positional preferences."""
-    moves = player.get("moves", [])
-    position_counts = {}
-    for move in moves:
+            piece_moves[piece] += 1
         to_square = move.get("to_square")
         if to_square:
-            position_counts[to_square] = position_counts.get(to_square, 0) + 1
-    player["positionalPreferences"] = {
-        "mostCommonSquare": max(position_counts, key=position_counts.get, default=None),
-        "squareFrequencies": position_counts
+            square_counts[to_square] += 1
+        opening = move.get("opening")
+        if opening:
+            openings[opening] += 1
+
+        opponent_elo = move.get("opponent_elo")
+        if opponent_elo:
+            elo_difference_total += opponent_elo - rating
+            elo_difference_count += 1
+
+    return {
+        "total_moves": len(moves),
+        "total_time": total_time,
+        "early_game_moves": early_game_moves,
+        "middle_game_moves": middle_game_moves,
+        "late_game_moves": late_game_moves,
+        "captured_pieces": captured_pieces,
+        "total_checks": total_checks,
+        "total_checkmates": total_checkmates,
+        "piece_moves": piece_moves,
+        "square_counts": square_counts,
+        "openings": openings,
+        "elo_difference_total": elo_difference_total,
+        "elo_difference_count": elo_difference_count,
     }
-    logger.debug("Player %s positional preferences: %s", player.get("username"), player["positionalPreferences"])
 
 
-def analyze_opening_repertoire(player):
-    """Analyze the player's opening repertoire."""
-    moves = player.get("moves", [])
-    openings = [move.get("opening") for move in moves if move.get("opening")]
+def most_common_key(counter):
+    """Return the most frequent key of a Counter (first seen on ties), or None if it is empty."""
+    most_common = counter.most_common(1)
+    return most_common[0][0] if most_common else None
+
+
+def apply_move_summary(player, summary):
+    """Write the statistics derived from ``summarize_moves`` onto the player.
+
+    Produces the same keys as analyze_moves, categorize_moves_by_phase,
+    analyze_captured_pieces, analyze_checks_and_checkmates,
+    analyze_piece_movement_patterns, analyze_positional_preferences,
+    analyze_opening_repertoire, analyze_elo_performance, analyze_board_control
+    and analyze_total_time_spent.
+    """
+    total_moves = summary["total_moves"]
+    player["totalMoves"] = total_moves
+    player["averageMoveTime"] = summary["total_time"] / total_moves if total_moves else 0
+    player["totalTimeSpent"] = summary["total_time"]
+    player["earlyGameMoves"] = summary["early_game_moves"]
+    player["middleGameMoves"] = summary["middle_game_moves"]
+    player["lateGameMoves"] = summary["late_game_moves"]
+    player["totalCapturedPieces"] = sum(summary["captured_pieces"].values())
+    player["mostCapturedPiece"] = most_common_key(summary["captured_pieces"])
+    player["totalChecks"] = summary["total_checks"]
+    player["totalCheckmates"] = summary["total_checkmates"]
+    player["pieceMovementPatterns"] = dict(summary["piece_moves"])
+    player["positionalPreferences"] = {
+        "mostCommonSquare": most_common_key(summary["square_counts"]),
+        "squareFrequencies": dict(summary["square_counts"])
+    }
     player["openingPreferences"] = {
-        "mostCommonOpening": max(set(openings), key=openings.count, default=None),
-        "openingFrequencies": {opening: openings.count(opening) for opening in set(openings)}
+        "mostCommonOpening": most_common_key(summary["openings"]),
+        "openingFrequencies": dict(summary["openings"])
     }
-    logger.debug("Player %s opening preferences: %s", player.get("username"), player["openingPreferences"])
-
-
-def analyze_elo_performance(player):
-    """Analyze Elo-based performance metrics."""
-    moves = player.get("moves", [])
-    opponent_elo_differences = [move.get("opponent_elo") - player.get("rating", 0) for move in moves if move.get("opponent_elo")]
-    player["averageOpponentEloDifference"] = sum(opponent_elo_differences) / len(opponent_elo_differences) if opponent_elo_differences else 0
-    logger.debug("Player %s average opponent Elo difference: %f", player.get("username"), player["averageOpponentEloDifference"])
-
-
-def analyze_board_control(player):
-    """Analyze positional heatmaps for board control."""
-    moves = player.get("moves", [])
-    board_control = {}
-    for move in moves:
-        to_square = move.get("to_square")
-        if to_square:
-            board_control[to_square] = board_control.get(to_square, 0) + 1
-    player["boardControlHeatmap"] = board_control
-    logger.debug("Player %s board control heatmap: %s", player.get("username"), player["boardControlHeatmap"])
+    elo_count = summary["elo_difference_count"]
+    player["averageOpponentEloDifference"] = summary["elo_difference_total"] / elo_count if elo_count else 0
+    player["boardControlHeatmap"] = dict(summary["square_counts"])
+    logger.debug("Player %s total moves: %d, total time spent: %f", player.get("username"), total_moves, summary["total_time"])
 
 
 def analyze_opponent_performance(player, players):
     """Analyze opponent-specific performance metrics."""
-    opponents = [p for p in players if p != player]
+    opponents = [p for p in players if p is not player]
     if opponents:
         opponent = opponents[0]  # Example: take first opponent in list
         player["performanceAgainstOpponent"] = {
@@ -182,7 +177,7 @@ def analyze_opponent_performance(player, players):
             "checks": player["totalChecks"],
             "checkmates": player["totalCheckmates"]
         }
-    logger.debug("Player %s performance against opponent: %s", player.get("username"), player.get("performanceAgainstOpponent"))
+    log_payload("Player %s performance against opponent: %s", player.get("username"), payload=player.get("performanceAgainstOpponent"))
 
 
 def analyze_game_history(player):
@@ -213,7 +208,7 @@ def analyze_game_history(player):
         player["recentAverageScoreDiff"] = sum(
             game["score_diff"] for game in last_5_games
         ) / len(last_5_games) if last_5_games else 0
-    logger.debug("Player %s game history analysis: %s", player.get("username"), player)
+    log_payload("Player %s game history analysis: %s", player.get("username"), payload=player)
 
 
 def analyze_streaks(player):
@@ -246,9 +241,9 @@ def analyze_streaks(player):
 def analyze_openings_in_game_history(player):
     """Analyze openings used in the player's game history."""
     game_history = player.get("game_history", [])
-    openings = [game.get("opening") for game in game_history if game.get("opening")]
-    player["mostCommonOpening"] = max(set(openings), key=openings.count, default=None) if openings else None
-    player["openingDiversity"] = len(set(openings))
+    openings = Counter(game.get("opening") for game in game_history if game.get("opening"))
+    player["mostCommonOpening"] = most_common_key(openings)
+    player["openingDiversity"] = len(openings)
     logger.debug("Player %s most common opening: %s, opening diversity: %d", player.get("username"), player["mostCommonOpening"], player["openingDiversity"])
 
 
@@ -260,17 +255,9 @@ def analyze_behavioral_trends(player):
     logger.debug("Player %s aggressive and defensive games: %d, %d", player.get("username"), player["aggressiveGames"], player["defensiveGames"])
 
 
-def analyze_total_time_spent(player):
-    """Analyze the total time spent on moves by the player."""
-    moves = player.get("moves", [])
-    total_time = sum(move.get("time", 0) for move in moves)
-    player["totalTimeSpent"] = total_time
-    logger.debug("Player %s total time spent: %f seconds", player.get("username"), total_time)
-
-
 def add_custom_player_stats(player):
     """Add custom player stats based on specific criteria."""
     player["isAggressive"] = player["aggressiveGames"] > 2
     player["isDefensive"] = player["defensiveGames"] > 2
     player["recentActivity"] = True if player["recentWinCount"] > 2 else False
-    logger.debug("Player %s custom stats: %s", player.get("username"), player)
+    log_payload("Player %s custom stats: %s", player.get("username"), payload=player)
@@ -1,4 +1,4 @@
-from utils.logger import logger
+from utils.logger import logger, log_payload
 import random
 
 class EightBallRLAgent:
@@ -84,19 +84,13 @@ def process_8ball_data(game_data):
     for player in players:
         logger.info("Processing data for player: %s", player.get("username"))
 
-        # Standard analysis
+        # Standard analysis; all per-turn statistics come from a single walk over game_data
+        turn_summary = summarize_turns(player.get("game_data", []))
         determine_first_turn(player, players)
         calculate_win_rate(player)
-        calculate_potting_accuracy(player)
-        update_game_data(player)
+        apply_turn_summary(player, turn_summary)
         calculate_average_fouls(player)
-        calculate_shot_ratios(player)
-        determine_most_common_ball_hit(player)
-        analyze_wall_hits(player)
-        identify_max_potting_streak(player)
-        analyze_cue_ball_position(player)
-        analyze_game_phases(player)
-        analyze_opponent_performance(player, players)
+        analyze_opponent_performance(player, players, balls_potted=turn_summary["total_potted"])
         analyze_game_history(player)
         analyze_streaks(player)
         analyze_behavior_trends(player)
@@ -105,7 +99,7 @@ def process_8ball_data(game_data):
 
         refine_ai_bot(player)
 
-        logger.debug("Calculated advanced stats for player %s: %s", player.get("username"), player)
+        log_payload("Calculated advanced stats for player %s: %s", player.get("username"), payload=player)
 
     logger.info("Finished processing 8-ball data.")
     return players
@@ -156,111 +150,122 @@ def calculate_win_rate(player):
     logger.debug("Player %s win rate: %f", player.get("username"), player["winRate"])
 
 
-def calculate_potting_accuracy(player):
-    """Calculate potting accuracy for the player."""
-    total_shots = len(player.get("game_data", []))
-    total_potted = sum(len(turn.get("balls_potted", [])) for turn in player.get("game_data", []))
-    player["pottingAccuracy"] = total_potted / total_shots if total_shots > 0 else 0
-    logger.debug("Player %s potting accuracy: %f", player.get("username"), player["pottingAccuracy"])
-
-
-def update_game_data(player):
-    """Update the player's game data with the current game's results."""
-    player["games"] += 1
-    player["games_won"] += 1 if player.get("result", "") == "win" else 0
-    player["games_lost"] += 1 if player.get("result", "") == "loss" else 0
-    total_potted = sum(len(turn.get("balls_potted", [])) for turn in player.get("game_data", []))
-    player["balls_potted"] += total_potted
-    logger.debug("Player %s updated game data: games %d, wins %d, losses %d, balls potted %d", 
-                 player.get("username"), player["games"], player["games_won"], player["games_lost"], player["balls_potted"])
+def summarize_turns(game_data):
+    """Walk a player's turns once and accumulate every per-turn statistic.
 
+    Args:
+        game_data (list): The player's turns, in the order they were played.
 
-def calculate_average_fouls(player):
-    """Calculate average fouls per game for the player."""
-    fouls = player.get("fouls", 0)
-    games = player.get("games", 0)
-    player["averageFouls"] = fouls / games if games > 0 else 0
-    logger.debug("Player %s average fouls per game: %f", player.get("username"), player["averageFouls"])
+    Returns:
+        dict: Raw totals used by ``apply_turn_summary``.
+    """
+    total_shots = len(game_data)
+    mid_game_index = total_shots // 2
+    total_potted = 0
+    early_game_pots = 0
+    aggressive_shots = 0
+    total_wall_hits = 0
+    max_potting_streak = 0
+    current_streak = 0
+    cue_x_total = 0
+    cue_y_total = 0
+    ball_hit_counts = {}
 
+    for index, turn in enumerate(game_data):
+        potted = len(turn.get("balls_potted", []))
+        total_potted += potted
+        if index < mid_game_index:
+            early_game_pots += potted
 
-def calculate_shot_ratios(player):
-    """Calculate aggressive vs defensive shots."""
-    aggressive_shots = sum(1 for turn in player.get("game_data", []) if len(turn.get("balls_potted", [])) > 0)
-    total_shots = len(player.get("game_data", []))
-    defensive_shots = total_shots - aggressive_shots
-    player["aggressiveShotRatio"] = aggressive_shots / total_shots if total_shots > 0 else 0
-    player["defensiveShotRatio"] = defensive_shots / total_shots if total_shots > 0 else 0
-    logger.debug("Player %s aggressive shots: %f, defensive shots: %f", player.get("username"), player["aggressiveShotRatio"], player["defensiveShotRatio"])
+        if potted > 0:
+            aggressive_shots += 1
+            current_streak += 1
+            if current_streak > max_potting_streak:
+                max_potting_streak = current_streak
+        else:
+            current_streak = 0
 
+        total_wall_hits += len(turn.get("walls_hit", []))
 
-def determine_most_common_ball_hit(player):
-    """Determine the most common ball hit by the player."""
-    ball_hit_counts = {}
-    for turn in player.get("game_data", []):
         ball_hit = turn.get("ball_hit")
         if ball_hit is not None:
             ball_hit_counts[ball_hit] = ball_hit_counts.get(ball_hit, 0) + 1
-    player["mostCommonBallHit"] = max(ball_hit_counts, key=ball_hit_counts.get, default=None)
-    logger.debug("Player %s most common ball hit: %s", player.get("username"), player["mostCommonBallHit"])
 
+        cue_position = turn.get("cue_ball_position", [0, 0])
+        cue_x_total += cue_position[0]
+        cue_y_total += cue_position[1]
+
+    return {
+        "total_shots": total_shots,
+        "total_potted": total_potted,
+        "early_game_pots": early_game_pots,
+        "aggressive_shots": aggressive_shots,
+        "total_wall_hits": total_wall_hits,
+        "max_potting_streak": max_potting_streak,
+        "most_common_ball_hit": max(ball_hit_counts, key=ball_hit_counts.get, default=None),
+        "cue_x_total": cue_x_total,
+        "cue_y_total": cue_y_total,
+    }
 
-def analyze_wall_hits(player):
-    """Analyze wall hits by the player."""
-    total_wall_hits = sum(len(turn.get("walls_hit", [])) for turn in player.get("game_data", []))
-    total_shots = len(player.get("game_data", []))
-    player["averageWallHits"] = total_wall_hits / total_shots if total_shots > 0 else 0
-    logger.debug("Player %s average wall hits: %f", player.get("username"), player["averageWallHits"])
 
+def apply_turn_summary(player, summary):
+    """Write the statistics derived from ``summarize_turns`` onto the player.
 
-def identify_max_potting_streak(player):
-    """Identify the longest streak of successful pots."""
-    max_potting_streak = 0
-    current_streak = 0
-    for turn in player.get("game_data", []):
-        if len(turn.get("balls_potted", [])) > 0:
-            current_streak += 1
-            max_potting_streak = max(max_potting_streak, current_streak)
-        else:
-            current_streak = 0
-    player["maxPottingStreak"] = max_potting_streak
-    logger.debug("Player %s max potting streak: %d", player.get("username"), player["maxPottingStreak"])
+    Sets the potting accuracy, shot ratios, most common ball hit, wall hits,
+    potting streak, cue ball position and game phase statistics, and adds the
+    game to the player's running totals.
+    """
+    total_shots = summary["total_shots"]
+    total_potted = summary["total_potted"]
+    aggressive_shots = summary["aggressive_shots"]
+    result = player.get("result", "")
 
+    player["pottingAccuracy"] = total_potted / total_shots if total_shots > 0 else 0
 
-def analyze_cue_ball_position(player):
-    """Analyze the cue ball positions during the game."""
-    cue_positions = [turn.get("cue_ball_position", [0, 0]) for turn in player.get("game_data", [])]
-    x_positions = [pos[0] for pos in cue_positions]
-    y_positions = [pos[1] for pos in cue_positions]
+    player["games"] = player.get("games", 0) + 1
+    player["games_won"] = player.get("games_won", 0) + (1 if result == "win" else 0)
+    player["games_lost"] = player.get("games_lost", 0) + (1 if result == "loss" else 0)
+    player["balls_potted"] = player.get("balls_potted", 0) + total_potted
+
+    player["aggressiveShotRatio"] = aggressive_shots / total_shots if total_shots > 0 else 0
+    player["defensiveShotRatio"] = (total_shots - aggressive_shots) / total_shots if total_shots > 0 else 0
+    player["mostCommonBallHit"] = summary["most_common_ball_hit"]
+    player["averageWallHits"] = summary["total_wall_hits"] / total_shots if total_shots > 0 else 0
+    player["maxPottingStreak"] = summary["max_potting_streak"]
     player["averageCuePosition"] = {
-        "x": sum(x_positions) / len(x_positions) if x_positions else 0,
-        "y": sum(y_positions) / len(y_positions) if y_positions else 0
+        "x": summary["cue_x_total"] / total_shots if total_shots > 0 else 0,
+        "y": summary["cue_y_total"] / total_shots if total_shots > 0 else 0
     }
-    logger.debug("Player %s average cue ball position: %s", player.get("username"), player["averageCuePosition"])
+    player["earlyGamePots"] = summary["early_game_pots"]
+    player["lateGamePots"] = total_potted - summary["early_game_pots"]
+    logger.debug("Player %s turn summary: %s", player.get("username"), summary)
 
 
-def analyze_game_phases(player):
-    """Analyze game phases (early vs late) for the player."""
-    total_shots = len(player.get("game_data", []))
-    mid_game_index = total_shots // 2
-    early_game_pots = sum(len(player["game_data"][i].get("balls_potted", [])) for i in range(mid_game_index))
-    total_potted = sum(len(turn.get("balls_potted", [])) for turn in player.get("game_data", []))
-    late_game_pots = total_potted - early_game_pots
-    player["earlyGamePots"] = early_game_pots
-    player["lateGamePots"] = late_game_pots
-    logger.debug("Player %s early and late game pots: %d, %d", player.get("username"), player["earlyGamePots"], player["lateGamePots"])
+def calculate_average_fouls(player):
+    """Calculate average fouls per game for the player."""
+    fouls = player.get("fouls", 0)
+    games = player.get("games", 0)
+    player["averageFouls"] = fouls / games if games > 0 else 0
+    logger.debug("Player %s average fouls per game: %f", player.get("username"), player["averageFouls"])
 
 
-def analyze_opponent_performance(player, players):
-    """Analyze performance against opponents."""
-    opponents = [p for p in players if p != player]
+def analyze_opponent_performance(player, players, balls_potted=None):
+    """Analyze performance against opponents.
+
+    ``balls_potted`` can be passed when the total is already known to avoid
+    another walk over the player's turns.
+    """
+    opponents = [p for p in players if p is not player]
     if opponents:
         opponent = opponents[0]
+        if balls_potted is None:
+            balls_potted = sum(len(turn.get("balls_potted", [])) for turn in player.get("game_data", []))
         player["performanceAgainstOpponent"] = {
-            "ballsPotted": sum(len(turn.get("balls_potted", [])) for turn in player.get("game_data", [])),
+            "ballsPotted": balls_potted,
             "fouls": player.get("fouls", 0),
             "win": player.get("result", "") == "win"
         }
-    logger.debug("Player %s performance against opponent: %s", player.get("username"), player.get("performanceAgainstOpponent"))
+    log_payload("Player %s performance against opponent: %s", player.get("username"), payload=player.get("performanceAgainstOpponent"))
 
 
 def analyze_game_history(player):
@@ -285,7 +290,7 @@ def analyze_game_history(player):
         player["recentLossCount"] = sum(1 for game in last_5_games if game["result"] == "loss")
         player["recentTieCount"] = sum(1 for game in last_5_games if game["result"] == "tie")
         player["recentAverageScoreDiff"] = sum(game["score_diff"] for game in last_5_games) / len(last_5_games) if last_5_games else 0
-    logger.debug("Player %s game history analysis: %s", player.get("username"), player)
+    log_payload("Player %s game history analysis: %s", player.get("username"), payload=player)
 
 
 def analyze_streaks(player):
@@ -328,7 +333,7 @@ def analyze_shot_accuracy_trends(player):
     game_data = player.get("game_data", [])
     shot_accuracy = [len(turn.get("balls_potted", [])) / len(turn.get("shot_attempts", [])) if turn.get("shot_attempts") else 0 for turn in game_data]
     player["shotAccuracyTrend"] = shot_accuracy
-    logger.debug("Player %s shot accuracy trends: %s", player.get("username"), player["shotAccuracyTrend"])
+    log_payload("Player %s shot accuracy trends: %s", player.get("username"), payload=player["shotAccuracyTrend"])
 
 
 def add_custom_player_stats(player):
@@ -336,4 +341,4 @@ def add_custom_player_stats(player):
     player["isAggressive"] = player["recentAggressiveBehavior"] > 2
     player["isDefensive"] = player["recentDefensiveBehavior"] > 2
     player["recentActivity"] = True if player["recentWinCount"] > 2 else False
-    logger.debug("Player %s custom stats: %s", player.get("username"), player)
\ No newline at end of file
+    log_payload("Player %s custom stats: %s", player.get("username"), payload=player)
\ No newline at end of file
@@ -0,0 +1,317 @@
+import atexit
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config import Config
+from utils.logger import logger
+
+
+_COMBINE = {
+    "$inc": lambda current, value: current + value,
+    "$max": max,
+    "$min": min,
+    "$push": lambda current, value: {**value, "$each": current["$each"] + value["$each"]},
+}
+
+
+def merge_updates(pending, update):
+    """Combine two MongoDB update documents into one with the same effect.
+
+    ``$inc`` amounts are added, ``$max``/``$min`` keep the extreme value,
+    ``$push`` appends the ``$each`` lists (keeping the later ``$slice``),
+    ``$set`` keeps the later value and ``$setOnInsert`` the earlier one. A
+    later operator on a field the pending update already ``$set`` is folded
+    into that value, since MongoDB rejects two operators on one field.
+
+    Raises:
+        ValueError: If the updates touch a field in ways that cannot be combined.
+    """
+    merged = {operator: dict(fields) for operator, fields in pending.items()}
+    for operator, fields in update.items():
+        for field, value in fields.items():
+            if operator == "$setOnInsert":
+                merged.setdefault(operator, {}).setdefault(field, value)
+                continue
+            owner = next((name for name, current in merged.items()
+                          if name != "$setOnInsert" and field in current), None)
+            if owner is None:
+                merged.setdefault(operator, {})[field] = value
+            elif operator == "$set":
+                del merged[owner][field]
+                merged.setdefault("$set", {})[field] = value
+            elif owner == operator or (owner == "$set" and operator in ("$inc", "$max", "$min")):
+                merged[owner][field] = _COMBINE[operator](merged[owner][field], value)
+            else:
+                raise ValueError(f"Cannot merge {operator} on {field} after {owner}")
+    return {operator: fields for operator, fields in merged.items() if fields}
+
+
+class ProfileCache:
+    """
+    Process-wide cache of player profile documents, keyed by collection and player_id.
+    Entries expire after ``ttl`` seconds and the least recently used are
+    evicted beyond ``max_entries``. Saved profiles are only marked dirty; a
+    background thread writes them every ``flush_interval`` seconds with one
+    bulk_write per collection. Update documents saved for the same profile
+    are merged, so repeated saves of a profile cost one write.
+
+    Pending changes are taken from the entries under the lock and written
+    after it is released, so a slow write never blocks readers; a profile
+    has at most one write in flight. An expired entry is served until its
+    changes are written. Evicted and invalidated entries with changes are
+    kept aside as unsaved until written, and ``get`` returns them. A failed
+    write puts its changes back, ahead of any made since, for the next flush.
+    """
+    def __init__(self, max_entries=10000, ttl=300, flush_interval=5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self._entries = OrderedDict()
+        # Entries that left the cache with changes not yet written
+        self._unsaved = {}
+        # Keys with a write in flight
+        self._writing = set()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "flushes": 0, "profiles_written": 0, "write_errors": 0}
+
+    @staticmethod
+    def _key(collection, player_id):
+        return collection.full_name, player_id
+
+    def get(self, collection, player_id, ttl=None):
+        """Return the cached profile document, or None on a miss.
+
+        Args:
+            collection: The pymongo collection holding the profile.
+            player_id (str): The player's id.
+            ttl (float): Maximum age in seconds, defaults to the cache TTL.
+
+        Returns:
+            dict: The shared profile document; every caller gets the same object.
+        """
+        key = self._key(collection, player_id)
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._reinstate(key)
+            if entry is not None and time.monotonic() - entry["loaded_at"] >= ttl and not self._pending(key, entry):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry["data"]
+
+    def put(self, collection, player_id, data):
+        """Cache a profile document read from MongoDB.
+
+        An entry with unwritten changes already in the cache is kept, so
+        unsaved changes are never dropped.
+
+        Returns:
+            dict: The cached document, which callers should use from then on.
+        """
+        return self._store(collection, player_id, data, dirty=False)
+
+    def mark_dirty(self, collection, player_id, data, update=None):
+        """Record that a profile changed and must be written back.
+
+        Args:
+            data (dict): The changed profile document.
+            update (dict): The update document describing the change; without
+                one the whole document is written with ``$set``. It is copied,
+                so later changes to values it refers to are not written with it.
+
+        Returns:
+            dict: The cached document.
+        """
+        return self._store(collection, player_id, data, dirty=True, update=update)
+
+    def _store(self, collection, player_id, data, dirty, update=None):
+        key = self._key(collection, player_id)
+        if update is not None:
+            # Taken on the caller's thread, before it changes the values the update refers to
+            update = copy.deepcopy(update)
+        with self._lock:
+            entry = self._reinstate(key)
+            if entry is not None and not dirty and self._pending(key, entry):
+                self._entries.move_to_end(key)
+                return entry["data"]
+            # A pending whole-document write (update None) already covers any change
+            pending = None
+            if dirty and update is not None:
+                if entry is None or not entry["dirty"]:
+                    pending = update
+                elif entry["update"] is not None:
+                    pending = merge_updates(entry["update"], update)
+            self._entries[key] = {
+                "data": data,
+                "collection": collection,
+                "loaded_at": time.monotonic() if entry is None or entry["data"] is not data else entry["loaded_at"],
+                "dirty": dirty,
+                "update": pending,
+            }
+            self._entries.move_to_end(key)
+            evicted = {}
+            while len(self._entries) > self.max_entries:
+                evicted_key, evicted_entry = self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+                if self._pending(evicted_key, evicted_entry):
+                    evicted[evicted_key] = evicted_entry
+            self._unsaved.update(evicted)
+            writes = self._take(evicted)
+        self._write(writes)
+        if dirty:
+            self._ensure_flusher()
+        return data
+
+    def invalidate(self, collection=None, player_id=None):
+        """Write back and drop one profile, every profile of a collection, or the whole cache."""
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (collection is None or key[0] == collection.full_name)
+                and (player_id is None or key[1] == player_id)
+            ]
+            dropped = {key: self._entries.pop(key) for key in keys}
+            pending = {key: entry for key, entry in dropped.items() if self._pending(key, entry)}
+            self._unsaved.update(pending)
+            writes = self._take(pending)
+        self._write(writes)
+
+    def flush(self):
+        """Write every dirty profile, including unsaved ones that left the cache."""
+        with self._lock:
+            writes = self._take({**self._entries, **self._unsaved})
+        self._write(writes)
+
+    def stats(self):
+        """Return hit, miss and write-back counts with the hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["dirty"] = sum(1 for entry in self._entries.values() if entry["dirty"])
+            stats["unsaved"] = len(self._unsaved)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        """Stop the background flusher and write every dirty profile."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+
+    def _pending(self, key, entry):
+        # Called with the lock held
+        return entry["dirty"] or key in self._writing
+
+    def _reinstate(self, key):
+        # Called with the lock held; an unsaved entry is newer than the stored profile
+        if key not in self._entries and key in self._unsaved:
+            self._entries[key] = self._unsaved.pop(key)
+        return self._entries.get(key)
+
+    def _take(self, entries):
+        # Called with the lock held. Moves the pending changes of dirty entries
+        # without a write in flight into write requests and marks them clean.
+        # The requests are deep copies, since they are encoded after the lock
+        # is released while the profiles may still be changing.
+        writes = []
+        for key, entry in entries.items():
+            if not entry["dirty"] or key in self._writing:
+                continue
+            writes.append((key, entry, copy.deepcopy(self._pending_update(entry)), entry["update"] is None))
+            entry["dirty"] = False
+            entry["update"] = None
+            self._writing.add(key)
+        return writes
+
+    def _write(self, writes):
+        # Called without the lock
+        if not writes:
+            return
+        by_collection = defaultdict(list)
+        for write in writes:
+            by_collection[write[1]["collection"].full_name].append(write)
+        for batch in by_collection.values():
+            collection = batch[0][1]["collection"]
+            try:
+                collection.bulk_write([
+                    UpdateOne({"player_id": key[1]}, update, upsert=True)
+                    for key, _, update, _ in batch
+                ], ordered=False)
+            except BulkWriteError as e:
+                # Unordered, so every request without a write error was applied
+                failed = [batch[error["index"]] for error in e.details.get("writeErrors", [])]
+                logger.error("Failed to write back %d of %d profiles to %s: %s", len(failed), len(batch),
+                             collection.full_name, e.details.get("writeErrors", [])[:1])
+                self._settle(batch, failed=failed)
+                continue
+            except Exception:
+                logger.exception("Failed to write back %d profiles to %s.", len(batch), collection.full_name)
+                self._settle(batch, failed=batch)
+                continue
+            self._settle(batch, failed=())
+            logger.debug("Wrote back %d profiles to %s.", len(batch), collection.full_name)
+
+    def _settle(self, batch, failed):
+        with self._lock:
+            for key, _, _, _ in batch:
+                self._writing.discard(key)
+            for key, entry, update, whole in failed:
+                current = self._entries.get(key) or self._unsaved.get(key)
+                if current is None:
+                    current = self._unsaved[key] = entry
+                if not current["dirty"]:
+                    current["update"] = None if whole else update
+                elif whole or current["update"] is None:
+                    current["update"] = None
+                else:
+                    try:
+                        current["update"] = merge_updates(update, current["update"])
+                    except ValueError:
+                        current["update"] = None
+                current["dirty"] = True
+            written = len(batch) - len(failed)
+            self._stats["write_errors"] += len(failed)
+            if written:
+                self._stats["flushes"] += 1
+                self._stats["profiles_written"] += written
+            failed_keys = {key for key, _, _, _ in failed}
+            for key, entry, _, _ in batch:
+                if key not in failed_keys and self._unsaved.get(key) is entry and not entry["dirty"]:
+                    del self._unsaved[key]
+
+    @staticmethod
+    def _pending_update(entry):
+        if entry["update"] is not None:
+            return entry["update"]
+        return {"$set": {field: value for field, value in entry["data"].items() if field != "_id"}}
+
+    def _ensure_flusher(self):
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_flusher, name="profile-cache-flusher", daemon=True)
+                self._thread.start()
+
+    def _run_flusher(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+profile_cache = ProfileCache(
+    max_entries=Config.PROFILE_CACHE_MAX_ENTRIES,
+    ttl=Config.PROFILE_CACHE_TTL,
+    flush_interval=Config.PROFILE_CACHE_FLUSH_INTERVAL,
+)
+atexit.register(profile_cache.close)
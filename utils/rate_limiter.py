@@ -0,0 +1,195 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pymongo import ReturnDocument
+from config import Config
+from utils.db_utils import get_database
+from utils.logger import logger
+
+
+def sliding_window_estimate(previous, current, elapsed, window):
+    """Weight the previous window's count by how much of it still overlaps the sliding window."""
+    return previous * (1 - elapsed / window) + current
+
+
+def retry_after_seconds(previous, current, elapsed, window, limit):
+    """Return how long until one more request would fit under the limit."""
+    if current >= limit or previous == 0:
+        return window - elapsed
+    # The estimate falls as the previous window slides out: solve for the elapsed time where it fits
+    fits_at = window * (1 - (limit - current - 1) / previous)
+    return max(fits_at - elapsed, 0.0)
+
+
+class InMemoryRateLimitBackend:
+    """
+    Sliding-window counters held in process memory.
+    Each key stores only its window number and two counts, so a hit is O(1),
+    and the least recently used keys are evicted once ``max_keys`` are tracked.
+    """
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key, limit, window, now):
+        """Count a request for a key if it fits under the limit.
+
+        Returns:
+            tuple: (allowed, remaining, retry_after) where retry_after is in seconds.
+        """
+        window_number = int(now // window)
+        elapsed = now - window_number * window
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None:
+                state = [window_number, 0, 0]
+                self._windows[key] = state
+                if len(self._windows) > self.max_keys:
+                    self._windows.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._windows.move_to_end(key)
+                if state[0] != window_number:
+                    state[2] = state[1] if state[0] == window_number - 1 else 0
+                    state[1] = 0
+                    state[0] = window_number
+
+            _, current, previous = state
+            estimate = sliding_window_estimate(previous, current, elapsed, window)
+            if estimate + 1 > limit:
+                return False, 0, retry_after_seconds(previous, current, elapsed, window, limit)
+            state[1] += 1
+            return True, int(limit - estimate - 1), 0.0
+
+    def stats(self):
+        """Return the number of tracked keys and evictions."""
+        with self._lock:
+            return {"backend": "memory", "tracked_keys": len(self._windows), "evictions": self.evictions}
+
+
+class MongoRateLimitBackend:
+    """
+    Sliding-window counters shared by all workers through a MongoDB collection.
+    Each (key, window) pair is one document updated with an atomic ``$inc``;
+    a TTL index on ``expires_at`` removes windows that are no longer needed.
+    Rejected requests are counted too, so clients that keep retrying stay limited.
+    """
+    def __init__(self, get_database, collection_name="rate_limits"):
+        self.get_database = get_database
+        self.collection_name = collection_name
+        self._index_ready = False
+
+    def _collection(self):
+        collection = self.get_database()[self.collection_name]
+        if not self._index_ready:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._index_ready = True
+        return collection
+
+    def hit(self, key, limit, window, now):
+        """Count a request for a key and report whether it fits under the limit.
+
+        Returns:
+            tuple: (allowed, remaining, retry_after) where retry_after is in seconds.
+        """
+        window_number = int(now // window)
+        elapsed = now - window_number * window
+        collection = self._collection()
+        document = collection.find_one_and_update(
+            {"_id": f"{key}:{window_number}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {"expires_at": datetime.fromtimestamp((window_number + 2) * window, tz=timezone.utc)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        previous_document = collection.find_one({"_id": f"{key}:{window_number - 1}"}, {"count": 1})
+        previous = previous_document["count"] if previous_document else 0
+        current = document["count"] - 1
+        estimate = sliding_window_estimate(previous, current, elapsed, window)
+        if estimate + 1 > limit:
+            return False, 0, retry_after_seconds(previous, current, elapsed, window, limit)
+        return True, int(limit - estimate - 1), 0.0
+
+    def stats(self):
+        """Return the backend name; key counts live in the shared collection."""
+        return {"backend": "mongo", "collection": self.collection_name}
+
+
+class RateLimiter:
+    """
+    Applies per-client limits with a pluggable backend.
+    Clients are identified by IP, except that an API key listed in
+    ``api_key_limits`` gets its own bucket shared by every IP using it. Each
+    route is limited separately.
+    """
+    def __init__(self, backend, default_limit=100, window=60, route_limits=None, api_key_limits=None):
+        self.backend = backend
+        self.default_limit = default_limit
+        self.window = window
+        self.route_limits = route_limits or {}
+        self.api_key_limits = api_key_limits or {}
+        self.rejected = 0
+        self._rejected_lock = threading.Lock()
+
+    def limit_for(self, route, api_key=None):
+        """Return the request limit for a route and client.
+
+        An API key's limit replaces the default, and a route limit caps both.
+        """
+        limit = self.api_key_limits.get(api_key, self.default_limit)
+        route_limit = self.route_limits.get(route)
+        if route_limit is not None:
+            limit = min(limit, route_limit)
+        return limit
+
+    def check(self, route, client_ip, api_key=None, now=None):
+        """Count a request and decide whether it is allowed.
+
+        Returns:
+            tuple: (allowed, limit, remaining, retry_after).
+        """
+        limit = self.limit_for(route, api_key)
+        if api_key and api_key in self.api_key_limits:
+            # API keys are hashed so they are never stored by a shared backend
+            identity = f"key:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+        else:
+            identity = f"ip:{client_ip}"
+        allowed, remaining, retry_after = self.backend.hit(
+            f"{route}|{identity}", limit, self.window, time.time() if now is None else now
+        )
+        if not allowed:
+            with self._rejected_lock:
+                self.rejected += 1
+        return allowed, limit, remaining, math.ceil(retry_after)
+
+    def stats(self):
+        """Return backend statistics and the number of rejected requests."""
+        stats = self.backend.stats()
+        stats["rejected"] = self.rejected
+        return stats
+
+
+def create_rate_limit_backend(name=None):
+    """Return the rate limit backend selected by name, or by ``Config.RATE_LIMIT_BACKEND``."""
+    name = name or Config.RATE_LIMIT_BACKEND
+    if name == "mongo":
+        return MongoRateLimitBackend(get_database)
+    if name != "memory":
+        logger.warning("Unknown rate limit backend '%s', using the in-memory backend.", name)
+    return InMemoryRateLimitBackend(max_keys=Config.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = RateLimiter(
+    backend=create_rate_limit_backend(),
+    default_limit=Config.RATE_LIMIT_DEFAULT,
+    window=Config.RATE_LIMIT_WINDOW,
+    route_limits=Config.RATE_LIMIT_ROUTES,
+    api_key_limits=Config.RATE_LIMIT_API_KEYS
+)
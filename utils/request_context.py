@@ -0,0 +1,34 @@
+from flask import g, request
+from models import GamePayload
+
+
+def get_request_json():
+    """Return the decoded JSON body of the current request, decoding it at most once.
+
+    Returns:
+        The decoded body, or None if the body is missing or not valid JSON.
+    """
+    if "request_json" not in g:
+        g.json_decode_count = g.get("json_decode_count", 0) + 1
+        g.request_json = request.get_json(silent=True)
+    return g.request_json
+
+
+def get_json_decode_count():
+    """Return how many times the current request's body has been decoded."""
+    return g.get("json_decode_count", 0)
+
+
+def get_game_payload():
+    """Return the current request's body validated as a GamePayload, validating it at most once.
+
+    Raises:
+        ValidationError: If the body does not match the GamePayload schema.
+        TypeError: If the body is not a JSON object.
+    """
+    if "game_payload" not in g:
+        request_json = get_request_json()
+        if not isinstance(request_json, dict):
+            raise TypeError("Request body must be a JSON object")
+        g.game_payload = GamePayload(**request_json)
+    return g.game_payload
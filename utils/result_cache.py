@@ -0,0 +1,124 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from config import Config
+from utils import codec
+from utils.db_utils import get_database
+from utils.logger import logger
+
+
+def payload_fingerprint(payload):
+    """Return a canonical content hash of a validated GamePayload.
+
+    Keys are sorted before hashing, so payloads that differ only in key order
+    share a fingerprint.
+
+    Returns:
+        tuple: (fingerprint, size) where size is the canonical payload length in bytes.
+    """
+    canonical = codec.dumps(payload.dict(), sort_keys=True)
+    return hashlib.sha256(canonical).hexdigest(), len(canonical)
+
+
+class ResultCache:
+    """
+    Remembers the outcome of processed payloads by fingerprint.
+    Entries live in an in-memory LRU with a TTL; when ``get_collection`` is
+    given they are also stored in that collection (keyed by _id, so each
+    fingerprint is unique) and shared by every worker.
+    """
+    def __init__(self, max_entries=10000, ttl=600, get_collection=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.get_collection = get_collection
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._index_ready = False
+        self._stats = {"hits": 0, "misses": 0, "bytes_saved": 0}
+
+    def get(self, key, payload_size=0):
+        """Return the stored outcome for a fingerprint, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        result = entry[1] if entry is not None else self._get_persistent(key)
+        with self._lock:
+            if result is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats["bytes_saved"] += payload_size
+        return result
+
+    def put(self, key, result):
+        """Remember the outcome for a fingerprint."""
+        self._put_local(key, result)
+        if self.get_collection is not None:
+            try:
+                expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+                self._collection().update_one(
+                    {"_id": key}, {"$set": {"result": result, "expires_at": expires_at}}, upsert=True
+                )
+            except DuplicateKeyError:
+                pass  # Another worker upserted the same fingerprint at the same time
+            except Exception:
+                logger.exception("Failed to persist result cache entry.")
+
+    def stats(self):
+        """Return hit and miss counts, the hit rate and the payload bytes that were not reprocessed."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _put_local(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _collection(self):
+        collection = self.get_collection()
+        if not self._index_ready:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._index_ready = True
+        return collection
+
+    def _get_persistent(self, key):
+        if self.get_collection is None:
+            return None
+        try:
+            document = self._collection().find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}, {"result": 1}
+            )
+        except Exception:
+            logger.exception("Failed to read result cache entry.")
+            return None
+        if document is None:
+            return None
+        self._put_local(key, document["result"])
+        return document["result"]
+
+
+def get_result_cache_collection():
+    """Return the collection backing the result cache."""
+    return get_database()[Config.RESULT_CACHE_COLLECTION]
+
+
+result_cache = ResultCache(
+    max_entries=Config.RESULT_CACHE_MAX_ENTRIES,
+    ttl=Config.RESULT_CACHE_TTL,
+    get_collection=get_result_cache_collection if Config.RESULT_CACHE_PERSISTENT else None
+)
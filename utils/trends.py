@@ -0,0 +1,112 @@
+def linear_fill(values):
+    """Fill gaps (None) between known values by linear interpolation, like MongoDB's ``$linearFill``.
+
+    Gaps before the first or after the last known value stay None.
+    """
+    filled = list(values)
+    known = [index for index, value in enumerate(filled) if value is not None]
+    for start, end in zip(known, known[1:]):
+        step = (filled[end] - filled[start]) / (end - start)
+        for index in range(start + 1, end):
+            filled[index] = filled[start] + step * (index - start)
+    return filled
+
+
+def least_squares_slope(values):
+    """Return the ordinary least squares slope of values against their positions.
+
+    Uses the closed form ``(n*Sxy - Sx*Sy) / (n*Sxx - Sx^2)``; positions whose
+    value is None are skipped.
+
+    Args:
+        values (list): Numbers in chronological order.
+
+    Returns:
+        float: The slope per position, or 0.0 with fewer than two values.
+    """
+    points = [(x, y) for x, y in enumerate(values) if y is not None]
+    n = len(points)
+    sum_x = sum(x for x, _ in points)
+    sum_y = sum(y for _, y in points)
+    sum_xx = sum(x * x for x, _ in points)
+    sum_xy = sum(x * y for x, y in points)
+    denominator = n * sum_xx - sum_x * sum_x
+    if n < 2 or denominator == 0:
+        return 0.0
+    return (n * sum_xy - sum_x * sum_y) / denominator
+
+
+def _slope_accumulators(metric):
+    # $group sums for the closed-form slope of one metric; null values are left out
+    has_value = {"$cond": [{"$isNumber": f"${metric}"}, 1, 0]}
+    return {
+        f"{metric}_n": {"$sum": has_value},
+        f"{metric}_x": {"$sum": {"$multiply": ["$x", has_value]}},
+        f"{metric}_xx": {"$sum": {"$multiply": ["$x", "$x", has_value]}},
+        f"{metric}_y": {"$sum": f"${metric}"},
+        f"{metric}_xy": {"$sum": {"$multiply": ["$x", f"${metric}"]}},
+    }
+
+
+def _slope_expression(metric):
+    n, x, xx, y, xy = (f"${metric}_{suffix}" for suffix in ("n", "x", "xx", "y", "xy"))
+    denominator = {"$subtract": [{"$multiply": [n, xx]}, {"$multiply": [x, x]}]}
+    return {"$cond": [
+        {"$eq": [denominator, 0]},
+        0.0,
+        {"$divide": [{"$subtract": [{"$multiply": [n, xy]}, {"$multiply": [x, y]}]}, denominator]},
+    ]}
+
+
+def recent_trend_pipeline(player_id, last_n_games, metrics=("accuracy", "fouls"), time_field="game_time"):
+    """Build an aggregation pipeline summarizing a player's most recent games in one round trip.
+
+    The newest ``last_n_games`` are selected with the player/time index, gaps
+    in each metric are filled with ``$linearFill``, and a single ``$group``
+    returns each metric's chronological series, its least squares slope and
+    the number of wins.
+    """
+    window_output = {"x": {"$documentNumber": {}}}
+    window_output.update({metric: {"$linearFill": f"${metric}"} for metric in metrics})
+
+    group = {
+        "_id": None,
+        "games": {"$sum": 1},
+        "wins": {"$sum": {"$cond": ["$win", 1, 0]}},
+    }
+    for metric in metrics:
+        group[f"{metric}_series"] = {"$push": f"${metric}"}
+        group.update(_slope_accumulators(metric))
+
+    project = {"_id": 0, "games": 1, "wins": 1}
+    for metric in metrics:
+        project[f"{metric}_series"] = 1
+        project[f"{metric}_slope"] = _slope_expression(metric)
+
+    return [
+        {"$match": {"player_id": player_id}},
+        {"$sort": {time_field: -1}},
+        {"$limit": last_n_games},
+        {"$setWindowFields": {"sortBy": {time_field: 1}, "output": window_output}},
+        {"$group": group},
+        {"$project": project},
+    ]
+
+
+def summarize_recent_games(games, metrics=("accuracy", "fouls")):
+    """Compute the output of ``recent_trend_pipeline`` in Python.
+
+    Args:
+        games (list): Game documents in chronological order.
+
+    Returns:
+        dict: The same fields as the pipeline, or None if there are no games.
+    """
+    if not games:
+        return None
+    summary = {"games": len(games), "wins": sum(1 for game in games if game.get("win"))}
+    for metric in metrics:
+        series = linear_fill([game.get(metric) for game in games])
+        summary[f"{metric}_series"] = series
+        summary[f"{metric}_slope"] = least_squares_slope(series)
+    return summary
@@ -0,0 +1,212 @@
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from config import Config
+from utils.logger import logger
+
+
+class WriteBehindBuffer:
+    """
+    Collects documents per collection and writes them with unordered bulk_write.
+    A collection is flushed as soon as it holds ``max_documents`` documents, and
+    a background thread flushes anything older than ``max_age`` seconds.
+
+    Documents whose flush fails are buffered again and retried up to
+    ``max_retries`` times; documents the server rejects, or that run out of
+    retries, are counted as dropped.
+    """
+    def __init__(self, get_database, max_documents=500, max_age=1.0, max_retries=3):
+        self.get_database = get_database
+        self.max_documents = max_documents
+        self.max_age = max_age
+        self.max_retries = max_retries
+        self._pending = defaultdict(list)
+        self._first_added = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "flushes": 0,
+            "documents_written": 0,
+            "write_errors": 0,
+            "retries": 0,
+            "documents_dropped": 0,
+            "last_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+        }
+
+    def add(self, collection_name, documents, on_written=None):
+        """Buffer one document or a list of documents for a collection.
+
+        Args:
+            on_written (callable): Called from the flushing thread with the list of
+                documents from this call that were written, once every one of
+                them has been written or dropped. Not called if none were written.
+        """
+        if isinstance(documents, dict):
+            documents = [documents]
+        if not documents:
+            return
+        ticket = {"on_written": on_written, "remaining": len(documents), "written": []}
+        self._ensure_flusher()
+        with self._lock:
+            pending = self._pending[collection_name]
+            if not pending:
+                self._first_added[collection_name] = time.monotonic()
+            # Each entry is (document, ticket, attempts so far)
+            pending.extend((document, ticket, 0) for document in documents)
+            full = len(pending) >= self.max_documents
+        if full:
+            self.flush(collection_name)
+
+    def flush(self, collection_name=None):
+        """Write buffered documents, for one collection or for all of them."""
+        with self._lock:
+            names = [collection_name] if collection_name else list(self._pending)
+            batches = {name: self._pending.pop(name, []) for name in names}
+            for name in names:
+                self._first_added.pop(name, None)
+
+        with self._flush_lock:
+            for name, entries in batches.items():
+                if entries:
+                    self._write(name, entries)
+
+    def stats(self):
+        """Return flush counts and latencies along with the number of buffered documents."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["buffered_documents"] = sum(len(docs) for docs in self._pending.values())
+        stats["average_flush_seconds"] = (
+            stats["total_flush_seconds"] / stats["flushes"] if stats["flushes"] else 0.0
+        )
+        return stats
+
+    def close(self):
+        """Stop the background flusher and write everything still buffered.
+
+        Documents that fail this last flush are dropped rather than retried.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.max_age * 2)
+        self.flush()
+
+    def _write(self, collection_name, entries):
+        start_time = time.perf_counter()
+        documents = [document for document, _, _ in entries]
+        failed = {}
+        errors = 0
+        try:
+            self.get_database()[collection_name].bulk_write(
+                [InsertOne(document) for document in documents], ordered=False
+            )
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            errors = len(write_errors)
+            for error in write_errors:
+                index = error["index"]
+                # A retried document that hits its own _id was written by an earlier attempt
+                if not (error.get("code") == 11000 and entries[index][2] > 0):
+                    failed[index] = False
+            logger.error("Bulk write to %s had %d errors.", collection_name, errors)
+        except Exception:
+            errors = len(entries)
+            # The documents already carry their _id, so a retry cannot insert them twice
+            failed = {index: True for index in range(len(entries))}
+            logger.exception("Failed to flush %d documents to %s.", len(entries), collection_name)
+        duration = time.perf_counter() - start_time
+
+        retry = []
+        finished = []
+        dropped = 0
+        for index, (document, ticket, attempts) in enumerate(entries):
+            if index not in failed:
+                ticket["written"].append(document)
+            elif failed[index] and attempts < self.max_retries and not self._stop.is_set():
+                retry.append((document, ticket, attempts + 1))
+                continue
+            else:
+                dropped += 1
+            ticket["remaining"] -= 1
+            if ticket["remaining"] == 0 and ticket["written"] and ticket["on_written"] is not None:
+                finished.append(ticket)
+        written = len(entries) - len(failed)
+
+        with self._lock:
+            if retry:
+                # Failed documents go back ahead of anything buffered since
+                self._pending[collection_name][:0] = retry
+                self._first_added.setdefault(collection_name, time.monotonic())
+            self._stats["flushes"] += 1
+            self._stats["documents_written"] += written
+            self._stats["write_errors"] += errors
+            self._stats["retries"] += len(retry)
+            self._stats["documents_dropped"] += dropped
+            self._stats["last_flush_seconds"] = duration
+            self._stats["total_flush_seconds"] += duration
+            self._stats["max_flush_seconds"] = max(self._stats["max_flush_seconds"], duration)
+        if dropped:
+            logger.error("Dropped %d documents that could not be written to %s.", dropped, collection_name)
+        logger.info("Flushed %d documents to %s in %.3f seconds.", written, collection_name, duration)
+
+        for ticket in finished:
+            try:
+                ticket["on_written"](ticket["written"])
+            except Exception:
+                logger.exception("Callback for documents written to %s failed.", collection_name)
+
+    def _ensure_flusher(self):
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_flusher, name="write-behind-flusher", daemon=True)
+                self._thread.start()
+
+    def _run_flusher(self):
+        while not self._stop.wait(self.max_age / 2):
+            now = time.monotonic()
+            with self._lock:
+                expired = [name for name, added in self._first_added.items() if now - added >= self.max_age]
+            for name in expired:
+                self.flush(name)
+
+
+_write_buffer = None
+_write_buffer_lock = threading.Lock()
+
+
+def get_write_buffer():
+    """Return the process-wide write-behind buffer, creating it on first use."""
+    global _write_buffer
+    if _write_buffer is None:
+        with _write_buffer_lock:
+            if _write_buffer is None:
+                # Imported here because db_utils imports this module
+                from utils.db_utils import get_database
+                _write_buffer = WriteBehindBuffer(
+                    get_database,
+                    max_documents=Config.WRITE_BUFFER_MAX_DOCUMENTS,
+                    max_age=Config.WRITE_BUFFER_MAX_AGE,
+                    max_retries=Config.WRITE_BUFFER_MAX_RETRIES
+                )
+                atexit.register(_write_buffer.close)
+    return _write_buffer
+
+
+def _reset_after_fork():
+    # Buffered documents belong to the parent; the child starts with an empty buffer.
+    global _write_buffer, _write_buffer_lock
+    _write_buffer = None
+    _write_buffer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -8,6 +8,7 @@ from flask import Flask, request
 from flask_socketio import SocketIO, emit
 from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.errors import ConnectionFailure
+from utils.codec import SocketIOJSON
 
 # ---------------------------------------------------------------------
 # Configuration and Logging Setup
@@ -18,7 +19,7 @@ logger = logging.getLogger("8BallWS")
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default_secret_key')
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", json=SocketIOJSON)
 
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'game_database')